@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.accounts'
-
+    
+    def ready(self):
+        """Import signals when app is ready"""
+        import apps.accounts.signals
@@ -0,0 +1,17 @@
+"""
+Django signals for account profiles
+"""
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from apps.accounts.models import Profile
+
+
+@receiver(pre_save, sender=Profile)
+def remember_previous_timezone(sender, instance, **kwargs):
+    """Keep the stored timezone so local-time counters and caches can react when it changes"""
+    instance._previous_timezone = None
+    if not instance._state.adding:
+        instance._previous_timezone = Profile.objects.filter(
+            pk=instance.pk
+        ).values_list('timezone', flat=True).first()
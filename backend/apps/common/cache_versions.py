@@ -0,0 +1,24 @@
+"""
+Time-based cache versions: bumping a key orphans every value cached under it
+"""
+from django.core.cache import cache
+import time
+
+
+def new_version():
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    """Current version stored under key, created if missing"""
+    return cache.get_or_set(key, new_version, None)
+
+
+def bump_version(key):
+    """Move key to a new version so values cached under the old one are no longer read"""
+    # Fresh versions are time-based so an evicted counter never reuses old keys
+    if not cache.add(key, new_version(), None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, new_version(), None)
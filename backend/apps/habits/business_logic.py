@@ -1,10 +1,15 @@
 """
 Business logic for habit tracking
 """
-from django.db.models import Q, Max
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Max, Count, Exists, OuterRef, Subquery, FloatField
+from django.db.models.functions import Cast
 from django.utils import timezone
 from datetime import date, timedelta
-from .models import Habit, HabitCheck
+from .models import Habit, HabitCheck, PendingHabitCheck
+
+PENDING_CHECK_BATCH_SIZE = getattr(settings, 'HABIT_CHECK_FLUSH_BATCH_SIZE', 1000)
 
 
 class HabitBusinessLogic:
@@ -61,4 +66,167 @@ class HabitBusinessLogic:
         summary.save()
         
         return streak
-
+    
+    @staticmethod
+    def annotate_habit_stats(queryset, today=None):
+        """Annotate habits with today's status and rolling completion rates"""
+        today = today or timezone.now().date()
+        completed = Q(checks__completed=True, checks__date__lte=today)
+        last_7_days = Q(checks__date__gt=today - timedelta(days=7))
+        last_30_days = Q(checks__date__gt=today - timedelta(days=30))
+        
+        if HabitBusinessLogic.write_behind_enabled():
+            # Read-your-writes: expose the latest queued check-in per habit
+            queryset = queryset.annotate(
+                last_pending=Subquery(
+                    PendingHabitCheck.objects.filter(
+                        habit=OuterRef('pk'), date__lte=today
+                    ).order_by('-date').values('date')[:1]
+                )
+            )
+        
+        return queryset.annotate(
+            completed_today=Exists(
+                HabitCheck.objects.filter(habit=OuterRef('pk'), date=today, completed=True)
+            ),
+            completion_rate_7d=Cast(
+                Count('checks', filter=completed & last_7_days), FloatField()
+            ) / 7.0,
+            completion_rate_30d=Cast(
+                Count('checks', filter=completed & last_30_days), FloatField()
+            ) / 30.0,
+            last_completed=Max('checks__date', filter=completed),
+        )
+    
+    @staticmethod
+    def apply_pending_checks(habits, today=None):
+        """Fold queued check-ins into annotated habits so users see their own writes"""
+        today = today or timezone.now().date()
+        for habit in habits:
+            last_pending = getattr(habit, 'last_pending', None)
+            if not last_pending:
+                continue
+            if last_pending == today and not habit.completed_today:
+                habit.completed_today = True
+                habit.completion_rate_7d += 1 / 7
+                habit.completion_rate_30d += 1 / 30
+            if not habit.last_completed or last_pending > habit.last_completed:
+                habit.last_completed = last_pending
+        return habits
+    
+    @staticmethod
+    def attach_current_streaks(habits, today=None):
+        """Set current_streak on each habit using one query for the whole list"""
+        today = today or timezone.now().date()
+        yesterday = today - timedelta(days=1)
+        streaks = {habit.pk: 0 for habit in habits}
+        
+        # A streak can only be running if the habit was completed today or yesterday
+        live_ids = [
+            habit.pk for habit in habits
+            if not hasattr(habit, 'last_completed')
+            or (habit.last_completed and habit.last_completed >= yesterday)
+        ]
+        
+        if live_ids:
+            check_dates = HabitCheck.objects.filter(
+                habit_id__in=live_ids,
+                completed=True,
+                date__lte=today
+            ).order_by('habit_id', '-date').values_list('habit_id', 'date')
+            
+            if HabitBusinessLogic.write_behind_enabled():
+                pending_dates = PendingHabitCheck.objects.filter(
+                    habit_id__in=live_ids,
+                    date__lte=today
+                ).values_list('habit_id', 'date')
+                check_dates = sorted(
+                    set(check_dates) | set(pending_dates),
+                    key=lambda row: (row[0], -row[1].toordinal())
+                )
+            else:
+                check_dates = check_dates.iterator()
+            
+            # Next date that extends the streak, None once the streak is broken
+            expected = {}
+            for habit_id, check_date in check_dates:
+                if habit_id not in expected:
+                    if check_date >= yesterday:
+                        streaks[habit_id] = 1
+                        expected[habit_id] = check_date - timedelta(days=1)
+                    else:
+                        expected[habit_id] = None
+                elif expected[habit_id] == check_date:
+                    streaks[habit_id] += 1
+                    expected[habit_id] = check_date - timedelta(days=1)
+                else:
+                    expected[habit_id] = None
+        
+        for habit in habits:
+            habit.current_streak = streaks[habit.pk]
+        
+        return habits
+    
+    @staticmethod
+    def write_behind_enabled():
+        """Whether check-ins are queued and flushed in batches"""
+        return getattr(settings, 'HABIT_CHECK_WRITE_BEHIND', False)
+    
+    @staticmethod
+    def enqueue_check(habit, check_date):
+        """Queue a check-in for the next flush instead of writing HabitCheck"""
+        return PendingHabitCheck.objects.create(
+            habit=habit,
+            user_id=habit.user_id,
+            date=check_date
+        )
+    
+    @staticmethod
+    def pending_check_habit_ids(user, check_date):
+        """Habit ids with a queued check-in for the date (empty when write-behind is off)"""
+        if not HabitBusinessLogic.write_behind_enabled():
+            return set()
+        return set(PendingHabitCheck.objects.filter(
+            user=user, date=check_date
+        ).values_list('habit_id', flat=True))
+    
+    @staticmethod
+    def discard_pending_checks(habit_id, check_date):
+        """Drop queued check-ins for a habit and date so a flush cannot undo a direct edit"""
+        return PendingHabitCheck.objects.filter(habit_id=habit_id, date=check_date).delete()[0]
+    
+    @staticmethod
+    def flush_pending_checks(batch_size=PENDING_CHECK_BATCH_SIZE):
+        """Flush one batch of queued check-ins into HabitCheck"""
+        from django.contrib.auth.models import User
+        from apps.reports.business_logic import DailySummaryBusinessLogic
+        
+        with transaction.atomic():
+            pending = list(
+                PendingHabitCheck.objects.select_for_update(skip_locked=True)
+                .order_by('id')[:batch_size]
+            )
+            if not pending:
+                return 0
+            
+            # Repeated taps on the same habit collapse into one upsert
+            keys = {(item.habit_id, item.date): item.user_id for item in pending}
+            HabitCheck.objects.bulk_create(
+                [
+                    HabitCheck(habit_id=habit_id, date=check_date, completed=True)
+                    for habit_id, check_date in keys
+                ],
+                update_conflicts=True,
+                unique_fields=['habit', 'date'],
+                update_fields=['completed', 'updated_at']
+            )
+            PendingHabitCheck.objects.filter(id__in=[item.id for item in pending]).delete()
+        
+        # bulk_create skips signals, so daily summaries are refreshed once per user/day
+        # (streaks are computed when read)
+        user_days = set((user_id, check_date) for (_, check_date), user_id in keys.items())
+        users = User.objects.in_bulk({user_id for user_id, _ in user_days})
+        for user_id, check_date in user_days:
+            DailySummaryBusinessLogic.recalculate_daily_summary(users[user_id], check_date)
+        
+        return len(pending)
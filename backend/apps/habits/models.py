@@ -48,3 +48,21 @@ class HabitCheck(models.Model):
     def __str__(self):
         return f"{self.habit.name} - {self.date} ({'✓' if self.completed else '✗'})"
 
+
+
+class PendingHabitCheck(models.Model):
+    """Write-behind queue of check-ins waiting to be flushed into HabitCheck"""
+    habit = models.ForeignKey(Habit, on_delete=models.CASCADE, related_name='pending_checks')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pending_habit_checks')
+    date = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'pending_habit_checks'
+        indexes = [
+            models.Index(fields=['habit', 'date']),
+            models.Index(fields=['user', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.habit.name} - {self.date} (pending)"
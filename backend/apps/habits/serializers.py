@@ -4,12 +4,16 @@ from .models import Habit, HabitCheck
 
 class HabitSerializer(serializers.ModelSerializer):
     current_streak = serializers.SerializerMethodField()
+    completed_today = serializers.SerializerMethodField()
+    completion_rate_7d = serializers.SerializerMethodField()
+    completion_rate_30d = serializers.SerializerMethodField()
     
     class Meta:
         model = Habit
         fields = [
             'id', 'name', 'description', 'reminder_time', 'is_active', 
-            'created_at', 'updated_at', 'current_streak'
+            'created_at', 'updated_at', 'current_streak', 'completed_today',
+            'completion_rate_7d', 'completion_rate_30d'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'current_streak']
     
@@ -19,8 +23,18 @@ class HabitSerializer(serializers.ModelSerializer):
         return value.strip()
     
     def get_current_streak(self, obj):
-        # This would be calculated in the business logic
+        # Set by HabitBusinessLogic.attach_current_streaks
         return obj.current_streak if hasattr(obj, 'current_streak') else 0
+    
+    def get_completed_today(self, obj):
+        # Annotated by HabitBusinessLogic.annotate_habit_stats on list views
+        return getattr(obj, 'completed_today', False)
+    
+    def get_completion_rate_7d(self, obj):
+        return round(getattr(obj, 'completion_rate_7d', 0) or 0, 3)
+    
+    def get_completion_rate_30d(self, obj):
+        return round(getattr(obj, 'completion_rate_30d', 0) or 0, 3)
 
 
 class HabitCheckSerializer(serializers.ModelSerializer):
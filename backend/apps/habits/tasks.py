@@ -0,0 +1,27 @@
+"""
+Celery tasks for write-behind habit check-ins
+"""
+from celery import shared_task
+import logging
+
+from .business_logic import HabitBusinessLogic, PENDING_CHECK_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_pending_habit_checks():
+    """
+    Drain queued check-ins into HabitCheck in batches
+    Scheduled every few seconds with Celery beat when HABIT_CHECK_WRITE_BEHIND is on
+    """
+    total = 0
+    while True:
+        flushed = HabitBusinessLogic.flush_pending_checks()
+        total += flushed
+        if flushed < PENDING_CHECK_BATCH_SIZE:
+            break
+    
+    if total:
+        logger.info(f"Flushed {total} pending habit checks")
+    return total
@@ -0,0 +1,187 @@
+"""
+Tests for habits app
+"""
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from datetime import date, timedelta
+
+from apps.accounts.models import Profile
+from apps.habits.models import Habit, HabitCheck, PendingHabitCheck
+from apps.habits.business_logic import HabitBusinessLogic
+from apps.reports.models import DailySummary
+
+
+class HabitListViewTest(APITestCase):
+    """Test annotated habit list endpoint"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+    
+    def _create_habit_with_checks(self, name, days_completed):
+        habit = Habit.objects.create(user=self.user, name=name, is_active=True)
+        today = date.today()
+        for days_ago in days_completed:
+            HabitCheck.objects.create(
+                habit=habit,
+                date=today - timedelta(days=days_ago),
+                completed=True
+            )
+        return habit
+    
+    def test_habit_list_stats(self):
+        """Test completed_today, completion rates and streak on list"""
+        self._create_habit_with_checks('Drink Water', [0, 1, 2, 5])
+        
+        response = self.client.get(reverse('habit-list'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        habit = response.data[0]
+        self.assertTrue(habit['completed_today'])
+        self.assertEqual(habit['current_streak'], 3)
+        self.assertEqual(habit['completion_rate_7d'], round(4 / 7, 3))
+        self.assertEqual(habit['completion_rate_30d'], round(4 / 30, 3))
+    
+    def test_habit_list_streak_from_yesterday(self):
+        """Test streak still counts when today is not yet checked"""
+        self._create_habit_with_checks('Read', [1, 2])
+        
+        response = self.client.get(reverse('habit-list'))
+        
+        habit = response.data[0]
+        self.assertFalse(habit['completed_today'])
+        self.assertEqual(habit['current_streak'], 2)
+    
+    def test_habit_list_constant_queries(self):
+        """Test query count does not grow with the number of habits"""
+        self._create_habit_with_checks('Habit 1', [0, 1])
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(reverse('habit-list'))
+        
+        for i in range(2, 6):
+            self._create_habit_with_checks(f'Habit {i}', [0, 1, 3])
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse('habit-list'))
+        
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(len(many.captured_queries), len(single.captured_queries))
+
+
+class HabitStreakBusinessLogicTest(TestCase):
+    """Test bulk streak calculation"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+    
+    def test_attach_current_streaks_gap(self):
+        """Test a missed day breaks the streak"""
+        today = date.today()
+        habit = Habit.objects.create(user=self.user, name='Stretch', is_active=True)
+        for days_ago in [0, 1, 3, 4]:
+            HabitCheck.objects.create(
+                habit=habit,
+                date=today - timedelta(days=days_ago),
+                completed=True
+            )
+        
+        HabitBusinessLogic.attach_current_streaks([habit], today)
+        
+        self.assertEqual(habit.current_streak, 2)
+    
+    def test_attach_current_streaks_stale(self):
+        """Test no streak when last completion is older than yesterday"""
+        today = date.today()
+        habit = Habit.objects.create(user=self.user, name='Journal', is_active=True)
+        HabitCheck.objects.create(
+            habit=habit,
+            date=today - timedelta(days=2),
+            completed=True
+        )
+        
+        HabitBusinessLogic.attach_current_streaks([habit], today)
+        
+        self.assertEqual(habit.current_streak, 0)
+
+
+@override_settings(HABIT_CHECK_WRITE_BEHIND=True)
+class HabitCheckWriteBehindTest(APITestCase):
+    """Test write-behind check-ins"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.habit = Habit.objects.create(user=self.user, name='Meditate', is_active=True)
+        self.client.force_authenticate(user=self.user)
+    
+    def test_check_is_queued(self):
+        """Test check-in is acknowledged without writing HabitCheck"""
+        response = self.client.post(reverse('habit-check', args=[self.habit.id]))
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(PendingHabitCheck.objects.count(), 1)
+        self.assertFalse(HabitCheck.objects.exists())
+    
+    def test_pending_check_visible_in_list(self):
+        """Test the user's own queued check shows up before the flush"""
+        HabitCheck.objects.create(
+            habit=self.habit,
+            date=date.today() - timedelta(days=1),
+            completed=True
+        )
+        self.client.post(reverse('habit-check', args=[self.habit.id]))
+        
+        response = self.client.get(reverse('habit-list'))
+        
+        habit = response.data[0]
+        self.assertTrue(habit['completed_today'])
+        self.assertEqual(habit['current_streak'], 2)
+        self.assertEqual(habit['completion_rate_7d'], round(2 / 7, 3))
+    
+    def test_flush_pending_checks(self):
+        """Test flush upserts checks once and refreshes the summary"""
+        self.client.post(reverse('habit-check', args=[self.habit.id]))
+        self.client.post(reverse('habit-check', args=[self.habit.id]))
+        
+        flushed = HabitBusinessLogic.flush_pending_checks()
+        
+        self.assertEqual(flushed, 2)
+        self.assertFalse(PendingHabitCheck.objects.exists())
+        check = HabitCheck.objects.get(habit=self.habit, date=date.today())
+        self.assertTrue(check.completed)
+        summary = DailySummary.objects.get(user=self.user, date=date.today())
+        self.assertEqual(summary.habits_completed, 1)
+    
+    def test_direct_edits_discard_queued_checks(self):
+        """Test unchecking or deleting a check before the flush is not undone by it"""
+        check = HabitCheck.objects.create(habit=self.habit, date=date.today(), completed=True)
+        self.client.post(reverse('habit-check', args=[self.habit.id]))
+        response = self.client.patch(reverse('habitcheck-detail', args=[check.id]), {'completed': False})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        HabitBusinessLogic.flush_pending_checks()
+        check.refresh_from_db()
+        self.assertFalse(check.completed)
+        
+        self.client.post(reverse('habit-check', args=[self.habit.id]))
+        response = self.client.delete(reverse('habitcheck-detail', args=[check.id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(HabitBusinessLogic.flush_pending_checks(), 0)
+        self.assertFalse(HabitCheck.objects.exists())
@@ -5,6 +5,7 @@ from django.utils import timezone
 
 from .models import Habit, HabitCheck
 from .serializers import HabitSerializer, HabitCheckSerializer
+from .business_logic import HabitBusinessLogic
 
 
 class HabitViewSet(viewsets.ModelViewSet):
@@ -13,7 +14,23 @@ class HabitViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Habit.objects.filter(user=self.request.user, is_active=True)
+        queryset = Habit.objects.filter(user=self.request.user, is_active=True)
+        if self.action == 'list':
+            queryset = HabitBusinessLogic.annotate_habit_stats(queryset)
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        """GET /habits - Habits with today's status, completion rates and streaks"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        habits = list(page if page is not None else queryset)
+        HabitBusinessLogic.apply_pending_checks(habits)
+        HabitBusinessLogic.attach_current_streaks(habits)
+        
+        serializer = self.get_serializer(habits, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -24,6 +41,14 @@ class HabitViewSet(viewsets.ModelViewSet):
         habit = self.get_object()
         today = timezone.now().date()
         
+        if HabitBusinessLogic.write_behind_enabled():
+            # Acknowledge now, the flush task writes HabitCheck in batches
+            HabitBusinessLogic.enqueue_check(habit, today)
+            return Response(
+                {'message': 'Habit checked successfully', 'queued': True},
+                status=status.HTTP_202_ACCEPTED
+            )
+        
         habit_check, created = HabitCheck.objects.get_or_create(
             habit=habit,
             date=today,
@@ -40,8 +65,8 @@ class HabitViewSet(viewsets.ModelViewSet):
     def streak(self, request, pk=None):
         """GET /habits/{id}/streak - Get current streak"""
         habit = self.get_object()
-        # Business logic to calculate streak would go here
-        return Response({'streak': 0})
+        HabitBusinessLogic.attach_current_streaks([habit])
+        return Response({'streak': habit.current_streak})
 
 
 class HabitCheckViewSet(viewsets.ModelViewSet):
@@ -51,4 +76,19 @@ class HabitCheckViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         return HabitCheck.objects.filter(habit__user=self.request.user)
+    
+    # A direct write wins over check-ins still queued for the same habit and day
+    def perform_create(self, serializer):
+        check = serializer.save()
+        HabitBusinessLogic.discard_pending_checks(check.habit_id, check.date)
+    
+    def perform_update(self, serializer):
+        previous = (serializer.instance.habit_id, serializer.instance.date)
+        check = serializer.save()
+        HabitBusinessLogic.discard_pending_checks(*previous)
+        HabitBusinessLogic.discard_pending_checks(check.habit_id, check.date)
+    
+    def perform_destroy(self, instance):
+        HabitBusinessLogic.discard_pending_checks(instance.habit_id, instance.date)
+        instance.delete()
 
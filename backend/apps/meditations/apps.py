@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class MeditationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.meditations'
-
+    
+    def ready(self):
+        """Import signals when app is ready"""
+        import apps.meditations.signals
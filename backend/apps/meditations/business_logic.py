@@ -1,35 +1,58 @@
 """
 Business logic for meditation tracking
 """
-from django.db.models import Q, Max
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, Max, Sum, Count, Avg, F
+from django.db.models.functions import TruncWeek, TruncMonth, ExtractHour, ExtractIsoWeekDay
 from django.utils import timezone
 from datetime import date, timedelta
-from .models import MeditationLog
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import calendar
+from apps.common.cache_versions import bump_version, get_version
+from .models import MeditationLog, MeditationWeeklyProgress
+
+MAX_SESSION_MINUTES = 300  # 5 hours
+SUMMARY_CACHE_TIMEOUT = getattr(settings, 'MEDITATION_SUMMARY_CACHE_TIMEOUT', 24 * 60 * 60)
+SUMMARY_GROUPS = ('style', 'weekday', 'hour')
 
 
 class MeditationBusinessLogic:
     """Business logic for meditation tracking"""
     
     @staticmethod
-    def validate_meditation_session(user, date, start_time, duration_minutes):
-        """Validate meditation session data"""
-        # Check for overlapping sessions
-        end_time = start_time + timedelta(minutes=duration_minutes)
-        overlapping = MeditationLog.objects.filter(
+    def find_overlapping_session(user, start_time, end_time, exclude_id=None):
+        """Return a stored session overlapping [start_time, end_time), if any"""
+        # No session lasts longer than MAX_SESSION_MINUTES, so anything overlapping
+        # started inside this window: a bounded range on (user, start_time). The
+        # stored end is then tested rather than assuming stored rows never overlap
+        candidates = MeditationLog.objects.filter(
             user=user,
-            start_time__lt=end_time,
-            date=date
-        ).exclude(
-            Q(start_time__gte=end_time) | Q(start_time__lte=start_time)
-        )
-        
-        if overlapping.exists():
-            raise ValueError("Meditation session overlaps with existing session")
+            start_time__gt=start_time - timedelta(minutes=MAX_SESSION_MINUTES),
+            start_time__lt=end_time
+        ).filter(Q(end_time__gt=start_time) | Q(end_time__isnull=True))
+        if exclude_id:
+            candidates = candidates.exclude(pk=exclude_id)
         
+        for candidate in candidates.order_by('start_time'):
+            candidate_end = candidate.end_time or candidate.start_time + timedelta(minutes=candidate.duration_minutes)
+            if candidate_end > start_time:
+                return candidate
+        return None
+    
+    @staticmethod
+    def validate_meditation_session(user, start_time, duration_minutes, exclude_id=None):
+        """Validate meditation session data"""
         # Check reasonable duration
-        if duration_minutes > 300:  # 5 hours
+        if duration_minutes > MAX_SESSION_MINUTES:
             raise ValueError("Meditation duration too long")
         
+        # Check for overlapping sessions, including ones spanning midnight
+        end_time = start_time + timedelta(minutes=duration_minutes)
+        if MeditationBusinessLogic.find_overlapping_session(user, start_time, end_time, exclude_id):
+            raise ValueError("Meditation session overlaps with existing session")
+        
         return True
     
     @staticmethod
@@ -37,14 +60,14 @@ class MeditationBusinessLogic:
         """Get weekly meditation summary"""
         end_date = start_date + timedelta(days=6)
         
-        logs = MeditationLog.objects.filter(
+        totals = MeditationLog.objects.filter(
             user=user,
             date__gte=start_date,
             date__lte=end_date
-        )
+        ).aggregate(total_minutes=Sum('duration_minutes'), sessions=Count('id'))
         
-        total_minutes = sum(log.duration_minutes for log in logs)
-        sessions = logs.count()
+        total_minutes = totals['total_minutes'] or 0
+        sessions = totals['sessions']
         goal_minutes = user.profile.meditation_goal_minutes * 7
         
         return {
@@ -54,4 +77,227 @@ class MeditationBusinessLogic:
             'goal_achieved': total_minutes >= goal_minutes,
             'average_daily': total_minutes / 7
         }
-
+    
+    @staticmethod
+    def get_session_summary(user, start_date, end_date, group_by=None):
+        """Totals, averages and mood lift over a date range, optionally grouped"""
+        logs = MeditationLog.objects.filter(user=user, date__gte=start_date, date__lte=end_date)
+        
+        if group_by == 'style':
+            logs = logs.values(key=F('style'))
+        elif group_by == 'weekday':
+            logs = logs.values(key=ExtractIsoWeekDay('date'))
+        elif group_by == 'hour':
+            # Hour of day in the user's own timezone
+            try:
+                zone = ZoneInfo(user.profile.timezone)
+            except (ZoneInfoNotFoundError, ValueError):
+                zone = ZoneInfo('UTC')
+            logs = logs.values(key=ExtractHour('start_time', tzinfo=zone))
+        
+        aggregates = dict(
+            total_minutes=Sum('duration_minutes'),
+            sessions=Count('id'),
+            average_minutes=Avg('duration_minutes'),
+            average_mood_delta=Avg(F('post_mood') - F('pre_mood')),
+            mood_sessions=Count('id', filter=Q(pre_mood__isnull=False, post_mood__isnull=False)),
+        )
+        if group_by:
+            rows = list(logs.annotate(**aggregates).order_by('key'))
+        else:
+            rows = [logs.aggregate(**aggregates)]
+        
+        # Overall figures are derived from the groups, no second query
+        total_minutes = sum(row['total_minutes'] or 0 for row in rows)
+        total_sessions = sum(row['sessions'] for row in rows)
+        mood_sessions = sum(row['mood_sessions'] for row in rows)
+        mood_delta_sum = sum(
+            row['average_mood_delta'] * row['mood_sessions']
+            for row in rows if row['mood_sessions']
+        )
+        
+        summary = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'group_by': group_by,
+            'total_minutes': total_minutes,
+            'total_sessions': total_sessions,
+            'average_minutes_per_session': total_minutes / total_sessions if total_sessions > 0 else 0,
+            'average_mood_delta': round(mood_delta_sum / mood_sessions, 2) if mood_sessions else None,
+        }
+        if group_by:
+            summary['groups'] = [
+                {
+                    group_by: row['key'],
+                    'total_minutes': row['total_minutes'],
+                    'sessions': row['sessions'],
+                    'average_minutes': round(row['average_minutes'], 2),
+                    'average_mood_delta': (
+                        round(row['average_mood_delta'], 2) if row['mood_sessions'] else None
+                    ),
+                }
+                for row in rows
+            ]
+        return summary
+    
+    @staticmethod
+    def summary_version_key(user_id):
+        return f'meditations:summary-version:{user_id}'
+    
+    @staticmethod
+    def invalidate_session_summaries(user_id):
+        """Bump the user's summary version so cached summaries are no longer read"""
+        bump_version(MeditationBusinessLogic.summary_version_key(user_id))
+    
+    @staticmethod
+    def get_cached_session_summary(user, start_date, end_date, group_by=None):
+        """Cached summary for a user, valid until their next meditation log write"""
+        version = get_version(MeditationBusinessLogic.summary_version_key(user.id))
+        key = f'meditations:summary:{user.id}:{version}:{start_date}:{end_date}:{group_by or "all"}'
+        summary = cache.get(key)
+        if summary is None:
+            summary = MeditationBusinessLogic.get_session_summary(user, start_date, end_date, group_by)
+            cache.set(key, summary, SUMMARY_CACHE_TIMEOUT)
+        return summary
+    
+    @staticmethod
+    def week_start(day):
+        """Monday of the week containing day"""
+        return day - timedelta(days=day.weekday())
+    
+    @staticmethod
+    def get_goal_progress(user, start_date, end_date, today=None):
+        """Per-week and per-month goal progress over a date range in one grouped query"""
+        today = today or timezone.now().date()
+        daily_goal = user.profile.meditation_goal_minutes
+        
+        # Group by (week, month) pairs so weeks spanning two months roll up both ways
+        rows = MeditationLog.objects.filter(
+            user=user,
+            date__gte=start_date,
+            date__lte=end_date
+        ).annotate(
+            week=TruncWeek('date'),
+            month=TruncMonth('date')
+        ).values('week', 'month').annotate(
+            minutes=Sum('duration_minutes'),
+            session_count=Count('id')
+        ).values_list('week', 'month', 'minutes', 'session_count')
+        
+        week_totals = {}
+        month_totals = {}
+        for week, month, minutes, session_count in rows:
+            for totals, key in ((week_totals, week), (month_totals, month)):
+                current = totals.setdefault(key, [0, 0])
+                current[0] += minutes
+                current[1] += session_count
+        
+        def covered_days(period_start, period_end):
+            return (min(period_end, end_date) - max(period_start, start_date)).days + 1
+        
+        def progress(period_start, period_end, totals):
+            total_minutes, session_count = totals.get(period_start, (0, 0))
+            # Partial periods at the edges of the range get a prorated goal
+            goal_minutes = daily_goal * covered_days(period_start, period_end)
+            return {
+                'total_minutes': total_minutes,
+                'sessions': session_count,
+                'goal_minutes': goal_minutes,
+                'goal_achieved': total_minutes >= goal_minutes,
+                'progress_pct': round(total_minutes / goal_minutes * 100, 1) if goal_minutes else 0
+            }
+        
+        weeks = []
+        week = MeditationBusinessLogic.week_start(start_date)
+        while week <= end_date:
+            weeks.append({'week_start': week, **progress(week, week + timedelta(days=6), week_totals)})
+            week += timedelta(days=7)
+        
+        months = []
+        month = start_date.replace(day=1)
+        while month <= end_date:
+            days_in_month = calendar.monthrange(month.year, month.month)[1]
+            month_end = month.replace(day=days_in_month)
+            months.append({'month': month, **progress(month, month_end, month_totals)})
+            month = month_end + timedelta(days=1)
+        
+        # A week still in progress does not break the streak until it ends
+        current_streak = 0
+        for entry in reversed(weeks):
+            in_progress = entry['week_start'] <= today <= entry['week_start'] + timedelta(days=6)
+            if entry['goal_achieved']:
+                current_streak += 1
+            elif not (in_progress and entry is weeks[-1]):
+                break
+        
+        longest_streak = 0
+        run = 0
+        for entry in weeks:
+            run = run + 1 if entry['goal_achieved'] else 0
+            longest_streak = max(longest_streak, run)
+        
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'daily_goal_minutes': daily_goal,
+            'weeks': weeks,
+            'months': months,
+            'current_streak_weeks': current_streak,
+            'longest_streak_weeks': longest_streak
+        }
+    
+    @staticmethod
+    def apply_weekly_progress(user_id, day, minutes_delta, sessions_delta):
+        """Atomically move the maintained weekly counter for the week containing day"""
+        week = MeditationBusinessLogic.week_start(day)
+        progress, created = MeditationWeeklyProgress.objects.get_or_create(
+            user_id=user_id, week_start=week
+        )
+        MeditationWeeklyProgress.objects.filter(pk=progress.pk).update(
+            total_minutes=F('total_minutes') + minutes_delta,
+            sessions=F('sessions') + sessions_delta
+        )
+    
+    @staticmethod
+    def get_current_week_progress(user, today=None):
+        """Current week's goal progress from the maintained counter (single row lookup)"""
+        today = today or timezone.now().date()
+        week = MeditationBusinessLogic.week_start(today)
+        progress = MeditationWeeklyProgress.objects.filter(user=user, week_start=week).first()
+        
+        total_minutes = progress.total_minutes if progress else 0
+        goal_minutes = user.profile.meditation_goal_minutes * 7
+        
+        return {
+            'week_start': week.isoformat(),
+            'total_minutes': total_minutes,
+            'sessions': progress.sessions if progress else 0,
+            'goal_minutes': goal_minutes,
+            'goal_achieved': total_minutes >= goal_minutes,
+            'progress_pct': round(total_minutes / goal_minutes * 100, 1) if goal_minutes else 0
+        }
+    
+    @staticmethod
+    def rebuild_weekly_progress(user_ids):
+        """Rebuild maintained weekly counters for users with one grouped query"""
+        rows = MeditationLog.objects.filter(
+            user_id__in=user_ids
+        ).annotate(
+            week=TruncWeek('date')
+        ).values('user_id', 'week').annotate(
+            minutes=Sum('duration_minutes'),
+            session_count=Count('id')
+        ).values_list('user_id', 'week', 'minutes', 'session_count')
+        
+        progress = [
+            MeditationWeeklyProgress(
+                user_id=user_id, week_start=week,
+                total_minutes=minutes, sessions=session_count
+            )
+            for user_id, week, minutes, session_count in rows
+        ]
+        
+        with transaction.atomic():
+            MeditationWeeklyProgress.objects.filter(user_id__in=user_ids).delete()
+            MeditationWeeklyProgress.objects.bulk_create(progress)
+        return len(progress)
@@ -0,0 +1,42 @@
+"""
+Management command to rebuild maintained weekly meditation counters
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.meditations.business_logic import MeditationBusinessLogic
+
+
+class Command(BaseCommand):
+    help = 'Rebuild weekly meditation progress counters from meditation logs'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Specific user ID to rebuild (optional, rebuilds all users if not provided)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of users rebuilt per grouped query'
+        )
+    
+    def handle(self, *args, **options):
+        user_id = options.get('user_id')
+        chunk_size = options['chunk_size']
+        
+        if user_id:
+            if not User.objects.filter(id=user_id).exists():
+                raise CommandError(f'User with ID {user_id} not found')
+            user_ids = [user_id]
+        else:
+            user_ids = list(User.objects.values_list('id', flat=True))
+        
+        total_weeks = 0
+        for index in range(0, len(user_ids), chunk_size):
+            total_weeks += MeditationBusinessLogic.rebuild_weekly_progress(user_ids[index:index + chunk_size])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {total_weeks} weekly counters for {len(user_ids)} users')
+        )
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
 import uuid
 
 
@@ -28,6 +30,7 @@ class MeditationLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='meditation_logs')
     date = models.DateField()
     start_time = models.DateTimeField()
+    end_time = models.DateTimeField(blank=True, null=True, editable=False)  # start_time + duration, for range lookups
     duration_minutes = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(300)])
     style = models.CharField(max_length=20, choices=MEDITATION_STYLES)
     custom_style = models.CharField(max_length=50, blank=True, null=True)
@@ -42,8 +45,34 @@ class MeditationLog(models.Model):
         indexes = [
             models.Index(fields=['user', 'date']),
             models.Index(fields=['date', 'duration_minutes']),
+            models.Index(fields=['user', 'start_time']),
         ]
     
     def __str__(self):
         return f"{self.user.username}: {self.duration_minutes}min {self.style} - {self.date}"
+    
+    def save(self, *args, **kwargs):
+        start_time = self.start_time
+        if isinstance(start_time, str):
+            start_time = parse_datetime(start_time)
+        if start_time and self.duration_minutes:
+            self.end_time = start_time + timedelta(minutes=self.duration_minutes)
+        super().save(*args, **kwargs)
+
+
 
+class MeditationWeeklyProgress(models.Model):
+    """Maintained per-week meditation counters for O(1) dashboard reads"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='meditation_weekly_progress')
+    week_start = models.DateField()  # Monday
+    total_minutes = models.IntegerField(default=0)
+    sessions = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'meditation_weekly_progress'
+        unique_together = ['user', 'week_start']
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.total_minutes}min week of {self.week_start}"
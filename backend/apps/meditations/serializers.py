@@ -6,11 +6,11 @@ class MeditationLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = MeditationLog
         fields = [
-            'id', 'date', 'start_time', 'duration_minutes', 'style', 
+            'id', 'date', 'start_time', 'end_time', 'duration_minutes', 'style', 
             'custom_style', 'pre_mood', 'post_mood', 'notes', 
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'end_time', 'created_at', 'updated_at']
     
     def validate(self, data):
         if data['style'] == 'custom' and not data.get('custom_style'):
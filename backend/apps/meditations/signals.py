@@ -0,0 +1,55 @@
+"""
+Django signals maintaining meditation counters and caches
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.accounts.models import Profile
+from apps.meditations.models import MeditationLog
+from apps.meditations.business_logic import MeditationBusinessLogic
+
+
+@receiver(pre_save, sender=MeditationLog)
+def remember_previous_meditation_log(sender, instance, **kwargs):
+    """Keep the stored date/start/duration so counters can be moved on update"""
+    instance._previous_meditation = None
+    if not instance._state.adding:
+        instance._previous_meditation = MeditationLog.objects.filter(
+            pk=instance.pk
+        ).values('date', 'start_time', 'duration_minutes').first()
+
+
+@receiver(post_save, sender=MeditationLog)
+def update_weekly_progress_on_meditation_save(sender, instance, **kwargs):
+    """Move the maintained weekly meditation counter when a log is created/updated"""
+    previous = getattr(instance, '_previous_meditation', None)
+    if previous:
+        MeditationBusinessLogic.apply_weekly_progress(
+            instance.user_id, previous['date'], -previous['duration_minutes'], -1
+        )
+    MeditationBusinessLogic.apply_weekly_progress(
+        instance.user_id, instance.date, instance.duration_minutes, 1
+    )
+
+
+@receiver(post_delete, sender=MeditationLog)
+def update_weekly_progress_on_meditation_delete(sender, instance, **kwargs):
+    """Remove a deleted log from the maintained weekly meditation counter"""
+    MeditationBusinessLogic.apply_weekly_progress(
+        instance.user_id, instance.date, -instance.duration_minutes, -1
+    )
+
+
+@receiver(post_save, sender=MeditationLog)
+@receiver(post_delete, sender=MeditationLog)
+def invalidate_meditation_summary_cache(sender, instance, **kwargs):
+    """Drop cached meditation summaries when a log is created/updated/deleted"""
+    MeditationBusinessLogic.invalidate_session_summaries(instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_meditation_summaries_on_timezone_change(sender, instance, created, **kwargs):
+    """Summaries group by local hour, so drop them when the timezone changes"""
+    previous = getattr(instance, '_previous_timezone', None)
+    if not created and previous and previous != instance.timezone:
+        MeditationBusinessLogic.invalidate_session_summaries(instance.user_id)
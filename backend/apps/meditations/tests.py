@@ -0,0 +1,261 @@
+"""
+Tests for meditations app
+"""
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from apps.accounts.models import Profile
+from apps.meditations.models import MeditationLog, MeditationWeeklyProgress
+from apps.meditations.business_logic import MeditationBusinessLogic
+
+
+class MeditationGoalProgressTest(TestCase):
+    """Test goal-progress engine and maintained weekly counters"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user, meditation_goal_minutes=10)
+    
+    def _log(self, day, minutes):
+        return MeditationLog.objects.create(
+            user=self.user,
+            date=day,
+            start_time=datetime.combine(day, datetime.min.time(), tzinfo=dt_timezone.utc) + timedelta(hours=7),
+            duration_minutes=minutes,
+            style='mindfulness'
+        )
+    
+    def test_goal_progress_weeks_months_and_streak(self):
+        """Test weekly/monthly totals and consecutive weeks meeting goal"""
+        # Weeks starting Mon 2024-01-01, 01-08, 01-15, 01-22, 01-29
+        for week_start, minutes in [(date(2024, 1, 1), 30), (date(2024, 1, 8), 80),
+                                    (date(2024, 1, 15), 70), (date(2024, 1, 22), 75)]:
+            self._log(week_start, minutes)
+        
+        progress = MeditationBusinessLogic.get_goal_progress(
+            self.user, date(2024, 1, 1), date(2024, 1, 28), today=date(2024, 2, 15)
+        )
+        
+        self.assertEqual([w['total_minutes'] for w in progress['weeks']], [30, 80, 70, 75])
+        self.assertEqual([w['goal_achieved'] for w in progress['weeks']], [False, True, True, True])
+        self.assertEqual(progress['current_streak_weeks'], 3)
+        self.assertEqual(progress['longest_streak_weeks'], 3)
+        self.assertEqual(progress['months'][0]['total_minutes'], 255)
+        self.assertEqual(progress['months'][0]['goal_minutes'], 280)  # 28 covered days
+    
+    def test_in_progress_week_does_not_break_streak(self):
+        """Test the current week only counts once its goal is met"""
+        self._log(date(2024, 1, 1), 70)
+        self._log(date(2024, 1, 8), 10)
+        
+        progress = MeditationBusinessLogic.get_goal_progress(
+            self.user, date(2024, 1, 1), date(2024, 1, 14), today=date(2024, 1, 9)
+        )
+        
+        self.assertEqual(progress['current_streak_weeks'], 1)
+    
+    def test_weekly_counter_maintained(self):
+        """Test counters follow create, update and delete"""
+        week = date(2024, 1, 8)
+        log = self._log(week, 20)
+        self._log(week + timedelta(days=2), 15)
+        
+        counter = MeditationWeeklyProgress.objects.get(user=self.user, week_start=week)
+        self.assertEqual((counter.total_minutes, counter.sessions), (35, 2))
+        
+        # Moving a log to the previous week moves its minutes too
+        log.date = week - timedelta(days=1)
+        log.duration_minutes = 25
+        log.save()
+        counter.refresh_from_db()
+        self.assertEqual((counter.total_minutes, counter.sessions), (15, 1))
+        previous = MeditationWeeklyProgress.objects.get(user=self.user, week_start=date(2024, 1, 1))
+        self.assertEqual(previous.total_minutes, 25)
+        
+        log.delete()
+        previous.refresh_from_db()
+        self.assertEqual((previous.total_minutes, previous.sessions), (0, 0))
+        
+        progress = MeditationBusinessLogic.get_current_week_progress(self.user, today=week)
+        self.assertEqual(progress['total_minutes'], 15)
+        self.assertEqual(progress['goal_minutes'], 70)
+    
+    def test_rebuild_weekly_progress(self):
+        """Test bulk rebuild matches maintained counters"""
+        self._log(date(2024, 1, 8), 20)
+        self._log(date(2024, 1, 9), 15)
+        MeditationWeeklyProgress.objects.all().delete()
+        
+        MeditationBusinessLogic.rebuild_weekly_progress([self.user.id])
+        
+        counter = MeditationWeeklyProgress.objects.get(user=self.user, week_start=date(2024, 1, 8))
+        self.assertEqual((counter.total_minutes, counter.sessions), (35, 2))
+
+
+class MeditationOverlapTest(APITestCase):
+    """Test indexed overlap detection for meditation sessions"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.late_session = MeditationLog.objects.create(
+            user=self.user,
+            date=date(2024, 1, 15),
+            start_time=datetime(2024, 1, 15, 23, 30, tzinfo=dt_timezone.utc),
+            duration_minutes=60,
+            style='mindfulness'
+        )
+    
+    def _post(self, start_time, duration_minutes):
+        return self.client.post(reverse('meditation-list'), {
+            'date': start_time.date().isoformat(),
+            'start_time': start_time.isoformat(),
+            'duration_minutes': duration_minutes,
+            'style': 'breathing',
+        })
+    
+    def test_end_time_maintained(self):
+        """Test end_time follows start_time and duration"""
+        self.assertEqual(self.late_session.end_time, datetime(2024, 1, 16, 0, 30, tzinfo=dt_timezone.utc))
+    
+    def test_overlap_across_midnight_rejected(self):
+        """Test a session overlapping one that spans midnight is rejected"""
+        response = self._post(datetime(2024, 1, 16, 0, 15, tzinfo=dt_timezone.utc), 20)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('start_time', response.data)
+    
+    def test_adjacent_sessions_allowed(self):
+        """Test back-to-back sessions do not count as overlapping"""
+        response = self._post(datetime(2024, 1, 16, 0, 30, tzinfo=dt_timezone.utc), 20)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self._post(datetime(2024, 1, 15, 23, 0, tzinfo=dt_timezone.utc), 30)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    
+    def test_update_does_not_overlap_itself(self):
+        """Test editing a session is checked against the others only"""
+        url = reverse('meditation-detail', args=[self.late_session.id])
+        response = self.client.patch(url, {'duration_minutes': 45, 'style': 'mindfulness'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_overlap_found_when_stored_rows_overlap(self):
+        """Test a long session is found behind a later one that bulk writes let overlap it"""
+        evening = datetime(2024, 1, 14, 20, 0, tzinfo=dt_timezone.utc)
+        MeditationLog.objects.bulk_create([
+            MeditationLog(
+                user=self.user, date=evening.date(), start_time=start, end_time=start + timedelta(minutes=minutes),
+                duration_minutes=minutes, style='mindfulness'
+            )
+            for start, minutes in [(evening, 200), (evening + timedelta(hours=1), 10)]
+        ])
+        overlapping = MeditationBusinessLogic.find_overlapping_session(
+            self.user, evening + timedelta(hours=2), evening + timedelta(hours=2, minutes=30)
+        )
+        self.assertEqual(overlapping.start_time, evening)
+    
+    def test_overlap_lookup_bounded_by_longest_session(self):
+        """Test every candidate is limited to sessions starting within the longest session length"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        start = datetime(2024, 1, 15, 22, 0, tzinfo=dt_timezone.utc)
+        with CaptureQueriesContext(connection) as queries:
+            MeditationBusinessLogic.find_overlapping_session(self.user, start, start + timedelta(minutes=30))
+        sql = queries.captured_queries[0]['sql']
+        where = sql[sql.index(' WHERE '):sql.index(' OR ')]
+        self.assertIn('"start_time" > \'2024-01-15 17:00:00', where)
+
+
+class MeditationSummaryTest(APITestCase):
+    """Test grouped meditation summary and its per-user cache"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user, timezone='America/New_York')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('meditation-summary')
+        # Mon 2024-01-15 07:00 and Tue 2024-01-16 12:00 UTC (02:00 and 07:00 in New York)
+        self._log(datetime(2024, 1, 15, 7, 0, tzinfo=dt_timezone.utc), 20, 'mindfulness', 4, 7)
+        self._log(datetime(2024, 1, 15, 12, 0, tzinfo=dt_timezone.utc), 10, 'breathing', None, 8)
+        self._log(datetime(2024, 1, 16, 12, 0, tzinfo=dt_timezone.utc), 30, 'mindfulness', 5, 6)
+    
+    def _log(self, start_time, minutes, style, pre_mood, post_mood):
+        return MeditationLog.objects.create(
+            user=self.user,
+            date=start_time.date(),
+            start_time=start_time,
+            duration_minutes=minutes,
+            style=style,
+            pre_mood=pre_mood,
+            post_mood=post_mood
+        )
+    
+    def _get(self, **params):
+        return self.client.get(self.url, {'start': '2024-01-15', 'end': '2024-01-21', **params})
+    
+    def test_totals_and_mood_delta(self):
+        """Test overall totals and average mood lift ignore sessions without both moods"""
+        response = self._get()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_minutes'], 60)
+        self.assertEqual(response.data['total_sessions'], 3)
+        self.assertEqual(response.data['average_minutes_per_session'], 20)
+        self.assertEqual(response.data['average_mood_delta'], 2.0)  # (3 + 1) / 2
+    
+    def test_group_by_style_weekday_hour(self):
+        """Test each grouping comes back with per-group statistics"""
+        groups = self._get(group_by='style').data['groups']
+        self.assertEqual(
+            [(g['style'], g['total_minutes'], g['sessions'], g['average_mood_delta']) for g in groups],
+            [('breathing', 10, 1, None), ('mindfulness', 50, 2, 2.0)]
+        )
+        
+        groups = self._get(group_by='weekday').data['groups']
+        self.assertEqual([(g['weekday'], g['sessions']) for g in groups], [(1, 2), (2, 1)])
+        
+        groups = self._get(group_by='hour').data['groups']
+        self.assertEqual([(g['hour'], g['sessions']) for g in groups], [(2, 1), (7, 2)])
+    
+    def test_invalid_group_by(self):
+        """Test unknown grouping is rejected"""
+        response = self._get(group_by='month')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_cached_until_next_write(self):
+        """Test summaries are served from cache until a log changes"""
+        self._get()
+        with self.assertNumQueries(0):
+            self._get()
+        
+        self._log(datetime(2024, 1, 17, 7, 0, tzinfo=dt_timezone.utc), 15, 'breathing', None, None)
+        self.assertEqual(self._get().data['total_minutes'], 75)
+    
+    def test_timezone_change_invalidates_cache(self):
+        """Test hour groups are recomputed after the profile timezone changes"""
+        self._get(group_by='hour')
+        self.profile.timezone = 'UTC'
+        self.profile.save()
+        groups = self._get(group_by='hour').data['groups']
+        self.assertEqual([(g['hour'], g['sessions']) for g in groups], [(7, 1), (12, 2)])
+    
+    def test_period_still_supported(self):
+        """Test the legacy period parameter"""
+        response = self.client.get(self.url, {'period': 'month', 'end': '2024-01-21'})
+        self.assertEqual(response.data['period'], 'month')
+        self.assertEqual(response.data['total_sessions'], 3)
@@ -1,11 +1,14 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.contrib.auth.models import User
+from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from .models import MeditationLog
 from .serializers import MeditationLogSerializer
+from .business_logic import MeditationBusinessLogic, SUMMARY_GROUPS
 
 
 class MeditationLogViewSet(viewsets.ModelViewSet):
@@ -17,30 +20,81 @@ class MeditationLogViewSet(viewsets.ModelViewSet):
         return MeditationLog.objects.filter(user=self.request.user)
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        self._save_without_overlap(serializer, user=self.request.user)
+    
+    def perform_update(self, serializer):
+        self._save_without_overlap(serializer)
+    
+    def _save_without_overlap(self, serializer, **kwargs):
+        instance = serializer.instance
+        data = serializer.validated_data
+        start_time = data.get('start_time', instance.start_time if instance else None)
+        duration_minutes = data.get('duration_minutes', instance.duration_minutes if instance else None)
+        
+        with transaction.atomic():
+            # Lock the user row so concurrent writes cannot both pass the overlap check
+            User.objects.select_for_update().get(pk=self.request.user.pk)
+            try:
+                MeditationBusinessLogic.validate_meditation_session(
+                    self.request.user, start_time, duration_minutes,
+                    exclude_id=instance.pk if instance else None
+                )
+            except ValueError as e:
+                raise serializers.ValidationError({'start_time': [str(e)]})
+            serializer.save(**kwargs)
     
     @action(detail=False, methods=['get'])
     def summary(self, request):
-        """GET /meditation/summary?period=week|month"""
-        period = request.query_params.get('period', 'week')
+        """GET /meditation/summary?period=week|month or ?start=&end=&group_by=style|weekday|hour"""
+        period = request.query_params.get('period')
+        start_date = request.query_params.get('start')
+        end_date = request.query_params.get('end')
+        group_by = request.query_params.get('group_by') or None
         today = timezone.now().date()
         
-        if period == 'week':
-            start_date = today - timedelta(days=7)
-        else:  # month
-            start_date = today - timedelta(days=30)
+        if group_by and group_by not in SUMMARY_GROUPS:
+            return Response(
+                {'error': f"group_by must be one of: {', '.join(SUMMARY_GROUPS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        logs = self.get_queryset().filter(date__gte=start_date)
+        try:
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else today
+            if start_date:
+                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+            elif period == 'month':
+                start_date = end_date - timedelta(days=30)
+            else:  # week
+                period = period or 'week'
+                start_date = end_date - timedelta(days=7)
+        except ValueError:
+            return Response({'error': 'Invalid date format'}, status=status.HTTP_400_BAD_REQUEST)
         
-        total_minutes = sum(log.duration_minutes for log in logs)
-        total_sessions = logs.count()
+        if start_date > end_date:
+            return Response({'error': 'start must be before end'}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({
-            'period': period,
-            'start_date': start_date,
-            'end_date': today,
-            'total_minutes': total_minutes,
-            'total_sessions': total_sessions,
-            'average_minutes_per_session': total_minutes / total_sessions if total_sessions > 0 else 0
-        })
-
+        summary = MeditationBusinessLogic.get_cached_session_summary(
+            request.user, start_date, end_date, group_by
+        )
+        return Response({'period': period, **summary})
+    
+    @action(detail=False, methods=['get'])
+    def goals(self, request):
+        """GET /meditation/goals?start=YYYY-MM-DD&end=YYYY-MM-DD - Weekly/monthly goal progress"""
+        today = timezone.now().date()
+        start_date = request.query_params.get('start')
+        end_date = request.query_params.get('end')
+        
+        try:
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else today
+            start_date = (
+                datetime.strptime(start_date, '%Y-%m-%d').date() if start_date
+                else MeditationBusinessLogic.week_start(end_date) - timedelta(weeks=11)
+            )
+        except ValueError:
+            return Response({'error': 'Invalid date format'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if start_date > end_date:
+            return Response({'error': 'start must be before end'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(MeditationBusinessLogic.get_goal_progress(request.user, start_date, end_date))
@@ -0,0 +1,93 @@
+"""
+Grouped SQL aggregation of meal item macros and of the meal totals they maintain
+"""
+from django.db.models import DecimalField, F, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce, Floor, NullIf
+from decimal import Decimal
+
+from .models import Meal, MealItem
+
+MACRO_OUTPUT = DecimalField(max_digits=14, decimal_places=4)
+# quantity x calories is exact to 0.01, so this only absorbs float error on backends without numeric types
+FLOOR_EPSILON = Decimal('0.001')
+DAY_FIELDS = ('calories', 'protein_g', 'carbs_g', 'fat_g')
+
+
+def item_macros():
+    """
+    Per-item macro expressions matching NutritionBusinessLogic.calculate_meal_macros:
+    a non-zero custom value wins, otherwise quantity x food value, calories truncated.
+    """
+    return {
+        'calories': Coalesce(
+            NullIf(F('custom_calories'), Value(0)),
+            Floor(F('quantity') * F('food__calories') + Value(FLOOR_EPSILON)),
+            output_field=IntegerField()
+        ),
+        **{
+            field: Coalesce(
+                NullIf(F(f'custom_{field}'), Value(Decimal('0'))),
+                F('quantity') * F(f'food__{field}'),
+                output_field=MACRO_OUTPUT
+            )
+            for field in ('protein_g', 'carbs_g', 'fat_g')
+        },
+    }
+
+
+def _totals(row):
+    return {
+        'calories': int(row.get('calories') or 0),
+        'protein_g': row.get('protein_g') or Decimal('0'),
+        'carbs_g': row.get('carbs_g') or Decimal('0'),
+        'fat_g': row.get('fat_g') or Decimal('0'),
+    }
+
+
+def empty_totals():
+    return _totals({})
+
+
+class NutritionAggregation:
+    """Calorie and macro totals per meal or per user-day in one grouped query"""
+    
+    @staticmethod
+    def _grouped(items, *group_by):
+        return items.order_by().values(*group_by).annotate(**{
+            field: Sum(expression, output_field=expression.output_field)
+            for field, expression in item_macros().items()
+        })
+    
+    @staticmethod
+    def meal_totals(meal_ids):
+        """meal id -> totals"""
+        rows = NutritionAggregation._grouped(MealItem.objects.filter(meal_id__in=meal_ids), 'meal_id')
+        return {row['meal_id']: _totals(row) for row in rows}
+    
+    @staticmethod
+    def grouped_days(user_ids, start_date=None, end_date=None, dates=None, sums=None):
+        """
+        Meals grouped per (user_id, date) and annotated with sums, by default of the
+        maintained meal totals, which already hold the per-item macro expressions
+        """
+        meals = Meal.objects.filter(user_id__in=user_ids)
+        if start_date:
+            meals = meals.filter(date__gte=start_date)
+        if end_date:
+            meals = meals.filter(date__lte=end_date)
+        if dates is not None:
+            meals = meals.filter(date__in=dates)
+        if sums is None:
+            sums = {field: Sum(f'total_{field}') for field in DAY_FIELDS}
+        return meals.order_by().values('user_id', 'date').annotate(**sums)
+    
+    @staticmethod
+    def daily_totals(user_ids, start_date=None, end_date=None, dates=None):
+        """(user id, date) -> totals for days with at least one meal"""
+        rows = NutritionAggregation.grouped_days(user_ids, start_date, end_date, dates)
+        return {(row['user_id'], row['date']): _totals(row) for row in rows}
+    
+    @staticmethod
+    def day_totals(user_id, day):
+        """Totals for one user and day, zero when nothing was logged"""
+        return NutritionAggregation.daily_totals([user_id], dates=[day]).get((user_id, day)) or empty_totals()
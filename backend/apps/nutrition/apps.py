@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class NutritionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.nutrition'
-
+    
+    def ready(self):
+        """Import signals when app is ready"""
+        import apps.nutrition.signals
@@ -1,11 +1,16 @@
 """
 Business logic for nutrition tracking
 """
-from django.db.models import Q, Max
+from django.db import transaction
+from django.db.models import Q, Max, F
 from django.utils import timezone
 from datetime import date, timedelta
 from decimal import Decimal
 from .models import Food, Meal, MealItem
+from .aggregation import NutritionAggregation, empty_totals
+from .fixed_point import FixedPointNutrition, remaining, rounded
+
+MACRO_FIELDS = ('calories', 'protein_g', 'carbs_g', 'fat_g')
 
 
 class NutritionBusinessLogic:
@@ -13,7 +18,7 @@ class NutritionBusinessLogic:
     
     @staticmethod
     def calculate_meal_macros(meal):
-        """Calculate total macros for a meal"""
+        """Calculate total macros for a meal item by item (reference for NutritionAggregation)"""
         total_calories = 0
         total_protein = Decimal('0')
         total_carbs = Decimal('0')
@@ -49,21 +54,98 @@ class NutritionBusinessLogic:
         }
     
     @staticmethod
-    def update_daily_nutrition_summary(user, date):
-        """Update daily nutrition summary"""
-        meals = Meal.objects.filter(user=user, date=date)
-        
-        total_calories = 0
-        total_protein = Decimal('0')
-        total_carbs = Decimal('0')
-        total_fat = Decimal('0')
+    def item_contribution(quantity, food_macros, custom_macros):
+        """What one meal item adds to its meal totals; custom values win when set"""
+        contribution = {}
+        for field in MACRO_FIELDS:
+            custom = custom_macros.get(field)
+            value = custom if custom else quantity * food_macros[field]
+            contribution[f'total_{field}'] = int(value) if field == 'calories' else value
+        return contribution
+    
+    @staticmethod
+    def meal_item_contribution(item):
+        return NutritionBusinessLogic.item_contribution(
+            item.quantity,
+            {field: getattr(item.food, field) for field in MACRO_FIELDS},
+            {field: getattr(item, f'custom_{field}') for field in MACRO_FIELDS}
+        )
+    
+    @staticmethod
+    def apply_meal_totals(meal_id, contribution, sign=1):
+        """Add (sign=1) or remove (sign=-1) an item's contribution with one atomic UPDATE"""
+        Meal.objects.filter(pk=meal_id).update(**{
+            field: F(field) + value if sign > 0 else F(field) - value
+            for field, value in contribution.items()
+        })
+    
+    @staticmethod
+    def rebuild_meal_totals(meal_ids=None, batch_size=500):
+        """Recompute meal totals from their items, one grouped query per batch"""
+        meals = Meal.objects.order_by('pk')
+        if meal_ids is not None:
+            meals = meals.filter(pk__in=meal_ids)
         
+        rebuilt = 0
+        batch = []
+        for meal in meals.only('pk').iterator(chunk_size=batch_size):
+            batch.append(meal)
+            if len(batch) >= batch_size:
+                rebuilt += NutritionBusinessLogic._write_meal_totals(batch)
+                batch = []
+        if batch:
+            rebuilt += NutritionBusinessLogic._write_meal_totals(batch)
+        return rebuilt
+    
+    @staticmethod
+    def _write_meal_totals(meals):
+        totals = NutritionAggregation.meal_totals([meal.pk for meal in meals])
         for meal in meals:
-            macros = NutritionBusinessLogic.calculate_meal_macros(meal)
-            total_calories += macros['calories']
-            total_protein += macros['protein_g']
-            total_carbs += macros['carbs_g']
-            total_fat += macros['fat_g']
+            macros = totals.get(meal.pk) or empty_totals()
+            for field in MACRO_FIELDS:
+                setattr(meal, f'total_{field}', macros[field])
+        Meal.objects.bulk_update(meals, [f'total_{field}' for field in MACRO_FIELDS])
+        return len(meals)
+    
+    @staticmethod
+    def refresh_meals_for_food(food_id):
+        """Rebuild totals and daily summaries of meals using a food whose macros changed"""
+        from django.contrib.auth.models import User
+        
+        meal_ids = list(Meal.objects.filter(items__food_id=food_id).values_list('pk', flat=True).distinct())
+        if not meal_ids:
+            return 0
+        with transaction.atomic():
+            NutritionBusinessLogic.rebuild_meal_totals(meal_ids)
+        
+        days = list(Meal.objects.filter(pk__in=meal_ids).values_list('user_id', 'date').distinct())
+        users = User.objects.in_bulk({user_id for user_id, _ in days})
+        NutritionBusinessLogic.update_nutrition_summaries(
+            [(users[user_id], day) for user_id, day in days]
+        )
+        return len(meal_ids)
+    
+    @staticmethod
+    def update_nutrition_summaries(user_days):
+        """Refresh nutrition on many (user, date) summaries, summed on integer arrays"""
+        user_days = list(user_days)
+        totals = FixedPointNutrition.daily_totals(
+            {user.id for user, _ in user_days}, dates={day for _, day in user_days}
+        )
+        return [
+            NutritionBusinessLogic.update_daily_nutrition_summary(user, day, totals.get((user.id, day)) or empty_totals())
+            for user, day in user_days
+        ]
+    
+    @staticmethod
+    def update_daily_nutrition_summary(user, date, totals=None):
+        """Update daily nutrition summary"""
+        if totals is None:
+            totals = NutritionAggregation.day_totals(user.id, date)
+        total_calories = totals['calories']
+        total_protein = rounded(totals['protein_g'])
+        total_carbs = rounded(totals['carbs_g'])
+        total_fat = rounded(totals['fat_g'])
         
         # Get user's targets
         profile = user.profile
@@ -72,11 +154,11 @@ class NutritionBusinessLogic:
         carbs_target = profile.carbs_target
         fat_target = profile.fat_target
         
-        # Calculate remaining
+        # Calculate remaining in fixed point so consumed + remaining == target
         calories_remaining = calorie_target - total_calories
-        protein_remaining = protein_target - float(total_protein)
-        carbs_remaining = carbs_target - float(total_carbs)
-        fat_remaining = fat_target - float(total_fat)
+        protein_remaining = remaining(protein_target, total_protein)
+        carbs_remaining = remaining(carbs_target, total_carbs)
+        fat_remaining = remaining(fat_target, total_fat)
         
         # Update or create daily summary
         from apps.reports.models import DailySummary
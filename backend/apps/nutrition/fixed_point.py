@@ -0,0 +1,93 @@
+"""
+Fixed-point nutrition math on integer arrays
+
+Macros are carried as integers in MACRO_SCALE units per gram (a tenth of a
+milligram), the coarsest unit in which a 2-place quantity times a 2-place food
+value stays exact, and calories as millicalories. Day and range totals are
+integer sums of the maintained meal totals from the grouped day query; values
+become Decimal only when they leave for the database or a response.
+"""
+from django.db.models import BigIntegerField, F, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Round
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import chain
+import numpy as np
+
+from .aggregation import NutritionAggregation
+
+QUANTITY_SCALE = 100              # MealItem.quantity has 2 decimal places
+GRAM_SCALE = 100                  # Food and custom grams have 2 decimal places
+MACRO_SCALE = QUANTITY_SCALE * GRAM_SCALE
+MILLI = 1000                      # millicalories per kcal
+MACROS = ('protein_g', 'carbs_g', 'fat_g')
+
+
+def to_units(value, scale):
+    """Decimal, int or None -> integer units, half-up"""
+    return int((Decimal(value or 0) * scale).to_integral_value(ROUND_HALF_UP))
+
+
+def to_decimal(units, scale=MACRO_SCALE):
+    """Integer units -> exact Decimal"""
+    return Decimal(int(units)) / scale
+
+
+def rounded(value, places=2):
+    """Decimal grams rounded half-up through integer units"""
+    step = 10 ** places
+    return to_decimal(to_units(value, step), step)
+
+
+def remaining(target, consumed, places=2):
+    """
+    Whole-gram target minus consumed grams, both at places, so the stored consumed
+    and remaining figures always add back up to the target
+    """
+    step = 10 ** places
+    return to_decimal(target * step - to_units(consumed, step), step)
+
+
+def _scaled(expression, scale):
+    return Coalesce(Cast(Round(expression * Value(scale)), BigIntegerField()), Value(0))
+
+
+def _summed(expression):
+    # Some backends widen integer sums to numeric; cast back so rows hold plain ints
+    return Cast(Sum(expression), BigIntegerField())
+
+
+class FixedPointNutrition:
+    """Bulk calorie and macro totals computed on integer arrays"""
+    
+    @staticmethod
+    def as_decimal(row):
+        """Boundary conversion of one totals row to the NutritionAggregation dict shape"""
+        return {
+            'calories': int(row[0]) // MILLI,
+            **{field: to_decimal(units) for field, units in zip(MACROS, row[1:])},
+        }
+    
+    @staticmethod
+    def daily_units(user_ids, start_date=None, end_date=None, dates=None):
+        """
+        (user id, date) keys and their int64 totals for days with at least one meal,
+        from the grouped day query summing integer units scaled by the database
+        (4-place macro totals are exact in MACRO_SCALE units)
+        """
+        sums = {
+            'fp_calories': _summed(_scaled(F('total_calories'), MILLI)),
+            **{f'fp_{field}': _summed(_scaled(F(f'total_{field}'), MACRO_SCALE)) for field in MACROS},
+        }
+        rows = list(NutritionAggregation.grouped_days(
+            user_ids, start_date, end_date, dates, sums=sums
+        ).values_list('user_id', 'date', *sums))
+        totals = np.fromiter(
+            chain.from_iterable(row[2:] for row in rows), dtype=np.int64, count=len(rows) * len(sums)
+        ).reshape(len(rows), len(sums))
+        return [row[:2] for row in rows], totals
+    
+    @staticmethod
+    def daily_totals(user_ids, start_date=None, end_date=None, dates=None):
+        """(user id, date) -> totals, NutritionAggregation.daily_totals summed in integer units"""
+        keys, totals = FixedPointNutrition.daily_units(user_ids, start_date, end_date, dates)
+        return {key: FixedPointNutrition.as_decimal(row) for key, row in zip(keys, totals)}
@@ -0,0 +1,188 @@
+"""
+Per-user recent and frequent foods as a bounded, time-decayed top-K
+
+Each logged item adds weight 2^((t - EPOCH) / half-life) to its food. Scores
+are kept as logs of those sums relative to a fixed epoch, so no entry ever
+needs decaying: ordering by log-score equals ordering by the decayed score at
+any moment, and the numbers stay small however old the history is.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from itertools import groupby
+import math
+import time
+
+from .models import MealItem
+
+FREQUENT_FOODS_SIZE = getattr(settings, 'FREQUENT_FOODS_SIZE', 30)
+HALF_LIFE_DAYS = getattr(settings, 'FREQUENT_FOODS_HALF_LIFE_DAYS', 14)
+CACHE_TIMEOUT = getattr(settings, 'FREQUENT_FOODS_CACHE_TIMEOUT', 60 * 60 * 24 * 30)
+# A writer holding the per-user lock longer than this is presumed dead
+LOCK_TIMEOUT = 5
+LOCK_ATTEMPTS = 50
+LOCK_WAIT_SECONDS = 0.01
+EPOCH_SECONDS = 1577836800          # 2020-01-01 UTC
+DECAY_PER_SECOND = math.log(2) / (HALF_LIFE_DAYS * 24 * 60 * 60)
+
+
+def log_weight(seconds):
+    """Log of an event's weight at a unix timestamp"""
+    return (seconds - EPOCH_SECONDS) * DECAY_PER_SECOND
+
+
+def log_add(a, b):
+    """log(e^a + e^b) without overflow"""
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+class DecayedTopK:
+    """
+    Min-heap of the K highest log-scores plus each item's heap position, so
+    raising a tracked item or replacing the weakest one is O(log K)
+    """
+    
+    def __init__(self, size):
+        self.size = size
+        self.heap = []          # [log_score, item]
+        self.positions = {}
+    
+    def __len__(self):
+        return len(self.heap)
+    
+    def add(self, item, weight):
+        """Add a log weight to item; an untracked item enters only if it beats the weakest"""
+        position = self.positions.get(item)
+        if position is not None:
+            entry = self.heap[position]
+            entry[0] = log_add(entry[0], weight)
+            self._sift_down(position)
+        elif len(self.heap) < self.size:
+            self.heap.append([weight, item])
+            self.positions[item] = len(self.heap) - 1
+            self._sift_up(len(self.heap) - 1)
+        elif weight > self.heap[0][0]:
+            # The evicted item's history is dropped; a rebuild restores exact scores
+            del self.positions[self.heap[0][1]]
+            self.heap[0] = [weight, item]
+            self.positions[item] = 0
+            self._sift_down(0)
+    
+    def ranked(self):
+        """(item, log_score) pairs, highest first"""
+        return [(item, score) for score, item in sorted(self.heap, key=lambda entry: entry[0], reverse=True)]
+    
+    @classmethod
+    def from_scores(cls, scores, size):
+        """Exact top-K of a complete item -> log_score mapping"""
+        top = cls(size)
+        for item, score in sorted(scores.items(), key=lambda pair: pair[1], reverse=True)[:size]:
+            top.heap.append([score, item])
+        # Reversed to ascending order, which is already a valid min-heap
+        top.heap.reverse()
+        top.positions = {entry[1]: position for position, entry in enumerate(top.heap)}
+        return top
+    
+    def _swap(self, i, j):
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.positions[heap[i][1]] = i
+        self.positions[heap[j][1]] = j
+    
+    def _sift_up(self, position):
+        while position:
+            parent = (position - 1) // 2
+            if self.heap[parent][0] <= self.heap[position][0]:
+                break
+            self._swap(parent, position)
+            position = parent
+    
+    def _sift_down(self, position):
+        count = len(self.heap)
+        while True:
+            smallest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < count and self.heap[child][0] < self.heap[smallest][0]:
+                    smallest = child
+            if smallest == position:
+                return
+            self._swap(position, smallest)
+            position = smallest
+
+
+class FrequentFoods:
+    """Cached per-user top foods, updated as items are logged and rebuilt from history"""
+    
+    @staticmethod
+    def cache_key(user_id):
+        return f'nutrition:frequent-foods:{user_id}'
+    
+    @staticmethod
+    def record(user_id, food_id, logged_at):
+        """
+        Count a newly logged item; builds from history on a cache miss. The cached
+        heap is read, changed and written back under a per-user lock so concurrent
+        logs for the same user cannot overwrite each other's counts
+        """
+        key = FrequentFoods.cache_key(user_id)
+        lock_key = f'{key}:lock'
+        for _ in range(LOCK_ATTEMPTS):
+            if cache.add(lock_key, 1, LOCK_TIMEOUT):
+                break
+            time.sleep(LOCK_WAIT_SECONDS)
+        else:
+            # Rather than risk a lost update, drop the list; the next read rebuilds it exactly
+            cache.delete(key)
+            return
+        
+        try:
+            top = cache.get(key)
+            if top is None:
+                # History already includes this item
+                FrequentFoods.rebuild([user_id])
+                return
+            top.add(food_id, log_weight(logged_at.timestamp()))
+            cache.set(key, top, CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+    
+    @staticmethod
+    def rebuild(user_ids=None):
+        """Recompute exact top-K for users (all users if None) from MealItem history, returning how many had items"""
+        items = MealItem.objects.order_by('meal__user_id')
+        if user_ids is not None:
+            items = items.filter(meal__user_id__in=user_ids)
+        rows = items.values_list('meal__user_id', 'food_id', 'created_at').iterator(chunk_size=5000)
+        
+        rebuilt = set()
+        for user_id, user_rows in groupby(rows, key=lambda row: row[0]):
+            scores = {}
+            for _, food_id, created_at in user_rows:
+                weight = log_weight(created_at.timestamp())
+                scores[food_id] = log_add(scores[food_id], weight) if food_id in scores else weight
+            cache.set(
+                FrequentFoods.cache_key(user_id),
+                DecayedTopK.from_scores(scores, FREQUENT_FOODS_SIZE),
+                CACHE_TIMEOUT
+            )
+            rebuilt.add(user_id)
+        
+        # Users without any items get an empty list rather than a rebuild on every
+        # request, and lose any list cached before their items were deleted
+        if user_ids is None:
+            from django.contrib.auth.models import User
+            user_ids = User.objects.values_list('id', flat=True).iterator(chunk_size=5000)
+        for user_id in user_ids:
+            if user_id not in rebuilt:
+                cache.set(FrequentFoods.cache_key(user_id), DecayedTopK(FREQUENT_FOODS_SIZE), CACHE_TIMEOUT)
+        return len(rebuilt)
+    
+    @staticmethod
+    def top(user_id, limit=FREQUENT_FOODS_SIZE):
+        """(food id, decayed score now) pairs, best first; the score is a half-life-weighted use count"""
+        top = cache.get(FrequentFoods.cache_key(user_id))
+        if top is None:
+            FrequentFoods.rebuild([user_id])
+            top = cache.get(FrequentFoods.cache_key(user_id)) or DecayedTopK(FREQUENT_FOODS_SIZE)
+        now = log_weight(time.time())
+        return [(food_id, math.exp(score - now)) for food_id, score in top.ranked()[:limit]]
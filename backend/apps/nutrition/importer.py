@@ -0,0 +1,154 @@
+"""
+Streaming import of public food datasets into the system catalog
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import csv
+import json
+
+from .models import Food
+
+IMPORT_BATCH_SIZE = 1000
+KJ_PER_KCAL = Decimal('4.184')
+SODIUM_MG_PER_G_SALT = Decimal('400')
+TWO_PLACES = Decimal('0.01')
+
+# Accepted column names per Food field, first non-empty wins
+FIELD_ALIASES = {
+    'name': ('name', 'product_name', 'description', 'food_name'),
+    'brand': ('brand', 'brands', 'brand_name', 'brand_owner'),
+    'serving_size': ('serving_size', 'serving'),
+    'calories': ('calories', 'energy_kcal', 'kcal', 'energy-kcal_100g'),
+    'protein_g': ('protein_g', 'protein', 'proteins_100g'),
+    'carbs_g': ('carbs_g', 'carbohydrates', 'carbs', 'carbohydrates_100g'),
+    'fat_g': ('fat_g', 'fat', 'total_fat', 'fat_100g'),
+    'fiber_g': ('fiber_g', 'fiber', 'fibre', 'fiber_100g'),
+    'sugar_g': ('sugar_g', 'sugars', 'sugar', 'sugars_100g'),
+    'sodium_mg': ('sodium_mg', 'sodium'),
+}
+
+
+class FoodImporter:
+    """Normalise dataset rows to Food and insert them in deduplicated batches"""
+    
+    @staticmethod
+    def iter_rows(handle, fmt):
+        """Yield one dict per record without reading the whole file"""
+        if fmt == 'csv':
+            yield from csv.DictReader(handle)
+            return
+        for line in handle:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+    
+    @staticmethod
+    def _pick(row, field):
+        for alias in FIELD_ALIASES[field]:
+            value = row.get(alias)
+            if value not in (None, ''):
+                return value
+        return None
+    
+    @staticmethod
+    def _decimal(value, max_digits=6):
+        if value is None:
+            return None
+        try:
+            number = Decimal(str(value).strip().replace(',', '.')).quantize(TWO_PLACES, ROUND_HALF_UP)
+        except (InvalidOperation, ValueError):
+            raise ValueError(f'not a number: {value!r}')
+        if number < 0 or number >= Decimal(10) ** (max_digits - 2):
+            raise ValueError(f'out of range: {value!r}')
+        return number
+    
+    @staticmethod
+    def normalize_row(row):
+        """Food field values for a dataset row, or None if it cannot be imported"""
+        if not isinstance(row, dict):
+            return None
+        pick = FoodImporter._pick
+        name = str(pick(row, 'name') or '').strip()
+        brand = str(pick(row, 'brand') or '').strip()
+        if not name:
+            return None
+        
+        try:
+            calories = FoodImporter._decimal(pick(row, 'calories'), max_digits=8)
+            if calories is None and row.get('energy_kj') not in (None, ''):
+                calories = FoodImporter._decimal(Decimal(str(row['energy_kj'])) / KJ_PER_KCAL, max_digits=8)
+            sodium = FoodImporter._decimal(pick(row, 'sodium_mg'), max_digits=8)
+            if sodium is None and row.get('salt_g') not in (None, ''):
+                sodium = FoodImporter._decimal(Decimal(str(row['salt_g'])) * SODIUM_MG_PER_G_SALT, max_digits=8)
+            values = {
+                'protein_g': FoodImporter._decimal(pick(row, 'protein_g')),
+                'carbs_g': FoodImporter._decimal(pick(row, 'carbs_g')),
+                'fat_g': FoodImporter._decimal(pick(row, 'fat_g')),
+                'fiber_g': FoodImporter._decimal(pick(row, 'fiber_g')),
+                'sugar_g': FoodImporter._decimal(pick(row, 'sugar_g')),
+                'sodium_mg': sodium,
+            }
+        except (ValueError, InvalidOperation):
+            return None
+        if calories is None or None in (values['protein_g'], values['carbs_g'], values['fat_g']):
+            return None
+        
+        serving = str(pick(row, 'serving_size') or '').strip()
+        if not serving and row.get('serving_quantity') not in (None, ''):
+            serving = f"{row['serving_quantity']}{row.get('serving_unit') or 'g'}"
+        
+        return {
+            'name': name[:Food._meta.get_field('name').max_length],
+            'brand': brand[:Food._meta.get_field('brand').max_length] or None,
+            'serving_size': serving[:Food._meta.get_field('serving_size').max_length] or '100g',
+            'calories': int(calories.quantize(Decimal('1'), ROUND_HALF_UP)),
+            **values,
+        }
+    
+    @staticmethod
+    def insert_batch(batch):
+        """Insert system foods not already in the catalog, returning (created, duplicates)"""
+        # NULL created_by never collides in the unique constraint, so dedupe explicitly
+        unique = {}
+        for values in batch:
+            unique.setdefault((values['name'], values['brand']), values)
+        existing = set(Food.objects.filter(
+            created_by__isnull=True,
+            name__in={name for name, _ in unique}
+        ).values_list('name', 'brand'))
+        
+        foods = [
+            Food(is_custom=False, **values)
+            for key, values in unique.items() if key not in existing
+        ]
+        Food.objects.bulk_create(foods, ignore_conflicts=True)
+        return len(foods), len(batch) - len(foods)
+    
+    @staticmethod
+    def import_stream(rows, batch_size=IMPORT_BATCH_SIZE, progress=None):
+        """Import an iterable of dataset rows; memory stays bounded by batch_size"""
+        totals = {'rows': 0, 'created': 0, 'duplicates': 0, 'invalid': 0}
+        batch = []
+        for row in rows:
+            totals['rows'] += 1
+            values = FoodImporter.normalize_row(row)
+            if values is None:
+                totals['invalid'] += 1
+                continue
+            batch.append(values)
+            if len(batch) >= batch_size:
+                FoodImporter._flush(batch, totals, progress)
+                batch = []
+        if batch:
+            FoodImporter._flush(batch, totals, progress)
+        return totals
+    
+    @staticmethod
+    def _flush(batch, totals, progress):
+        created, duplicates = FoodImporter.insert_batch(batch)
+        totals['created'] += created
+        totals['duplicates'] += duplicates
+        if progress:
+            progress(totals)
@@ -0,0 +1,163 @@
+"""
+Management command to compare the Decimal item loop with fixed-point array totals
+
+Both paths total the same meal items in memory: the Decimal rows the ORM returns
+and the same rows scaled into an integer item matrix.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import chain
+import random
+import time
+
+import numpy as np
+
+from apps.nutrition.fixed_point import FixedPointNutrition, GRAM_SCALE, MACROS, MILLI, QUANTITY_SCALE
+from apps.nutrition.models import Meal, MealItem
+
+QUANTITIES = ('0.25', '0.29', '0.33', '0.50', '1.00', '1.50', '2.00', '2.50')
+
+# Column layout of an item matrix: scaled quantity, food values and custom values
+QUANTITY = 0
+FOOD = slice(1, 5)
+CUSTOM = slice(5, 9)
+COLUMN_COUNT = 9
+# Brings each custom column (kcal, centigrams) to the total units (millicalories, MACRO_SCALE)
+CUSTOM_TO_TOTAL = np.array([MILLI, QUANTITY_SCALE, QUANTITY_SCALE, QUANTITY_SCALE], dtype=np.int64)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark per-day macro totals: Decimal item loop vs fixed-point integer arrays. '
+        'Both paths total the same items in memory, so query time is excluded; '
+        'the items are synthetic unless --database loads the stored ones'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=200000, help='Synthetic meal items')
+        parser.add_argument('--days', type=int, default=30, help='Days the items are spread over')
+        parser.add_argument('--users', type=int, default=50, help='Users the items are spread over')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the best is reported')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--database', action='store_true',
+            help='Use the stored meal items of every user instead (ignores --items, --days, --users, --seed)'
+        )
+    
+    def handle(self, *args, **options):
+        if min(options['items'], options['days'], options['users'], options['repeat']) < 1:
+            raise CommandError('--items, --days, --users and --repeat must be at least 1')
+        
+        keys, decimal_rows = self._stored_items() if options['database'] else self._dataset(options)
+        items = len(keys)
+        if not items:
+            raise CommandError('No stored meal items to benchmark')
+        integer_rows = [self._integer_row(row) for row in decimal_rows]
+        decimal_seconds, expected = self._best(options['repeat'], lambda: self._decimal_totals(keys, decimal_rows))
+        fixed_seconds, result = self._best(options['repeat'], lambda: self._fixed_totals(keys, integer_rows))
+        
+        if expected != result:
+            raise CommandError('Fixed-point totals differ from the Decimal loop')
+        
+        self.stdout.write(f'Decimal loop:      {decimal_seconds * 1000:8.1f} ms ({items / decimal_seconds:,.0f} items/s)')
+        self.stdout.write(f'Fixed-point array: {fixed_seconds * 1000:8.1f} ms ({items / fixed_seconds:,.0f} items/s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(expected)} user-days identical; fixed point is {decimal_seconds / fixed_seconds:.1f}x faster'
+        ))
+    
+    @staticmethod
+    def _dataset(options):
+        """Synthetic (user, date) keys and item rows shaped as the ORM returns them (Decimal)"""
+        rng = random.Random(options['seed'])
+        foods = [
+            (rng.randint(0, 900), *(Decimal(rng.randint(0, 6000)) / 100 for _ in MACROS))
+            for _ in range(500)
+        ]
+        start = date(2024, 1, 1)
+        keys, decimal_rows = [], []
+        for _ in range(options['items']):
+            keys.append((rng.randrange(options['users']), start + timedelta(days=rng.randrange(options['days']))))
+            quantity = Decimal(rng.choice(QUANTITIES))
+            food = rng.choice(foods)
+            custom = (
+                rng.choice([None, None, None, 0, rng.randint(1, 900)]),
+                *(rng.choice([None, None, None, Decimal(rng.randint(1, 4000)) / 100]) for _ in MACROS),
+            )
+            decimal_rows.append((quantity, food, custom))
+        return keys, decimal_rows
+    
+    @staticmethod
+    def _stored_items():
+        """Stored (user, date) keys and item rows, loaded as Decimals the way calculate_meal_macros reads them"""
+        user_ids = list(Meal.objects.order_by().values_list('user_id', flat=True).distinct())
+        rows = MealItem.objects.filter(meal__user_id__in=user_ids).values_list(
+            'meal__user_id', 'meal__date', 'quantity',
+            'food__calories', *(f'food__{field}' for field in MACROS),
+            'custom_calories', *(f'custom_{field}' for field in MACROS),
+        )
+        keys, decimal_rows = [], []
+        for row in rows:
+            keys.append(row[:2])
+            decimal_rows.append((row[2], row[3:7], row[7:11]))
+        return keys, decimal_rows
+    
+    @staticmethod
+    def _integer_row(row):
+        """One Decimal item row in the scaled item-matrix layout"""
+        quantity, food, custom = row
+        return (
+            int(quantity * QUANTITY_SCALE),
+            food[0], *(int(value * GRAM_SCALE) for value in food[1:]),
+            custom[0] or 0, *(int((value or 0) * GRAM_SCALE) for value in custom[1:]),
+        )
+    
+    @staticmethod
+    def _best(repeat, run):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+    
+    @staticmethod
+    def _decimal_totals(keys, rows):
+        """The calculate_meal_macros loop, grouped per user-day"""
+        totals = {}
+        for key, (quantity, food, custom) in zip(keys, rows):
+            day = totals.setdefault(key, [0, Decimal('0'), Decimal('0'), Decimal('0')])
+            day[0] += custom[0] if custom[0] else int(quantity * food[0])
+            for position in range(1, 4):
+                day[position] += custom[position] if custom[position] else quantity * food[position]
+        return {key: dict(zip(('calories',) + MACROS, values)) for key, values in totals.items()}
+    
+    @staticmethod
+    def _fixed_totals(keys, rows):
+        matrix = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * COLUMN_COUNT)
+        matrix = matrix.reshape(len(rows), COLUMN_COUNT)
+        keys, totals = Command._group_totals(keys, Command._item_totals(matrix))
+        return {key: FixedPointNutrition.as_decimal(row) for key, row in zip(keys, totals)}
+    
+    @staticmethod
+    def _item_totals(matrix):
+        """
+        Per-item (millicalories, protein, carbs, fat) matching calculate_meal_macros:
+        a non-zero custom value wins, otherwise quantity x food value with calories
+        truncated to whole kcal
+        """
+        derived = matrix[:, QUANTITY, None] * matrix[:, FOOD]
+        # quantity x kcal is in hundredths of a kcal; truncate as int() does (all values are >= 0)
+        derived[:, 0] = derived[:, 0] // QUANTITY_SCALE * MILLI
+        custom = matrix[:, CUSTOM]
+        return np.where(custom != 0, custom * CUSTOM_TO_TOTAL, derived)
+    
+    @staticmethod
+    def _group_totals(keys, values):
+        """Sum rows of values sharing a key -> (distinct keys, int64 totals)"""
+        codes = {}
+        index = np.fromiter((codes.setdefault(key, len(codes)) for key in keys), dtype=np.intp, count=len(keys))
+        totals = np.zeros((len(codes), values.shape[1]), dtype=np.int64)
+        np.add.at(totals, index, values)
+        return list(codes), totals
@@ -0,0 +1,32 @@
+"""
+Management command to build the memory-mapped food autocomplete index
+"""
+from django.core.management.base import BaseCommand
+import os
+import time
+
+from apps.nutrition.prefix_index import FoodAutocomplete, index_path
+
+
+class Command(BaseCommand):
+    help = 'Build the prefix index file for system food autocomplete'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            help='Index file to write (defaults to FOOD_PREFIX_INDEX_PATH)'
+        )
+    
+    def handle(self, *args, **options):
+        path = options.get('path') or index_path()
+        
+        started = time.monotonic()
+        foods, keys = FoodAutocomplete.build(path)
+        elapsed = time.monotonic() - started
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Indexed {foods} foods under {keys} keys in {path} '
+                f'({os.path.getsize(path)} bytes, {elapsed:.1f}s)'
+            )
+        )
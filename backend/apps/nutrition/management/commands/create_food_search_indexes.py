@@ -0,0 +1,34 @@
+"""
+Management command to create the Postgres indexes behind food search
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.nutrition.models import Food
+from apps.nutrition.search import search_indexes
+
+
+class Command(BaseCommand):
+    help = 'Create full-text and trigram GIN indexes on foods (PostgreSQL only)'
+    
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError(
+                f'Food search indexes require PostgreSQL; {connection.vendor} uses the fallback search'
+            )
+        
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            existing = connection.introspection.get_constraints(cursor, Food._meta.db_table)
+        
+        created = 0
+        for index in search_indexes():
+            if index.name in existing:
+                self.stdout.write(f'{index.name} already exists')
+                continue
+            # Built concurrently so a large catalog stays writable meanwhile
+            with connection.schema_editor(atomic=False) as editor:
+                editor.add_index(Food, index, concurrently=True)
+            created += 1
+            self.stdout.write(f'Created {index.name}')
+        
+        self.stdout.write(self.style.SUCCESS(f'Created {created} food search indexes'))
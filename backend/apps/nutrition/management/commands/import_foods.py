@@ -0,0 +1,61 @@
+"""
+Management command to stream a food dataset into the system catalog
+"""
+from django.core.management.base import BaseCommand, CommandError
+import os
+import time
+
+from apps.nutrition.importer import FoodImporter, IMPORT_BATCH_SIZE
+
+PROGRESS_EVERY_ROWS = 50000
+
+
+class Command(BaseCommand):
+    help = 'Import system foods from a CSV or JSON-lines file in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON-lines food dataset')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='File format (inferred from the extension if omitted)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Rows inserted per bulk_create'
+        )
+    
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File {path} not found')
+        fmt = options.get('format') or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+        
+        started = time.monotonic()
+        reported = {'rows': 0}
+        
+        def progress(totals):
+            if totals['rows'] - reported['rows'] < PROGRESS_EVERY_ROWS:
+                return
+            reported['rows'] = totals['rows']
+            rate = totals['rows'] / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f"{totals['rows']} rows, {totals['created']} created ({rate:.0f} rows/s)")
+        
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            totals = FoodImporter.import_stream(
+                FoodImporter.iter_rows(handle, fmt), batch_size=batch_size, progress=progress
+            )
+        
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {totals['created']} foods from {totals['rows']} rows in {elapsed:.1f}s "
+                f"({totals['rows'] / elapsed:.0f} rows/s); "
+                f"{totals['duplicates']} duplicates, {totals['invalid']} invalid"
+            )
+        )
@@ -0,0 +1,31 @@
+"""
+Management command to rebuild cached frequent foods from meal history
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.nutrition.frequent import FrequentFoods
+
+
+class Command(BaseCommand):
+    help = 'Recompute each user\'s time-decayed top foods from their logged meal items'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Specific user ID to rebuild (optional, rebuilds all users if not provided)'
+        )
+    
+    def handle(self, *args, **options):
+        user_id = options.get('user_id')
+        
+        if user_id:
+            if not User.objects.filter(id=user_id).exists():
+                raise CommandError(f'User with ID {user_id} not found')
+            rebuilt = FrequentFoods.rebuild([user_id])
+        else:
+            rebuilt = FrequentFoods.rebuild()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt frequent foods for {rebuilt} users')
+        )
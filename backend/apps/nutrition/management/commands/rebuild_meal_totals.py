@@ -0,0 +1,43 @@
+"""
+Management command to rebuild denormalized meal macro totals
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.nutrition.models import Food, Meal
+from apps.nutrition.business_logic import NutritionBusinessLogic
+
+
+class Command(BaseCommand):
+    help = 'Recompute calorie, protein, carb and fat totals on meals from their items'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Specific user ID to rebuild (optional, rebuilds all users if not provided)'
+        )
+        parser.add_argument(
+            '--food-id',
+            help='Rebuild only meals using this food, and their daily summaries (after a catalog edit)'
+        )
+    
+    def handle(self, *args, **options):
+        user_id = options.get('user_id')
+        food_id = options.get('food_id')
+        
+        if food_id:
+            if not Food.objects.filter(id=food_id).exists():
+                raise CommandError(f'Food with ID {food_id} not found')
+            rebuilt = NutritionBusinessLogic.refresh_meals_for_food(food_id)
+        elif user_id:
+            if not User.objects.filter(id=user_id).exists():
+                raise CommandError(f'User with ID {user_id} not found')
+            rebuilt = NutritionBusinessLogic.rebuild_meal_totals(
+                Meal.objects.filter(user_id=user_id).values_list('id', flat=True)
+            )
+        else:
+            rebuilt = NutritionBusinessLogic.rebuild_meal_totals()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {rebuilt} meals')
+        )
@@ -53,6 +53,13 @@ class Meal(models.Model):
     date = models.DateField()
     meal_type = models.CharField(max_length=20, choices=MEAL_TYPES)
     notes = models.TextField(blank=True, null=True)
+    
+    # Denormalized totals over items, maintained by signals
+    total_calories = models.PositiveIntegerField(default=0)
+    total_protein_g = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    total_carbs_g = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    total_fat_g = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -65,6 +72,18 @@ class Meal(models.Model):
     
     def __str__(self):
         return f"{self.user.username}: {self.meal_type} - {self.date}"
+    
+    TOTAL_FIELDS = ('total_calories', 'total_protein_g', 'total_carbs_g', 'total_fat_g')
+    
+    def save(self, *args, **kwargs):
+        # Totals are rewritten by item and food signals; saving an existing meal
+        # must not write back the possibly stale copy loaded with it
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.TOTAL_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
 
 class MealItem(models.Model):
@@ -0,0 +1,255 @@
+"""
+Memory-mapped prefix index over the system food catalog with a per-user overlay
+
+The index file is built by `build_food_prefix_index` and mapped read-only by
+every worker, so the pages are shared through the OS page cache instead of
+being copied into each process. Layout (little-endian):
+
+    header   magic, key count, food count, text bytes
+    keys     key count x (KEY_BYTES normalised key, uint32 food number), sorted
+    foods    food count x (16-byte uuid, uint32 text offset, uint16 name bytes, uint16 brand bytes)
+    text     UTF-8 names and brands
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from bisect import bisect_left
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import unicodedata
+import uuid
+
+from .models import Food
+
+MAGIC = b'FPX1'
+KEY_BYTES = 32
+HEADER = struct.Struct('<4sIII')
+KEY_RECORD = struct.Struct(f'<{KEY_BYTES}sI')
+FOOD_RECORD = struct.Struct('<16sIHH')
+AUTOCOMPLETE_LIMIT = 20
+USER_CACHE_TIMEOUT = getattr(settings, 'FOOD_AUTOCOMPLETE_USER_TIMEOUT', 60 * 60)
+# How long a worker trusts its mapping before checking whether the file was replaced
+FILE_CHECK_SECONDS = getattr(settings, 'FOOD_PREFIX_INDEX_CHECK_SECONDS', 5)
+
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+_lock = threading.Lock()
+_loaded = {'path': None, 'stat': None, 'index': None, 'checked_at': 0.0}
+
+
+def index_path():
+    default = os.path.join(str(getattr(settings, 'BASE_DIR', '.')), 'var', 'food_prefix.idx')
+    return getattr(settings, 'FOOD_PREFIX_INDEX_PATH', default)
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def encode_key(text):
+    return normalize(text).encode('utf-8')[:KEY_BYTES]
+
+
+def food_keys(name, brand):
+    """Keys starting at every word of the name and brand, so 'breast' finds 'Chicken Breast'"""
+    keys = set()
+    for text in (name, brand):
+        words = normalize(text).split(' ') if text else []
+        for start in range(len(words)):
+            keys.add(' '.join(words[start:]).encode('utf-8')[:KEY_BYTES])
+    keys.discard(b'')
+    return keys
+
+
+def write_index(path, foods):
+    """Write an index for (id, name, brand) rows to path, replacing any existing file atomically"""
+    foods = sorted(foods, key=lambda food: (normalize(food[1]), str(food[0])))
+    keys = []
+    food_records = []
+    text = bytearray()
+    for number, (food_id, name, brand) in enumerate(foods):
+        name_bytes = name.encode('utf-8')[:0xFFFF]
+        brand_bytes = (brand or '').encode('utf-8')[:0xFFFF]
+        food_records.append(FOOD_RECORD.pack(food_id.bytes, len(text), len(name_bytes), len(brand_bytes)))
+        text += name_bytes + brand_bytes
+        keys.extend((key, number) for key in food_keys(name, brand))
+    keys.sort()
+    
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as handle:
+        handle.write(HEADER.pack(MAGIC, len(keys), len(food_records), len(text)))
+        for key, number in keys:
+            handle.write(KEY_RECORD.pack(key, number))
+        handle.writelines(food_records)
+        handle.write(text)
+    # Workers still mapping the old file keep reading it until they notice the swap
+    os.replace(temp_path, path)
+    return len(food_records), len(keys)
+
+
+class PrefixIndex:
+    """Read-only view over a mapped index file"""
+    
+    def __init__(self, path):
+        with open(path, 'rb') as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.key_count, self.food_count, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a food prefix index')
+        self._keys_at = HEADER.size
+        self._foods_at = self._keys_at + self.key_count * KEY_RECORD.size
+        self._text_at = self._foods_at + self.food_count * FOOD_RECORD.size
+    
+    def _key(self, position):
+        offset = self._keys_at + position * KEY_RECORD.size
+        return self._map[offset:offset + KEY_BYTES]
+    
+    def food(self, number):
+        raw_id, offset, name_length, brand_length = FOOD_RECORD.unpack_from(
+            self._map, self._foods_at + number * FOOD_RECORD.size
+        )
+        start = self._text_at + offset
+        brand = self._map[start + name_length:start + name_length + brand_length].decode('utf-8')
+        return {
+            'id': uuid.UUID(bytes=raw_id),
+            'name': self._map[start:start + name_length].decode('utf-8'),
+            'brand': brand or None,
+            'is_custom': False,
+        }
+    
+    def search(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        """Foods with a key starting with the encoded prefix, in key order"""
+        low, high = 0, self.key_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        
+        numbers = []
+        position = low
+        while position < self.key_count and len(numbers) < limit:
+            key, number = KEY_RECORD.unpack_from(self._map, self._keys_at + position * KEY_RECORD.size)
+            if not key.startswith(prefix):
+                break
+            if number not in numbers:
+                numbers.append(number)
+            position += 1
+        return [self.food(number) for number in numbers]
+
+
+class FoodAutocomplete:
+    """Prefix lookups served from the mapped system index and a cached custom-food overlay"""
+    
+    @staticmethod
+    def system_index():
+        """The mapped index for this worker, remapped when the file is replaced; None if not built"""
+        now = time.monotonic()
+        path = index_path()
+        if _loaded['path'] == path and now - _loaded['checked_at'] < FILE_CHECK_SECONDS:
+            return _loaded['index']
+        
+        with _lock:
+            try:
+                stat = os.stat(path)
+                signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                signature = None
+            if signature != _loaded['stat'] or path != _loaded['path']:
+                _loaded['index'] = PrefixIndex(path) if signature else None
+                _loaded['stat'] = signature
+                _loaded['path'] = path
+            _loaded['checked_at'] = now
+        return _loaded['index']
+    
+    @staticmethod
+    def user_cache_key(user_id):
+        return f'nutrition:custom-food-keys:{user_id}'
+    
+    @staticmethod
+    def custom_entries(user_id):
+        """Sorted (key, food) pairs for a user's custom foods"""
+        key = FoodAutocomplete.user_cache_key(user_id)
+        entries = cache.get(key)
+        if entries is None:
+            entries = sorted(
+                (food_key, str(food['id']), food)
+                for food in Food.objects.filter(is_custom=True, created_by_id=user_id).values('id', 'name', 'brand')
+                for food_key in food_keys(food['name'], food['brand'])
+            )
+            entries = [(food_key, {**food, 'is_custom': True}) for food_key, _, food in entries]
+            cache.set(key, entries, USER_CACHE_TIMEOUT)
+        return entries
+    
+    @staticmethod
+    def complete(user_id, query, limit=AUTOCOMPLETE_LIMIT):
+        """Up to limit foods whose name or brand has a word starting with query, custom foods first"""
+        prefix = encode_key(query)
+        if not prefix:
+            return []
+        
+        entries = FoodAutocomplete.custom_entries(user_id)
+        results = []
+        seen = set()
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and entries[position][0].startswith(prefix) and len(results) < limit:
+            food = entries[position][1]
+            if food['id'] not in seen:
+                seen.add(food['id'])
+                results.append(food)
+            position += 1
+        
+        if len(results) < limit:
+            index = FoodAutocomplete.system_index()
+            if index is not None:
+                system = index.search(prefix, limit)
+            else:
+                system = FoodAutocomplete.database_search(query, prefix, limit)
+            for food in system:
+                if food['id'] not in seen and len(results) < limit:
+                    seen.add(food['id'])
+                    results.append(food)
+        return results
+    
+    @staticmethod
+    def database_search(query, prefix, limit=AUTOCOMPLETE_LIMIT):
+        """
+        System foods matching prefix exactly as the index would, for when no index
+        file is built: the database narrows to names or brands containing the first
+        query word, then each candidate's keys are checked against the prefix
+        """
+        # The database sees unfolded text, so narrow on the word as typed and as folded
+        typed = next(word for word in _NON_WORD.split(query) if word)
+        folded = prefix.decode('utf-8', 'ignore').split(' ')[0]
+        contains = Q()
+        for word in {typed, folded}:
+            contains |= Q(name__icontains=word) | Q(brand__icontains=word)
+        
+        results = []
+        candidates = Food.objects.filter(contains, is_custom=False).order_by('name').values('id', 'name', 'brand')
+        for food in candidates.iterator(chunk_size=500):
+            if any(key.startswith(prefix) for key in food_keys(food['name'], food['brand'])):
+                results.append({**food, 'is_custom': False})
+                if len(results) >= limit:
+                    break
+        return results
+    
+    @staticmethod
+    def invalidate(food):
+        """Drop a user's overlay after a custom food changes; system edits wait for the next build"""
+        if food.is_custom and food.created_by_id:
+            cache.delete(FoodAutocomplete.user_cache_key(food.created_by_id))
+    
+    @staticmethod
+    def build(path=None):
+        """Write the system catalog to the index file, returning (foods, keys)"""
+        foods = Food.objects.filter(is_custom=False).values_list('id', 'name', 'brand').iterator(chunk_size=5000)
+        return write_index(path or index_path(), foods)
@@ -0,0 +1,115 @@
+"""
+Ranked food search: Postgres full-text + trigram, with a portable fallback
+"""
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from datetime import timedelta
+import re
+
+from .models import Food, MealItem
+
+SEARCH_LIMIT = 20
+SEARCH_CONFIG = 'simple'  # Food names mix languages and brands; no stemming or stop words
+CUSTOM_FOOD_BOOST = getattr(settings, 'FOOD_SEARCH_CUSTOM_BOOST', 0.3)
+RECENT_FOOD_BOOST = getattr(settings, 'FOOD_SEARCH_RECENT_BOOST', 0.5)
+RECENT_FOOD_DAYS = getattr(settings, 'FOOD_SEARCH_RECENT_DAYS', 30)
+RECENT_FOOD_LIMIT = 200
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def search_vector():
+    """Unweighted document the GIN index is built on; filters must use the same expression"""
+    return SearchVector('name', 'brand', config=SEARCH_CONFIG)
+
+
+def search_indexes():
+    """Postgres-only indexes serving FoodSearch, created by create_food_search_indexes"""
+    return [
+        GinIndex(search_vector(), name='foods_search_vector_gin'),
+        GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='foods_name_trgm'),
+        GinIndex(fields=['brand'], opclasses=['gin_trgm_ops'], name='foods_brand_trgm'),
+    ]
+
+
+class FoodSearch:
+    """Relevance-ranked food search boosting the user's own and recently eaten foods"""
+    
+    @staticmethod
+    def tokens(query):
+        return _TOKEN.findall((query or '').lower())
+    
+    @staticmethod
+    def recent_food_ids(user, today=None):
+        """Foods the user logged recently, one small query per search"""
+        today = today or timezone.now().date()
+        return list(MealItem.objects.filter(
+            meal__user=user,
+            meal__date__gte=today - timedelta(days=RECENT_FOOD_DAYS)
+        ).order_by().values_list('food_id', flat=True).distinct()[:RECENT_FOOD_LIMIT])
+    
+    @staticmethod
+    def boost(user, recent_ids):
+        return (
+            Case(When(created_by=user, then=Value(CUSTOM_FOOD_BOOST)), default=Value(0.0), output_field=FloatField()) +
+            Case(When(pk__in=recent_ids, then=Value(RECENT_FOOD_BOOST)), default=Value(0.0), output_field=FloatField())
+        )
+    
+    @staticmethod
+    def search(user, query, limit=SEARCH_LIMIT):
+        """Foods visible to the user matching query, best first"""
+        tokens = FoodSearch.tokens(query)
+        if not tokens:
+            return Food.objects.none()
+        
+        foods = Food.objects.filter(Q(is_custom=False) | Q(created_by=user))
+        recent_ids = FoodSearch.recent_food_ids(user)
+        if connection.vendor == 'postgresql':
+            foods = FoodSearch._postgres(foods, tokens, FoodSearch.boost(user, recent_ids))
+        else:
+            foods = FoodSearch._fallback(foods, tokens, FoodSearch.boost(user, recent_ids))
+        return foods.order_by('-score', 'name', 'id')[:limit]
+    
+    @staticmethod
+    def _postgres(foods, tokens, boost):
+        # Prefix match on every token so partially typed words still hit the GIN index
+        tsquery = SearchQuery(' & '.join(f'{token}:*' for token in tokens), search_type='raw', config=SEARCH_CONFIG)
+        text = ' '.join(tokens)
+        weighted = (
+            SearchVector('name', weight='A', config=SEARCH_CONFIG) +
+            SearchVector('brand', weight='B', config=SEARCH_CONFIG)
+        )
+        return foods.annotate(
+            document=search_vector()
+        ).filter(
+            Q(document=tsquery) | TrigramSimilar(F('name'), text) | TrigramSimilar(F('brand'), text)
+        ).annotate(
+            score=(
+                SearchRank(weighted, tsquery) +
+                Greatest(TrigramSimilarity('name', text), TrigramSimilarity('brand', text)) +
+                boost
+            )
+        )
+    
+    @staticmethod
+    def _fallback(foods, tokens, boost):
+        # Every token must appear in name or brand; rank exact > prefix > word start > substring
+        for token in tokens:
+            foods = foods.filter(Q(name__icontains=token) | Q(brand__icontains=token))
+        text = ' '.join(tokens)
+        return foods.annotate(
+            score=Case(
+                When(name__iexact=text, then=Value(1.0)),
+                When(name__istartswith=text, then=Value(0.75)),
+                When(name__icontains=f' {text}', then=Value(0.5)),
+                When(name__icontains=text, then=Value(0.35)),
+                default=Value(0.2),
+                output_field=FloatField()
+            ) + boost
+        )
@@ -44,7 +44,7 @@ class MealItemSerializer(serializers.ModelSerializer):
 
 class MealSerializer(serializers.ModelSerializer):
     items = MealItemSerializer(many=True, read_only=True)
-    total_calories = serializers.SerializerMethodField()
+    # Unrounded Decimals, rendered as JSON numbers like the item-by-item sums they replace
     total_protein_g = serializers.SerializerMethodField()
     total_carbs_g = serializers.SerializerMethodField()
     total_fat_g = serializers.SerializerMethodField()
@@ -56,44 +56,13 @@ class MealSerializer(serializers.ModelSerializer):
             'total_calories', 'total_protein_g', 'total_carbs_g', 'total_fat_g',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
-    
-    def get_total_calories(self, obj):
-        total = 0
-        for item in obj.items.all():
-            if item.custom_calories:
-                total += item.custom_calories
-            else:
-                total += int(item.quantity * item.food.calories)
-        return total
+        read_only_fields = ['id', 'total_calories', 'created_at', 'updated_at']
     
     def get_total_protein_g(self, obj):
-        from decimal import Decimal
-        total = Decimal('0')
-        for item in obj.items.all():
-            if item.custom_protein_g:
-                total += item.custom_protein_g
-            else:
-                total += item.quantity * item.food.protein_g
-        return total
+        return obj.total_protein_g
     
     def get_total_carbs_g(self, obj):
-        from decimal import Decimal
-        total = Decimal('0')
-        for item in obj.items.all():
-            if item.custom_carbs_g:
-                total += item.custom_carbs_g
-            else:
-                total += item.quantity * item.food.carbs_g
-        return total
+        return obj.total_carbs_g
     
     def get_total_fat_g(self, obj):
-        from decimal import Decimal
-        total = Decimal('0')
-        for item in obj.items.all():
-            if item.custom_fat_g:
-                total += item.custom_fat_g
-            else:
-                total += item.quantity * item.food.fat_g
-        return total
-
+        return obj.total_fat_g
@@ -0,0 +1,85 @@
+"""
+Django signals maintaining meal totals, frequent foods and food lookups
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.nutrition.models import Food, MealItem
+from apps.nutrition.business_logic import NutritionBusinessLogic, MACRO_FIELDS
+from apps.nutrition.frequent import FrequentFoods
+from apps.nutrition.prefix_index import FoodAutocomplete
+
+
+@receiver(pre_save, sender=MealItem)
+def remember_previous_meal_item(sender, instance, **kwargs):
+    """Keep the stored item's contribution so meal totals can be moved on update"""
+    instance._previous_meal_item = None
+    if not instance._state.adding:
+        previous = MealItem.objects.filter(pk=instance.pk).values(
+            'meal_id', 'quantity',
+            *[f'custom_{field}' for field in MACRO_FIELDS],
+            *[f'food__{field}' for field in MACRO_FIELDS]
+        ).first()
+        if previous:
+            instance._previous_meal_item = (
+                previous['meal_id'],
+                NutritionBusinessLogic.item_contribution(
+                    previous['quantity'],
+                    {field: previous[f'food__{field}'] for field in MACRO_FIELDS},
+                    {field: previous[f'custom_{field}'] for field in MACRO_FIELDS}
+                )
+            )
+
+
+@receiver(post_save, sender=MealItem)
+def update_meal_totals_on_meal_item_save(sender, instance, **kwargs):
+    """Move the item's contribution to its meal totals on create/update"""
+    previous = getattr(instance, '_previous_meal_item', None)
+    if previous:
+        NutritionBusinessLogic.apply_meal_totals(previous[0], previous[1], sign=-1)
+    NutritionBusinessLogic.apply_meal_totals(
+        instance.meal_id, NutritionBusinessLogic.meal_item_contribution(instance)
+    )
+
+
+@receiver(post_delete, sender=MealItem)
+def update_meal_totals_on_meal_item_delete(sender, instance, **kwargs):
+    """Remove a deleted item from its meal totals"""
+    NutritionBusinessLogic.apply_meal_totals(
+        instance.meal_id, NutritionBusinessLogic.meal_item_contribution(instance), sign=-1
+    )
+
+
+@receiver(post_save, sender=MealItem)
+def record_frequent_food_on_meal_item_create(sender, instance, created, **kwargs):
+    """Count a newly logged food in the user's frequent foods"""
+    if created:
+        FrequentFoods.record(instance.meal.user_id, instance.food_id, instance.created_at)
+
+
+@receiver(pre_save, sender=Food)
+def remember_previous_food_macros(sender, instance, **kwargs):
+    """Keep the stored macros so meals are only rebuilt when they change"""
+    instance._previous_macros = None
+    if instance.is_custom and not instance._state.adding:
+        instance._previous_macros = Food.objects.filter(pk=instance.pk).values(*MACRO_FIELDS).first()
+
+
+@receiver(post_save, sender=Food)
+def refresh_meal_totals_on_food_save(sender, instance, created, **kwargs):
+    """
+    Rebuild totals of meals using an edited custom food; system catalog edits can
+    touch every user's meals, so they are applied with rebuild_meal_totals --food-id
+    """
+    previous = getattr(instance, '_previous_macros', None)
+    if created or not previous or not instance.is_custom:
+        return
+    if any(previous[field] != getattr(instance, field) for field in MACRO_FIELDS):
+        NutritionBusinessLogic.refresh_meals_for_food(instance.pk)
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+def invalidate_food_autocomplete(sender, instance, **kwargs):
+    """Drop the user's autocomplete overlay when a custom food changes"""
+    FoodAutocomplete.invalidate(instance)
@@ -0,0 +1,500 @@
+"""
+Tests for nutrition app
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from io import StringIO
+import os
+import random
+import tempfile
+
+from apps.accounts.models import Profile
+from apps.nutrition.models import Food, Meal, MealItem
+from apps.nutrition.aggregation import NutritionAggregation, empty_totals
+from apps.nutrition.business_logic import NutritionBusinessLogic
+from apps.nutrition.fixed_point import FixedPointNutrition
+from apps.nutrition.frequent import DecayedTopK, log_add
+from apps.reports.models import DailySummary
+from apps.nutrition.prefix_index import PrefixIndex, normalize
+
+
+class FoodSearchTest(APITestCase):
+    """Test ranked food search and its personal boosts"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('food-search')
+        for name, brand in [
+            ('Chicken Breast', None),
+            ('Grilled Chicken Wrap', 'Deli Co'),
+            ('Rice', 'Chickpea Farms'),
+            ('Oats', None),
+        ]:
+            self._food(name, brand)
+    
+    def _food(self, name, brand=None, user=None):
+        return Food.objects.create(
+            name=name, brand=brand, calories=100, protein_g=Decimal('10'),
+            carbs_g=Decimal('5'), fat_g=Decimal('2'), is_custom=user is not None, created_by=user
+        )
+    
+    def _names(self, query):
+        response = self.client.get(self.url, {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [food['name'] for food in response.data]
+    
+    def test_ranked_by_match_quality(self):
+        """Test prefix matches on the name outrank matches inside it or in the brand"""
+        self.assertEqual(self._names('chick'), ['Chicken Breast', 'Grilled Chicken Wrap', 'Rice'])
+        self.assertEqual(self._names('chicken wrap'), ['Grilled Chicken Wrap'])
+        self.assertEqual(self._names('  '), [])
+    
+    def test_own_and_recent_foods_boosted(self):
+        """Test the user's custom foods and recently eaten foods move up"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        self._food('Chicken Soup', user=other)
+        self._food('Chicken Curry', user=self.user)
+        
+        names = self._names('chicken')
+        self.assertNotIn('Chicken Soup', names)
+        self.assertEqual(names[0], 'Chicken Curry')
+        
+        wrap = Food.objects.get(name='Grilled Chicken Wrap')
+        meal = Meal.objects.create(user=self.user, date=timezone.now().date(), meal_type='lunch')
+        MealItem.objects.create(meal=meal, food=wrap, quantity=Decimal('1'))
+        self.assertEqual(self._names('chicken'), ['Chicken Curry', 'Grilled Chicken Wrap', 'Chicken Breast'])
+    
+    def test_index_command_requires_postgres(self):
+        """Test the GIN index command refuses other databases"""
+        with self.assertRaises(CommandError):
+            call_command('create_food_search_indexes')
+
+
+class FoodAutocompleteTest(APITestCase):
+    """Test the memory-mapped prefix index and per-user overlay"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('food-autocomplete')
+        cache.clear()  # Custom-food overlays are keyed by user id, which repeats across tests
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'foods.idx')
+        settings_override = override_settings(FOOD_PREFIX_INDEX_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for name, brand in [
+            ('Chicken Breast', None),
+            ('Crème Brûlée', 'Café Co'),
+            ('Chickpeas', 'Pantry'),
+            ('Oats', None),
+        ]:
+            Food.objects.create(
+                name=name, brand=brand, calories=100, protein_g=Decimal('10'),
+                carbs_g=Decimal('5'), fat_g=Decimal('2')
+            )
+        call_command('build_food_prefix_index', stdout=StringIO())
+    
+    def _names(self, query):
+        response = self.client.get(self.url, {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [food['name'] for food in response.data]
+    
+    def test_normalize(self):
+        """Test accents, case and punctuation are folded"""
+        self.assertEqual(normalize('  Crème-Brûlée (Café_Co) '), 'creme brulee cafe co')
+    
+    def test_prefix_matches_any_word(self):
+        """Test prefixes match from the start of any word of the name or brand"""
+        self.assertEqual(self._names('chick'), ['Chicken Breast', 'Chickpeas'])
+        self.assertEqual(self._names('breast'), ['Chicken Breast'])
+        self.assertEqual(self._names('creme b'), ['Crème Brûlée'])
+        self.assertEqual(self._names('cafe'), ['Crème Brûlée'])
+        self.assertEqual(self._names('xyz'), [])
+    
+    def test_served_without_database(self):
+        """Test warm lookups hit neither the database nor a rebuilt index"""
+        self._names('oat')
+        with self.assertNumQueries(0):
+            self.assertEqual(self._names('oat'), ['Oats'])
+        self.assertEqual(PrefixIndex(self.path).food_count, 4)
+    
+    def test_custom_overlay_first_and_invalidated(self):
+        """Test the user's custom foods come first and appear as soon as they are saved"""
+        self._names('chick')
+        Food.objects.create(
+            name='Chicken Curry', calories=300, protein_g=Decimal('25'), carbs_g=Decimal('20'),
+            fat_g=Decimal('12'), is_custom=True, created_by=self.user
+        )
+        response = self.client.get(self.url, {'q': 'chick'})
+        self.assertEqual(response.data[0]['name'], 'Chicken Curry')
+        self.assertTrue(response.data[0]['is_custom'])
+        self.assertEqual(len(response.data), 3)
+    
+    def test_falls_back_to_database_without_index(self):
+        """Test a missing index file degrades to a query with the same word-prefix matching"""
+        with override_settings(FOOD_PREFIX_INDEX_PATH=self.path + '.missing'):
+            self.assertEqual(self._names('oat'), ['Oats'])
+            self.assertEqual(self._names('breast'), ['Chicken Breast'])
+            self.assertEqual(self._names('pantry'), ['Chickpeas'])
+            self.assertEqual(self._names('Crème b'), ['Crème Brûlée'])
+            self.assertEqual(self._names('hick'), [])
+
+
+class FoodImportTest(APITestCase):
+    """Test streaming food dataset import"""
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+    
+    def _write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+    
+    def _import(self, path, *args):
+        output = StringIO()
+        call_command('import_foods', path, *args, stdout=output)
+        return output.getvalue()
+    
+    def test_csv_import_normalises_and_dedupes(self):
+        """Test aliases, unit conversions, invalid rows and duplicates"""
+        path = self._write('foods.csv', (
+            'product_name,brands,energy_kcal,proteins_100g,carbohydrates_100g,fat_100g,salt_g,energy_kj\n'
+            'Greek Yogurt,Dairyland,97,9.0,3.6,5,0.1,\n'
+            'Greek Yogurt,Dairyland,97,9.0,3.6,5,0.1,\n'
+            'Rolled Oats,,,13.2,"67,7",6.5,,1548\n'
+            'Mystery,,100,abc,1,1,,\n'
+            ',NoName,100,1,1,1,,\n'
+        ))
+        output = self._import(path, '--batch-size=2')
+        
+        self.assertIn('Imported 2 foods from 5 rows', output)
+        self.assertIn('1 duplicates, 2 invalid', output)
+        self.assertIn('rows/s', output)
+        yogurt = Food.objects.get(name='Greek Yogurt')
+        self.assertEqual((yogurt.brand, yogurt.calories, yogurt.sodium_mg), ('Dairyland', 97, Decimal('40.00')))
+        self.assertFalse(yogurt.is_custom)
+        oats = Food.objects.get(name='Rolled Oats')
+        self.assertEqual((oats.brand, oats.calories, oats.carbs_g), (None, 370, Decimal('67.70')))
+        
+        self.assertIn('Imported 0 foods', self._import(path))
+        self.assertEqual(Food.objects.count(), 2)
+    
+    def test_jsonl_import(self):
+        """Test JSON-lines input with serving fields"""
+        path = self._write('foods.jsonl', (
+            '{"name": "Banana", "calories": 89, "protein_g": 1.1, "carbs_g": 22.8, "fat_g": 0.3, '
+            '"serving_quantity": 118, "serving_unit": "g"}\n'
+            '{"name": "Cola", "brand": 7, "calories": 42, "protein_g": 0, "carbs_g": 10.6, "fat_g": 0}\n'
+            'not json\n'
+        ))
+        output = self._import(path)
+        
+        self.assertIn('Imported 2 foods', output)
+        self.assertIn('1 invalid', output)
+        self.assertEqual(Food.objects.get(name='Banana').serving_size, '118g')
+        self.assertEqual(Food.objects.get(name='Cola').brand, '7')
+
+
+class MealTotalsTest(APITestCase):
+    """Test denormalized macro totals on meals"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.now().date()
+        self.rice = Food.objects.create(
+            name='Rice', calories=130, protein_g=Decimal('2.70'), carbs_g=Decimal('28.17'), fat_g=Decimal('0.30')
+        )
+        self.shake = Food.objects.create(
+            name='Protein Shake', calories=120, protein_g=Decimal('24.00'), carbs_g=Decimal('3.00'),
+            fat_g=Decimal('1.50'), is_custom=True, created_by=self.user
+        )
+        self.meal = Meal.objects.create(user=self.user, date=self.today, meal_type='lunch')
+        self.rice_item = MealItem.objects.create(meal=self.meal, food=self.rice, quantity=Decimal('1.50'))
+        MealItem.objects.create(meal=self.meal, food=self.shake, quantity=Decimal('1.00'), custom_calories=150)
+    
+    def _totals(self):
+        self.meal.refresh_from_db()
+        return (self.meal.total_calories, self.meal.total_protein_g, self.meal.total_carbs_g, self.meal.total_fat_g)
+    
+    def _oracle(self):
+        macros = NutritionBusinessLogic.calculate_meal_macros(Meal.objects.get(pk=self.meal.pk))
+        return (macros['calories'], macros['protein_g'], macros['carbs_g'], macros['fat_g'])
+    
+    def test_totals_follow_item_writes(self):
+        """Test insert, update and delete keep totals equal to the item-by-item sum"""
+        self.assertEqual(self._totals(), (345, Decimal('28.05'), Decimal('45.255'), Decimal('1.95')))
+        self.assertEqual(self._totals(), self._oracle())
+        
+        self.rice_item.quantity = Decimal('2.00')
+        self.rice_item.custom_fat_g = Decimal('1.00')
+        self.rice_item.save()
+        self.assertEqual(self._totals(), self._oracle())
+        
+        self.rice_item.delete()
+        self.assertEqual(self._totals(), (150, Decimal('24'), Decimal('3'), Decimal('1.5')))
+    
+    def test_custom_food_edit_refreshes_meals_and_summary(self):
+        """Test editing a referenced food rebuilds meal totals and the daily summary"""
+        self.shake.protein_g = Decimal('30.00')
+        self.shake.save()
+        
+        self.assertEqual(self._totals()[1], Decimal('34.05'))
+        summary = DailySummary.objects.get(user=self.user, date=self.today)
+        self.assertEqual(summary.protein_g, Decimal('34.05'))
+    
+    def test_system_food_edit_waits_for_rebuild(self):
+        """Test catalog edits skip the synchronous refresh and are applied by rebuild_meal_totals --food-id"""
+        self.rice.carbs_g = Decimal('30.00')
+        with self.assertNumQueries(1):
+            self.rice.save()
+        self.assertEqual(self._totals()[2], Decimal('45.255'))
+        
+        call_command('rebuild_meal_totals', food_id=str(self.rice.pk), stdout=StringIO())
+        self.assertEqual(self._totals(), self._oracle())
+        summary = DailySummary.objects.get(user=self.user, date=self.today)
+        self.assertEqual(summary.carbs_g, Decimal('48.00'))
+    
+    def test_meal_save_keeps_concurrent_totals(self):
+        """Test saving a meal loaded before an item write does not restore its stale totals"""
+        stale = Meal.objects.get(pk=self.meal.pk)
+        MealItem.objects.create(meal=self.meal, food=self.rice, quantity=Decimal('1.00'))
+        stale.notes = 'Post-run'
+        stale.save()
+        
+        self.assertEqual(self._totals(), self._oracle())
+        self.assertEqual(Meal.objects.get(pk=self.meal.pk).notes, 'Post-run')
+    
+    def test_serializer_and_dashboard_read_totals(self):
+        """Test meal list and dashboard serve the maintained totals"""
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('meal-list'))
+        meal = response.data[0]
+        self.assertEqual(meal['total_calories'], 345)
+        self.assertEqual(meal['total_carbs_g'], Decimal('45.255'))
+        # Same unrounded JSON numbers as the item-by-item sums
+        self.assertEqual(response.json()[0]['total_carbs_g'], 45.255)
+        
+        response = self.client.get(reverse('dashboard-today'))
+        self.assertEqual(response.data['nutrition']['kcal'], 345)
+        self.assertEqual(response.data['nutrition']['protein_g'], 28.1)
+    
+    def test_rebuild_meal_totals(self):
+        """Test the rebuild command restores drifted totals"""
+        Meal.objects.filter(pk=self.meal.pk).update(total_calories=0, total_protein_g=0)
+        call_command('rebuild_meal_totals', user_id=self.user.id, stdout=StringIO())
+        self.assertEqual(self._totals(), self._oracle())
+
+
+class NutritionAggregationTest(APITestCase):
+    """Test grouped SQL macro totals against the item-by-item Python path"""
+    
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'user{index}', password='testpass123') for index in range(2)
+        ]
+        for user in self.users:
+            Profile.objects.create(user=user)
+        rng = random.Random(7)
+        foods = [
+            Food.objects.create(
+                name=f'Food {index}', calories=rng.randint(0, 600),
+                protein_g=Decimal(rng.randint(0, 5000)) / 100, carbs_g=Decimal(rng.randint(0, 9000)) / 100,
+                fat_g=Decimal(rng.randint(0, 4000)) / 100
+            )
+            for index in range(6)
+        ]
+        self.start = date(2024, 3, 1)
+        for user in self.users:
+            for offset in range(4):
+                for meal_type in ('breakfast', 'dinner'):
+                    meal = Meal.objects.create(user=user, date=self.start + timedelta(days=offset), meal_type=meal_type)
+                    for _ in range(rng.randint(0, 4)):
+                        MealItem.objects.create(
+                            meal=meal, food=rng.choice(foods),
+                            quantity=Decimal(rng.choice(['0.29', '0.33', '1.00', '1.57', '2.50'])),
+                            # Zero custom values fall back to the food, as in the Python path
+                            custom_calories=rng.choice([None, None, 0, 250]),
+                            custom_protein_g=rng.choice([None, None, Decimal('0'), Decimal('12.34')]),
+                        )
+    
+    def _oracle(self, meals):
+        totals = {'calories': 0, 'protein_g': Decimal('0'), 'carbs_g': Decimal('0'), 'fat_g': Decimal('0')}
+        for meal in meals:
+            for field, value in NutritionBusinessLogic.calculate_meal_macros(meal).items():
+                totals[field] += value
+        return totals
+    
+    def test_daily_totals_match_python_path(self):
+        """Test grouped per-user-day totals, in Decimals and in integer units, equal the item loop"""
+        user_ids = [user.id for user in self.users]
+        end = self.start + timedelta(days=3)
+        for totals in (
+            NutritionAggregation.daily_totals(user_ids, self.start, end),
+            FixedPointNutrition.daily_totals(user_ids, self.start, end),
+        ):
+            for user in self.users:
+                for offset in range(4):
+                    day = self.start + timedelta(days=offset)
+                    expected = self._oracle(Meal.objects.filter(user=user, date=day))
+                    self.assertEqual(totals.get((user.id, day), empty_totals()), expected)
+    
+    def test_meal_totals_and_summary_match(self):
+        """Test per-meal totals and the daily summary rollup"""
+        meals = list(Meal.objects.filter(user=self.users[0]))
+        totals = NutritionAggregation.meal_totals([meal.pk for meal in meals])
+        for meal in meals:
+            expected = self._oracle([meal])
+            self.assertEqual(totals.get(meal.pk, empty_totals()), expected)
+        
+        summary = NutritionBusinessLogic.update_daily_nutrition_summary(self.users[0], self.start)
+        summary.refresh_from_db()
+        expected = self._oracle(Meal.objects.filter(user=self.users[0], date=self.start))
+        self.assertEqual(summary.calories_consumed, expected['calories'])
+        self.assertEqual(summary.protein_g, expected['protein_g'].quantize(Decimal('0.01'), ROUND_HALF_UP))
+        self.assertEqual(summary.protein_g + summary.protein_remaining_g, self.users[0].profile.protein_target)
+    
+    def test_single_query_for_many_days(self):
+        """Test one grouped query covers every user and day"""
+        user_ids = [user.id for user in self.users]
+        with self.assertNumQueries(1):
+            NutritionAggregation.daily_totals(user_ids, self.start, self.start + timedelta(days=30))
+        with self.assertNumQueries(1):
+            FixedPointNutrition.daily_totals(user_ids, self.start, self.start + timedelta(days=30))
+    
+    def test_benchmark_command_agrees(self):
+        """Test the benchmark checks both paths produce the same totals"""
+        out = StringIO()
+        call_command('benchmark_nutrition_math', items=2000, repeat=1, stdout=out)
+        self.assertIn('identical', out.getvalue())
+    
+    def test_benchmark_database_mode(self):
+        """Test both paths agree on the stored items of every user-day"""
+        out = StringIO()
+        call_command('benchmark_nutrition_math', database=True, repeat=1, stdout=out)
+        self.assertIn('8 user-days identical', out.getvalue())
+
+
+class FrequentFoodsTest(APITestCase):
+    """Test the time-decayed top foods list"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('food-frequent')
+        self.meal = Meal.objects.create(user=self.user, date=timezone.now().date(), meal_type='lunch')
+        self.oats = self._food('Oats')
+        self.eggs = self._food('Eggs')
+    
+    def _food(self, name):
+        return Food.objects.create(
+            name=name, calories=100, protein_g=Decimal('10'), carbs_g=Decimal('5'), fat_g=Decimal('2')
+        )
+    
+    def _log(self, food, times=1):
+        return [MealItem.objects.create(meal=self.meal, food=food, quantity=Decimal('1')) for _ in range(times)]
+    
+    def test_logged_foods_ranked_by_use(self):
+        """Test each created item is counted as it is logged"""
+        self._log(self.eggs)
+        self._log(self.oats, times=3)
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([food['name'] for food in response.data], ['Oats', 'Eggs'])
+        self.assertAlmostEqual(response.data[0]['score'], 3, places=2)
+    
+    def test_old_history_decays_after_rebuild(self):
+        """Test the rebuild command weights old items by the half-life"""
+        items = self._log(self.oats, times=3)
+        self._log(self.eggs)
+        MealItem.objects.filter(pk__in=[item.pk for item in items]).update(
+            created_at=timezone.now() - timedelta(days=60)
+        )
+        out = StringIO()
+        call_command('rebuild_frequent_foods', user_id=self.user.id, stdout=out)
+        self.assertIn('Rebuilt frequent foods for 1 users', out.getvalue())
+        
+        response = self.client.get(self.url)
+        self.assertEqual([food['name'] for food in response.data], ['Eggs', 'Oats'])
+        self.assertLess(response.data[1]['score'], 0.2)
+    
+    def test_rebuild_all_resets_users_without_items(self):
+        """Test a full rebuild empties the cached list of a user whose items were all deleted"""
+        self._log(self.oats)
+        self.assertEqual(len(self.client.get(self.url).data), 1)
+        MealItem.objects.filter(meal=self.meal).delete()
+        
+        call_command('rebuild_frequent_foods', stdout=StringIO())
+        self.assertEqual(self.client.get(self.url).data, [])
+    
+    def test_record_under_held_lock_drops_list(self):
+        """Test a log that cannot take the per-user lock invalidates instead of writing a stale list"""
+        from apps.nutrition.frequent import FrequentFoods
+        
+        self._log(self.eggs)
+        key = FrequentFoods.cache_key(self.user.id)
+        cache.add(f'{key}:lock', 1)
+        self._log(self.oats, times=2)
+        self.assertIsNone(cache.get(key))
+        
+        cache.delete(f'{key}:lock')
+        self.assertEqual([food['name'] for food in self.client.get(self.url).data], ['Oats', 'Eggs'])
+    
+    def test_limit_validation(self):
+        """Test limit must be within the tracked size"""
+        self.assertEqual(self.client.get(self.url, {'limit': 0}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'limit': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_top_k_matches_exact_scores(self):
+        """Test the indexed heap keeps exact scores while nothing is evicted and stays bounded"""
+        rng = random.Random(3)
+        exact = {}
+        top = DecayedTopK(size=8)
+        for _ in range(500):
+            item, weight = rng.randrange(8), rng.uniform(0, 50)
+            exact[item] = log_add(exact[item], weight) if item in exact else weight
+            top.add(item, weight)
+        self.assertEqual([item for item, _ in top.ranked()], sorted(exact, key=exact.get, reverse=True))
+        for item, score in top.ranked():
+            self.assertAlmostEqual(score, exact[item])
+        
+        small = DecayedTopK(size=3)
+        for item in range(20):
+            small.add(item, float(item))
+        self.assertEqual([item for item, _ in small.ranked()], [19, 18, 17])
+        for item, position in small.positions.items():
+            self.assertEqual(small.heap[position][1], item)
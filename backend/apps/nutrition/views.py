@@ -5,6 +5,9 @@ from django.db.models import Q
 
 from .models import Food, Meal, MealItem
 from .serializers import FoodSerializer, MealSerializer, MealItemSerializer
+from .search import FoodSearch
+from .prefix_index import FoodAutocomplete
+from .frequent import FrequentFoods, FREQUENT_FOODS_SIZE
 
 
 class FoodViewSet(viewsets.ModelViewSet):
@@ -22,12 +25,43 @@ class FoodViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """GET /foods/search?q=query - Search foods"""
-        query = request.query_params.get('q', '')
-        foods = self.get_queryset().filter(
-            Q(name__icontains=query) | Q(brand__icontains=query)
-        )[:20]
+        """GET /foods/search?q=query - Relevance-ranked food search"""
+        foods = FoodSearch.search(request.user, request.query_params.get('q', ''))
         return Response(FoodSerializer(foods, many=True).data)
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """GET /foods/autocomplete?q=prefix - Prefix matches from the in-memory index"""
+        foods = FoodAutocomplete.complete(request.user.id, request.query_params.get('q', ''))
+        return Response([
+            {
+                'id': str(food['id']),
+                'name': food['name'],
+                'brand': food['brand'],
+                'is_custom': food['is_custom'],
+            }
+            for food in foods
+        ])
+    
+    @action(detail=False, methods=['get'])
+    def frequent(self, request):
+        """GET /foods/frequent?limit=20 - Recently and frequently logged foods, best first"""
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= FREQUENT_FOODS_SIZE:
+            return Response(
+                {'error': f'limit must be between 1 and {FREQUENT_FOODS_SIZE}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        ranked = FrequentFoods.top(request.user.id, limit)
+        foods = self.get_queryset().in_bulk([food_id for food_id, _ in ranked])
+        return Response([
+            {**FoodSerializer(foods[food_id]).data, 'score': round(score, 3)}
+            for food_id, score in ranked if food_id in foods
+        ])
 
 
 class MealViewSet(viewsets.ModelViewSet):
@@ -36,7 +70,7 @@ class MealViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Meal.objects.filter(user=self.request.user)
+        return Meal.objects.filter(user=self.request.user).prefetch_related('items__food')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
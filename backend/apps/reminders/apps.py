@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class RemindersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.reminders'
+    
+    def ready(self):
+        """Import signals when app is ready"""
+        import apps.reminders.signals
@@ -0,0 +1,211 @@
+"""
+Business logic for habit and meditation reminders
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from .models import ReminderSlot
+from .sinks import get_reminder_sink
+
+REMINDER_BATCH_SIZE = getattr(settings, 'REMINDER_BATCH_SIZE', 500)
+
+
+class ReminderBusinessLogic:
+    """Business logic for the reminder index and dispatch"""
+    
+    @staticmethod
+    def get_zone(tz_name):
+        """Resolve a profile timezone, falling back to UTC for unknown names"""
+        try:
+            return ZoneInfo(tz_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            return ZoneInfo('UTC')
+    
+    @staticmethod
+    def compute_bucket(tz_name, local_time, now=None):
+        """UTC minute-of-day bucket for the next occurrence of local_time"""
+        now = now or timezone.now()
+        zone = ReminderBusinessLogic.get_zone(tz_name)
+        local_now = now.astimezone(zone)
+        
+        # Use the next occurrence so the offset is the one in force when it fires
+        occurrence = datetime.combine(local_now.date(), local_time, tzinfo=zone)
+        if occurrence <= local_now:
+            occurrence = datetime.combine(
+                local_now.date() + timedelta(days=1), local_time, tzinfo=zone
+            )
+        
+        occurrence_utc = occurrence.astimezone(dt_timezone.utc)
+        return occurrence_utc.hour * 60 + occurrence_utc.minute
+    
+    @staticmethod
+    def _as_time(value):
+        # Profile.reminder_time defaults to the string '09:00' until reloaded
+        if isinstance(value, str):
+            return time.fromisoformat(value)
+        return value
+    
+    @staticmethod
+    def _build_slot(user_id, kind, tz_name, local_time, habit=None, now=None):
+        local_time = ReminderBusinessLogic._as_time(local_time)
+        return ReminderSlot(
+            user_id=user_id,
+            habit=habit,
+            kind=kind,
+            timezone=tz_name,
+            local_time=local_time,
+            utc_bucket=ReminderBusinessLogic.compute_bucket(tz_name, local_time, now),
+        )
+    
+    @staticmethod
+    def rebuild_user_reminders(user_id, now=None):
+        """Rebuild all reminder slots for a user from their profile and habits"""
+        from apps.accounts.models import Profile
+        from apps.habits.models import Habit
+        
+        profile = Profile.objects.filter(user_id=user_id).first()
+        previous = {
+            (slot.kind, slot.habit_id): slot.last_sent_on
+            for slot in ReminderSlot.objects.filter(user_id=user_id)
+        }
+        
+        slots = []
+        if profile:
+            if profile.meditation_reminders_enabled:
+                slots.append(ReminderBusinessLogic._build_slot(
+                    user_id, 'meditation', profile.timezone, profile.reminder_time, now=now
+                ))
+            if profile.habit_reminders_enabled:
+                for habit in Habit.objects.filter(user_id=user_id, is_active=True):
+                    slots.append(ReminderBusinessLogic._build_slot(
+                        user_id, 'habit', profile.timezone,
+                        habit.reminder_time or profile.reminder_time,
+                        habit=habit, now=now
+                    ))
+        
+        # Keep the dispatch guard so an edit does not re-send today's reminders
+        for slot in slots:
+            slot.last_sent_on = previous.get((slot.kind, slot.habit_id))
+        
+        with transaction.atomic():
+            ReminderSlot.objects.filter(user_id=user_id).delete()
+            ReminderSlot.objects.bulk_create(slots)
+        
+        return slots
+    
+    @staticmethod
+    def rebuild_habit_reminder(habit, now=None):
+        """Rebuild the reminder slot for a single habit"""
+        from apps.accounts.models import Profile
+        
+        profile = Profile.objects.filter(user_id=habit.user_id).first()
+        existing = ReminderSlot.objects.filter(habit=habit).first()
+        
+        slot = None
+        if profile and profile.habit_reminders_enabled and habit.is_active:
+            slot = ReminderBusinessLogic._build_slot(
+                habit.user_id, 'habit', profile.timezone,
+                habit.reminder_time or profile.reminder_time,
+                habit=habit, now=now
+            )
+            slot.last_sent_on = existing.last_sent_on if existing else None
+        
+        with transaction.atomic():
+            ReminderSlot.objects.filter(habit=habit).delete()
+            if slot:
+                slot.save()
+        
+        return slot
+    
+    @staticmethod
+    def refresh_buckets(now=None):
+        """Re-key slots whose UTC bucket moved, e.g. across a DST transition"""
+        moved = 0
+        groups = ReminderSlot.objects.values_list(
+            'timezone', 'local_time', 'utc_bucket'
+        ).distinct()
+        
+        for tz_name, local_time, bucket in groups:
+            new_bucket = ReminderBusinessLogic.compute_bucket(tz_name, local_time, now)
+            if new_bucket != bucket:
+                moved += ReminderSlot.objects.filter(
+                    timezone=tz_name,
+                    local_time=local_time,
+                    utc_bucket=bucket
+                ).update(utc_bucket=new_bucket)
+        
+        return moved
+    
+    @staticmethod
+    def dispatch_due_reminders(now=None, sink=None, batch_size=REMINDER_BATCH_SIZE):
+        """Deliver reminders in the current UTC minute bucket"""
+        now = (now or timezone.now()).astimezone(dt_timezone.utc)
+        bucket = now.hour * 60 + now.minute
+        sink = sink or get_reminder_sink()
+        
+        slots = ReminderSlot.objects.filter(
+            utc_bucket=bucket
+        ).select_related('habit').order_by('id')
+        
+        delivered = 0
+        batch = []
+        for slot in slots.iterator(chunk_size=batch_size):
+            batch.append(slot)
+            if len(batch) >= batch_size:
+                delivered += ReminderBusinessLogic._dispatch_batch(batch, now, sink)
+                batch = []
+        if batch:
+            delivered += ReminderBusinessLogic._dispatch_batch(batch, now, sink)
+        
+        return delivered
+    
+    @staticmethod
+    def _dispatch_batch(slots, now, sink):
+        from apps.habits.models import HabitCheck
+        
+        today_by_zone = {}
+        local_dates = {}
+        for slot in slots:
+            if slot.timezone not in today_by_zone:
+                today_by_zone[slot.timezone] = now.astimezone(
+                    ReminderBusinessLogic.get_zone(slot.timezone)
+                ).date()
+            local_dates[slot.id] = today_by_zone[slot.timezone]
+        
+        due = [slot for slot in slots if slot.last_sent_on != local_dates[slot.id]]
+        
+        # Skip habits already checked today, one query for the whole batch
+        habit_ids = [slot.habit_id for slot in due if slot.kind == 'habit']
+        checked = set()
+        if habit_ids:
+            checked = set(HabitCheck.objects.filter(
+                habit_id__in=habit_ids,
+                date__in=set(today_by_zone.values()),
+                completed=True
+            ).values_list('habit_id', 'date'))
+        
+        reminders = []
+        sent = {}
+        for slot in due:
+            local_date = local_dates[slot.id]
+            if slot.kind == 'habit' and (slot.habit_id, local_date) in checked:
+                continue
+            reminders.append({
+                'user_id': slot.user_id,
+                'kind': slot.kind,
+                'habit_id': str(slot.habit_id) if slot.habit_id else None,
+                'habit_name': slot.habit.name if slot.habit_id else None,
+                'local_date': local_date.isoformat(),
+                'local_time': slot.local_time.isoformat(),
+            })
+            sent.setdefault(local_date, []).append(slot.id)
+        
+        if reminders:
+            sink.deliver(reminders)
+        
+        for local_date, slot_ids in sent.items():
+            ReminderSlot.objects.filter(id__in=slot_ids).update(last_sent_on=local_date)
+        
+        return len(reminders)
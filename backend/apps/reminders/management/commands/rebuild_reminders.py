@@ -0,0 +1,35 @@
+"""
+Management command to rebuild the reminder index
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.reminders.business_logic import ReminderBusinessLogic
+
+
+class Command(BaseCommand):
+    help = 'Rebuild precomputed reminder slots from profiles and habits'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Specific user ID to rebuild (optional, rebuilds all users if not provided)'
+        )
+    
+    def handle(self, *args, **options):
+        user_id = options.get('user_id')
+        
+        if user_id:
+            if not User.objects.filter(id=user_id).exists():
+                raise CommandError(f'User with ID {user_id} not found')
+            user_ids = [user_id]
+        else:
+            user_ids = User.objects.values_list('id', flat=True).iterator()
+        
+        total_slots = 0
+        for current_user_id in user_ids:
+            total_slots += len(ReminderBusinessLogic.rebuild_user_reminders(current_user_id))
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {total_slots} reminder slots')
+        )
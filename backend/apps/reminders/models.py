@@ -0,0 +1,33 @@
+from django.db import models
+from django.contrib.auth.models import User
+import uuid
+
+
+class ReminderSlot(models.Model):
+    """Precomputed reminder index keyed by UTC minute of day"""
+    REMINDER_KINDS = [
+        ('habit', 'Habit'),
+        ('meditation', 'Meditation'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reminder_slots')
+    habit = models.ForeignKey('habits.Habit', on_delete=models.CASCADE, null=True, blank=True, related_name='reminder_slots')
+    kind = models.CharField(max_length=20, choices=REMINDER_KINDS)
+    timezone = models.CharField(max_length=50)
+    local_time = models.TimeField()
+    utc_bucket = models.PositiveSmallIntegerField()  # Minute of day in UTC (0-1439)
+    last_sent_on = models.DateField(blank=True, null=True)  # Local date, guards against double dispatch
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'reminder_slots'
+        indexes = [
+            models.Index(fields=['utc_bucket']),
+            models.Index(fields=['timezone', 'local_time']),
+            models.Index(fields=['user', 'kind']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.kind} reminder at {self.local_time} ({self.timezone})"
@@ -0,0 +1,21 @@
+"""
+Django signals keeping the reminder index in sync with profiles and habits
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.accounts.models import Profile
+from apps.habits.models import Habit
+from apps.reminders.business_logic import ReminderBusinessLogic
+
+
+@receiver(post_save, sender=Profile)
+def rebuild_reminders_on_profile(sender, instance, **kwargs):
+    """Rebuild a user's reminders when timezone, reminder time or toggles change"""
+    ReminderBusinessLogic.rebuild_user_reminders(instance.user_id)
+
+
+@receiver(post_save, sender=Habit)
+def rebuild_reminder_on_habit(sender, instance, **kwargs):
+    """Rebuild a habit's reminder when it is created/updated (deletes cascade)"""
+    ReminderBusinessLogic.rebuild_habit_reminder(instance)
@@ -0,0 +1,49 @@
+"""
+Delivery backends for reminders
+
+The active sink is configured with settings.REMINDER_SINK (dotted path).
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REMINDER_SINK = 'apps.reminders.sinks.LoggingSink'
+
+
+class ReminderSink:
+    """Base class for reminder delivery backends"""
+    
+    def deliver(self, reminders):
+        """Deliver a batch of reminder dicts"""
+        raise NotImplementedError
+
+
+class LoggingSink(ReminderSink):
+    """Writes reminders to the application log"""
+    
+    def deliver(self, reminders):
+        for reminder in reminders:
+            logger.info(
+                f"Reminder for user {reminder['user_id']}: {reminder['kind']} "
+                f"{reminder.get('habit_name') or ''} ({reminder['local_date']})"
+            )
+
+
+class MemorySink(ReminderSink):
+    """Keeps delivered reminders in memory, used in tests"""
+    
+    def __init__(self):
+        self.delivered = []
+        self.batches = 0
+    
+    def deliver(self, reminders):
+        self.delivered.extend(reminders)
+        self.batches += 1
+
+
+def get_reminder_sink():
+    """Instantiate the configured reminder sink"""
+    path = getattr(settings, 'REMINDER_SINK', DEFAULT_REMINDER_SINK)
+    return import_string(path)()
@@ -0,0 +1,35 @@
+"""
+Celery tasks for reminder dispatch
+
+Scheduled with Celery beat:
+    'dispatch-reminders': every minute -> apps.reminders.tasks.dispatch_reminders
+    'refresh-reminder-buckets': every hour -> apps.reminders.tasks.refresh_reminder_buckets
+"""
+from celery import shared_task
+import logging
+
+from .business_logic import ReminderBusinessLogic
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def dispatch_reminders():
+    """
+    Deliver reminders due in the current UTC minute bucket
+    Only the slots in this bucket are read, not every user
+    """
+    delivered = ReminderBusinessLogic.dispatch_due_reminders()
+    logger.info(f"Dispatched {delivered} reminders")
+    return delivered
+
+
+@shared_task
+def refresh_reminder_buckets():
+    """
+    Re-key reminder slots whose UTC bucket changed across a DST transition
+    """
+    moved = ReminderBusinessLogic.refresh_buckets()
+    if moved:
+        logger.info(f"Moved {moved} reminder slots to new UTC buckets")
+    return moved
@@ -0,0 +1,84 @@
+"""
+Tests for reminders app
+"""
+from django.test import TestCase
+from django.contrib.auth.models import User
+from datetime import date, datetime, time, timezone as dt_timezone
+
+from apps.accounts.models import Profile
+from apps.habits.models import Habit, HabitCheck
+from apps.reminders.models import ReminderSlot
+from apps.reminders.business_logic import ReminderBusinessLogic
+from apps.reminders.sinks import MemorySink
+
+
+class ReminderBucketTest(TestCase):
+    """Test UTC bucket computation"""
+    
+    def test_bucket_standard_time(self):
+        """Test 09:00 New York in January maps to 14:00 UTC"""
+        now = datetime(2024, 1, 15, 6, 0, tzinfo=dt_timezone.utc)
+        bucket = ReminderBusinessLogic.compute_bucket('America/New_York', time(9, 0), now)
+        self.assertEqual(bucket, 14 * 60)
+    
+    def test_bucket_daylight_time(self):
+        """Test 09:00 New York in July maps to 13:00 UTC"""
+        now = datetime(2024, 7, 15, 6, 0, tzinfo=dt_timezone.utc)
+        bucket = ReminderBusinessLogic.compute_bucket('America/New_York', time(9, 0), now)
+        self.assertEqual(bucket, 13 * 60)
+    
+    def test_bucket_unknown_timezone(self):
+        """Test unknown timezones fall back to UTC"""
+        now = datetime(2024, 1, 15, 6, 0, tzinfo=dt_timezone.utc)
+        bucket = ReminderBusinessLogic.compute_bucket('Mars/Olympus', time(9, 30), now)
+        self.assertEqual(bucket, 9 * 60 + 30)
+
+
+class ReminderDispatchTest(TestCase):
+    """Test reminder index maintenance and dispatch"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user, timezone='UTC')
+        self.habit = Habit.objects.create(user=self.user, name='Drink Water', is_active=True)
+    
+    def test_index_rebuilt_on_changes(self):
+        """Test profile and habit saves keep the index in sync"""
+        self.assertEqual(ReminderSlot.objects.filter(user=self.user).count(), 2)
+        
+        self.profile.meditation_reminders_enabled = False
+        self.profile.save()
+        self.assertEqual(ReminderSlot.objects.filter(user=self.user).count(), 1)
+        
+        self.habit.is_active = False
+        self.habit.save()
+        self.assertEqual(ReminderSlot.objects.filter(user=self.user).count(), 0)
+    
+    def test_dispatch_current_bucket(self):
+        """Test only the current bucket is delivered, once per day"""
+        sink = MemorySink()
+        now = datetime(2024, 1, 15, 9, 0, tzinfo=dt_timezone.utc)
+        ReminderBusinessLogic.rebuild_user_reminders(self.user.id, now=now.replace(hour=8))
+        
+        delivered = ReminderBusinessLogic.dispatch_due_reminders(now=now, sink=sink)
+        self.assertEqual(delivered, 2)
+        self.assertEqual({r['kind'] for r in sink.delivered}, {'habit', 'meditation'})
+        
+        # Running twice in the same minute does not re-send
+        delivered = ReminderBusinessLogic.dispatch_due_reminders(now=now, sink=sink)
+        self.assertEqual(delivered, 0)
+    
+    def test_dispatch_skips_checked_habits(self):
+        """Test habits already checked today are skipped"""
+        sink = MemorySink()
+        now = datetime(2024, 1, 15, 9, 0, tzinfo=dt_timezone.utc)
+        ReminderBusinessLogic.rebuild_user_reminders(self.user.id, now=now.replace(hour=8))
+        HabitCheck.objects.create(habit=self.habit, date=date(2024, 1, 15), completed=True)
+        
+        ReminderBusinessLogic.dispatch_due_reminders(now=now, sink=sink)
+        
+        self.assertEqual([r['kind'] for r in sink.delivered], ['meditation'])
@@ -0,0 +1,349 @@
+"""
+Vectorised habit-outcome and cardio analytics over a user's full history
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Avg, Sum, Min
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+from datetime import date
+import numpy as np
+
+from .models import DailySummary, CardioDailySummary
+
+INSIGHTS_CACHE_TIMEOUT = getattr(settings, 'INSIGHTS_CACHE_TIMEOUT', 36 * 60 * 60)
+MIN_PAIR_DAYS = 7       # Minimum overlapping days before a correlation is reported
+MIN_GROUP_DAYS = 5      # Minimum days on each side of a condition
+MIN_LIFT_PCT = 10       # Smallest difference worth telling the user about
+
+FEATURES = [
+    'habits_completed', 'habit_completion_rate', 'meditation_minutes',
+    'workout_sessions', 'total_volume_kg', 'calories_consumed',
+    'protein_g', 'carbs_g', 'fat_g', 'pre_mood', 'post_mood', 'mood_delta',
+]
+
+FEATURE_LABELS = {
+    'habits_completed': 'habits completed',
+    'habit_completion_rate': 'habit completion rate',
+    'meditation_minutes': 'meditation minutes',
+    'workout_sessions': 'workouts',
+    'total_volume_kg': 'training volume',
+    'calories_consumed': 'calories',
+    'protein_g': 'protein',
+    'carbs_g': 'carbs',
+    'fat_g': 'fat',
+    'pre_mood': 'mood before meditating',
+    'post_mood': 'mood after meditating',
+    'mood_delta': 'mood lift from meditating',
+}
+
+# Binary conditions derived from a source feature: name -> (source, phrase)
+CONDITIONS = {
+    'meditated': ('meditation_minutes', 'meditate'),
+    'worked_out': ('workout_sessions', 'work out'),
+}
+
+
+class InsightsAnalytics:
+    """Correlations and conditional means over a per-user day x feature matrix"""
+    
+    @staticmethod
+    def build_day_matrix(user):
+        """Build a (days x FEATURES) float matrix with NaN for missing values"""
+        from apps.habits.models import HabitCheck
+        from apps.meditations.models import MeditationLog
+        
+        summaries = list(DailySummary.objects.filter(user=user).values_list(
+            'date', 'habits_total', 'meditation_minutes', 'workout_sessions',
+            'total_volume_kg', 'calories_consumed', 'protein_g', 'carbs_g', 'fat_g'
+        ))
+        checks = list(HabitCheck.objects.filter(
+            habit__user=user, completed=True
+        ).values('date').annotate(completed=Count('id')).values_list('date', 'completed'))
+        moods = list(MeditationLog.objects.filter(
+            user=user
+        ).values('date').annotate(
+            pre=Avg('pre_mood'), post=Avg('post_mood')
+        ).values_list('date', 'pre', 'post'))
+        
+        all_dates = [row[0] for row in summaries] + [row[0] for row in checks] + [row[0] for row in moods]
+        if not all_dates:
+            return np.empty((0, len(FEATURES))), []
+        
+        first = min(all_dates).toordinal()
+        days = max(all_dates).toordinal() - first + 1
+        matrix = np.full((days, len(FEATURES)), np.nan)
+        column = {name: index for index, name in enumerate(FEATURES)}
+        
+        if summaries:
+            rows = np.array([row[1:] for row in summaries], dtype=float)
+            index = np.array([row[0].toordinal() for row in summaries]) - first
+            matrix[index, column['meditation_minutes']] = rows[:, 1]
+            matrix[index, column['workout_sessions']] = rows[:, 2]
+            matrix[index, column['total_volume_kg']] = rows[:, 3]
+            # Days without any food logged are unknown, not zero intake
+            logged = rows[:, 4] > 0
+            for offset, name in enumerate(['calories_consumed', 'protein_g', 'carbs_g', 'fat_g'], start=4):
+                matrix[index[logged], column[name]] = rows[logged, offset]
+            habits_total = np.full(days, np.nan)
+            habits_total[index] = np.where(rows[:, 0] > 0, rows[:, 0], np.nan)
+        else:
+            habits_total = np.full(days, np.nan)
+        
+        if checks:
+            index = np.array([row[0].toordinal() for row in checks]) - first
+            matrix[index, column['habits_completed']] = np.array([row[1] for row in checks], dtype=float)
+        # Days with habits but no completed check count as zero
+        no_checks = np.isnan(matrix[:, column['habits_completed']]) & ~np.isnan(habits_total)
+        matrix[no_checks, column['habits_completed']] = 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            matrix[:, column['habit_completion_rate']] = matrix[:, column['habits_completed']] / habits_total
+        
+        if moods:
+            rows = np.array([row[1:] for row in moods], dtype=float)
+            index = np.array([row[0].toordinal() for row in moods]) - first
+            matrix[index, column['pre_mood']] = rows[:, 0]
+            matrix[index, column['post_mood']] = rows[:, 1]
+            matrix[index, column['mood_delta']] = rows[:, 1] - rows[:, 0]
+        
+        # Drop calendar gaps where nothing at all was recorded
+        recorded = ~np.isnan(matrix).all(axis=1)
+        dates = np.arange(first, first + days)[recorded]
+        return matrix[recorded], dates.tolist()
+    
+    @staticmethod
+    def pairwise_correlations(matrix):
+        """Pearson correlation of every feature pair over days where both are present"""
+        valid = ~np.isnan(matrix)
+        values = np.where(valid, matrix, 0.0)
+        present = valid.astype(float)
+        
+        # All pairwise sums in a handful of matrix products
+        pair_days = present.T @ present
+        sums = values.T @ present              # sums[i, j]: feature i over days where i and j present
+        sums_sq = (values * values).T @ present
+        cross = values.T @ values
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = cross - sums * sums.T / pair_days
+            variance = sums_sq - sums ** 2 / pair_days
+            correlations = covariance / np.sqrt(variance * variance.T)
+        
+        correlations[pair_days < MIN_PAIR_DAYS] = np.nan
+        return correlations, pair_days
+    
+    @staticmethod
+    def conditional_means(matrix, flags):
+        """Mean of every feature on days where each flag is set vs not set"""
+        valid = ~np.isnan(matrix)
+        values = np.where(valid, matrix, 0.0)
+        present = valid.astype(float)
+        
+        # NaN flags (condition unknown) fall on neither side
+        flag_known = ~np.isnan(flags)
+        with_flag = (flag_known & (flags > 0)).astype(float)
+        without_flag = (flag_known & (flags <= 0)).astype(float)
+        
+        days_with = with_flag.T @ present
+        days_without = without_flag.T @ present
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means_with = (with_flag.T @ values) / days_with
+            means_without = (without_flag.T @ values) / days_without
+        
+        return means_with, means_without, days_with, days_without
+    
+    @staticmethod
+    def compute_insights(user):
+        """Compute correlations, conditional means and insight sentences for a user"""
+        matrix, dates = InsightsAnalytics.build_day_matrix(user)
+        column = {name: index for index, name in enumerate(FEATURES)}
+        
+        correlations, _ = InsightsAnalytics.pairwise_correlations(matrix)
+        condition_names = list(CONDITIONS)
+        flags = matrix[:, [column[CONDITIONS[name][0]] for name in condition_names]]
+        means_with, means_without, days_with, days_without = InsightsAnalytics.conditional_means(matrix, flags)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lift = (means_with - means_without) / np.abs(means_without) * 100
+        
+        conditional = []
+        insights = []
+        for k, condition in enumerate(condition_names):
+            source, phrase = CONDITIONS[condition]
+            for j, feature in enumerate(FEATURES):
+                if feature == source or days_with[k, j] < MIN_GROUP_DAYS or days_without[k, j] < MIN_GROUP_DAYS:
+                    continue
+                lift_pct = None if not np.isfinite(lift[k, j]) else round(float(lift[k, j]), 1)
+                conditional.append({
+                    'condition': condition,
+                    'metric': feature,
+                    'mean_with': round(float(means_with[k, j]), 3),
+                    'mean_without': round(float(means_without[k, j]), 3),
+                    'days_with': int(days_with[k, j]),
+                    'days_without': int(days_without[k, j]),
+                    'lift_pct': lift_pct,
+                })
+                if lift_pct is not None and abs(lift_pct) >= MIN_LIFT_PCT:
+                    insights.append((abs(lift_pct), InsightsAnalytics._describe(phrase, feature, lift_pct)))
+        
+        insights.sort(key=lambda item: item[0], reverse=True)
+        return {
+            'days': len(dates),
+            'features': FEATURES,
+            'correlations': [
+                [None if np.isnan(value) else round(float(value), 3) for value in row]
+                for row in correlations
+            ],
+            'conditional_means': conditional,
+            'insights': [text for _, text in insights],
+            'computed_at': timezone.now().isoformat(),
+        }
+    
+    @staticmethod
+    def _describe(phrase, feature, lift_pct):
+        if feature == 'habits_completed':
+            direction = 'more' if lift_pct > 0 else 'fewer'
+            return f"On days you {phrase} you complete {abs(lift_pct):.0f}% {direction} habits"
+        direction = 'higher' if lift_pct > 0 else 'lower'
+        return f"On days you {phrase}, your {FEATURE_LABELS[feature]} is {abs(lift_pct):.0f}% {direction}"
+    
+    @staticmethod
+    def cache_key(user_id):
+        return f'reports:insights:{user_id}'
+    
+    @staticmethod
+    def get_insights(user):
+        """Cached insights for a user, computed on a miss"""
+        key = InsightsAnalytics.cache_key(user.id)
+        insights = cache.get(key)
+        if insights is None:
+            insights = InsightsAnalytics.compute_insights(user)
+            cache.set(key, insights, INSIGHTS_CACHE_TIMEOUT)
+        return insights
+    
+    @staticmethod
+    def precompute_insights(users):
+        """Batch mode: compute and cache insights for many users"""
+        computed = 0
+        for user in users:
+            cache.set(
+                InsightsAnalytics.cache_key(user.id),
+                InsightsAnalytics.compute_insights(user),
+                INSIGHTS_CACHE_TIMEOUT
+            )
+            computed += 1
+        return computed
+
+
+def _pace(duration_seconds, distance_km):
+    if not distance_km:
+        return None
+    return round(float(duration_seconds) / float(distance_km), 1)
+
+
+class CardioAnalytics:
+    """Distance, duration and pace rollups read from cardio daily summaries"""
+    
+    @staticmethod
+    def get_report(user, start_date, end_date, exercise_id=None):
+        """Daily rows and weekly totals per cardio exercise"""
+        rows = CardioDailySummary.objects.filter(user=user, date__gte=start_date, date__lte=end_date)
+        if exercise_id:
+            rows = rows.filter(exercise_id=exercise_id)
+        
+        daily = [
+            {
+                'date': row['date'].isoformat(),
+                'exercise': str(row['exercise_id']),
+                'exercise_name': row['exercise__name'],
+                'sets': row['sets'],
+                'distance_km': float(row['distance_km']),
+                'duration_seconds': row['duration_seconds'],
+                'average_pace_seconds_per_km': _pace(row['duration_seconds'], row['distance_km']),
+                'best_pace_seconds_per_km': (
+                    float(row['best_pace_seconds_per_km']) if row['best_pace_seconds_per_km'] is not None else None
+                ),
+            }
+            for row in rows.order_by('date', 'exercise__name').values(
+                'date', 'exercise_id', 'exercise__name', 'sets', 'distance_km',
+                'duration_seconds', 'best_pace_seconds_per_km'
+            )
+        ]
+        weekly = [
+            {
+                'week_start': row['week'].isoformat() if isinstance(row['week'], date) else str(row['week'])[:10],
+                'exercise': str(row['exercise_id']),
+                'exercise_name': row['exercise__name'],
+                'days': row['days'],
+                'distance_km': float(row['distance'] or 0),
+                'duration_seconds': row['duration'] or 0,
+                'average_pace_seconds_per_km': _pace(row['duration'] or 0, row['distance']),
+                'best_pace_seconds_per_km': float(row['best_pace']) if row['best_pace'] is not None else None,
+            }
+            for row in rows.annotate(week=TruncWeek('date')).values(
+                'week', 'exercise_id', 'exercise__name'
+            ).annotate(
+                days=Count('id'),
+                distance=Sum('distance_km'),
+                duration=Sum('duration_seconds'),
+                best_pace=Min('best_pace_seconds_per_km')
+            ).order_by('week', 'exercise__name')
+        ]
+        return {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'daily': daily,
+            'weekly': weekly,
+        }
+    
+    @staticmethod
+    def pace_trend(user, exercise_id, window=5):
+        """
+        Distance-weighted rolling pace over the last `window` days trained and
+        the linear trend in seconds per km per week, as columns.
+        """
+        rows = list(CardioDailySummary.objects.filter(
+            user=user, exercise_id=exercise_id, distance_km__gt=0, duration_seconds__gt=0
+        ).order_by('date').values_list('date', 'distance_km', 'duration_seconds', 'best_pace_seconds_per_km'))
+        
+        payload = {
+            'exercise': str(exercise_id),
+            'window': window,
+            'dates': [],
+            'pace': [],
+            'best_pace': [],
+            'rolling_pace': [],
+            'trend_seconds_per_km_per_week': None,
+        }
+        if not rows:
+            return payload
+        
+        days = np.array([row[0].toordinal() for row in rows], dtype=float)
+        distance = np.array([row[1] for row in rows], dtype=float)
+        duration = np.array([row[2] for row in rows], dtype=float)
+        best = np.array([np.nan if row[3] is None else float(row[3]) for row in rows])
+        pace = duration / distance
+        
+        # Rolling sums via cumsum so each point weights days by distance covered
+        cumulative_distance = np.cumsum(np.r_[0.0, distance])
+        cumulative_duration = np.cumsum(np.r_[0.0, duration])
+        index = np.arange(1, len(rows) + 1)
+        lower = np.maximum(index - window, 0)
+        rolling_pace = (
+            (cumulative_duration[index] - cumulative_duration[lower]) /
+            (cumulative_distance[index] - cumulative_distance[lower])
+        )
+        
+        trend = None
+        if len(rows) >= 2 and days[-1] > days[0]:
+            slope = np.polyfit(days - days[0], pace, 1, w=np.sqrt(distance))[0]
+            trend = round(float(slope) * 7, 2)
+        
+        payload.update({
+            'dates': [date.fromordinal(int(day)).isoformat() for day in days],
+            'pace': np.round(pace, 1).tolist(),
+            'best_pace': [None if np.isnan(value) else round(float(value), 1) for value in best],
+            'rolling_pace': np.round(rolling_pace, 1).tolist(),
+            'trend_seconds_per_km_per_week': trend,
+        })
+        return payload
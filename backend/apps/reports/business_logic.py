@@ -1,11 +1,20 @@
 """
 Business logic for daily summaries and reports
 """
-from django.db.models import Q, Max, Sum, Avg
+from django.db import transaction
+from django.db.models import Q, Max, Min, Sum, Avg, Count, FloatField
+from django.db.models.functions import Cast, ExtractHour, ExtractIsoWeekDay
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import date, timedelta
 from decimal import Decimal
-from .models import DailySummary
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import logging
+from .models import DailySummary, ActivityHistogram, CardioDailySummary
+
+HISTOGRAM_CELLS = 7 * 24
+
+logger = logging.getLogger(__name__)
 
 
 class DailySummaryBusinessLogic:
@@ -41,15 +50,14 @@ class DailySummaryBusinessLogic:
         
         # Workouts
         from apps.workouts.models import WorkoutSession, WorkoutSet
-        from apps.workouts.business_logic import WorkoutBusinessLogic
         workouts = WorkoutSession.objects.filter(user=user, date=date)
-        summary.workout_sessions = workouts.count()
-        summary.total_volume_kg = sum(
-            WorkoutBusinessLogic.get_workout_volume(session) for session in workouts
-        )
+        workout_totals = workouts.aggregate(sessions=Count('id'), volume=Sum('total_volume_kg'))
+        summary.workout_sessions = workout_totals['sessions']
+        summary.total_volume_kg = workout_totals['volume'] or 0
         summary.prs_achieved = WorkoutSet.objects.filter(
             session__in=workouts, is_pr=True
         ).count()
+        DailySummaryBusinessLogic.update_cardio_summaries(user, date)
         
         # Nutrition
         from apps.nutrition.business_logic import NutritionBusinessLogic
@@ -66,6 +74,54 @@ class DailySummaryBusinessLogic:
         summary.save()
         return summary
     
+    @staticmethod
+    def update_cardio_summaries(user, date):
+        """
+        Rebuild the day's per-exercise cardio rows with one grouped query; rows are
+        only rewritten when they differ from what is stored, so days without cardio
+        (and writes that do not change it) cost reads only
+        """
+        from apps.workouts.models import WorkoutSet
+        
+        rows = WorkoutSet.objects.filter(
+            session__user=user,
+            session__date=date,
+            exercise__category='cardio'
+        ).values('exercise_id').annotate(
+            set_count=Count('id'),
+            distance=Sum('distance_km'),
+            duration=Sum('duration_seconds'),
+            best_pace=Min(
+                Cast('duration_seconds', FloatField()) / Cast('distance_km', FloatField()),
+                filter=Q(distance_km__gt=0, duration_seconds__gt=0)
+            )
+        )
+        
+        summaries = [
+            CardioDailySummary(
+                user=user,
+                date=date,
+                exercise_id=row['exercise_id'],
+                sets=row['set_count'],
+                distance_km=row['distance'] or 0,
+                duration_seconds=row['duration'] or 0,
+                best_pace_seconds_per_km=(
+                    round(Decimal(str(row['best_pace'])), 2) if row['best_pace'] is not None else None
+                ),
+            )
+            for row in rows
+        ]
+        stored = CardioDailySummary.objects.filter(user=user, date=date)
+        fields = ('exercise_id', 'sets', 'distance_km', 'duration_seconds', 'best_pace_seconds_per_km')
+        current = {tuple(getattr(summary, field) for field in fields) for summary in summaries}
+        if set(stored.values_list(*fields)) == current:
+            return summaries
+        
+        with transaction.atomic():
+            stored.delete()
+            CardioDailySummary.objects.bulk_create(summaries)
+        return summaries
+    
     @staticmethod
     def nightly_rollup():
         """Nightly job to recalculate all summaries"""
@@ -90,3 +146,115 @@ class DailySummaryBusinessLogic:
         
         return run_nightly_rollup
 
+
+
+class ActivityHistogramBusinessLogic:
+    """Maintained weekday x hour activity counters"""
+    
+    @staticmethod
+    def get_zone(tz_name):
+        try:
+            return ZoneInfo(tz_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            return ZoneInfo('UTC')
+    
+    @staticmethod
+    def cell(start_time, zone):
+        """Counter index for a start time in the given zone"""
+        if isinstance(start_time, str):
+            start_time = parse_datetime(start_time)
+        local = start_time.astimezone(zone)
+        return local.weekday() * 24 + local.hour
+    
+    @staticmethod
+    def apply(user_id, kind, changes):
+        """Apply (start_time, delta) changes to a user's counters in one locked row update"""
+        from apps.accounts.models import Profile
+        
+        changes = [(start_time, delta) for start_time, delta in changes if start_time and delta]
+        if not changes:
+            return
+        
+        tz_name = Profile.objects.filter(user_id=user_id).values_list('timezone', flat=True).first()
+        zone = ActivityHistogramBusinessLogic.get_zone(tz_name or 'UTC')
+        
+        drifted = False
+        with transaction.atomic():
+            histogram, _ = ActivityHistogram.objects.select_for_update().get_or_create(
+                user_id=user_id, kind=kind,
+                defaults={'counts': [0] * HISTOGRAM_CELLS}
+            )
+            for start_time, delta in changes:
+                index = ActivityHistogramBusinessLogic.cell(start_time, zone)
+                if histogram.counts[index] + delta < 0:
+                    drifted = True
+                    break
+                histogram.counts[index] += delta
+            if not drifted:
+                histogram.save(update_fields=['counts', 'updated_at'])
+        
+        if drifted:
+            # Counters disagree with the data (e.g. a missed snapshot); recount instead of clamping
+            logger.warning(f"Activity histogram {kind} for user {user_id} would go negative; rebuilding")
+            ActivityHistogramBusinessLogic.rebuild([user_id])
+    
+    @staticmethod
+    def rebuild(user_ids=None):
+        """Rebuild histograms with one grouped query per timezone and kind"""
+        from apps.accounts.models import Profile
+        from apps.meditations.models import MeditationLog
+        from apps.workouts.models import WorkoutSession
+        
+        profiles = Profile.objects.all()
+        if user_ids is not None:
+            profiles = profiles.filter(user_id__in=user_ids)
+        users_by_zone = {}
+        for user_id, tz_name in profiles.values_list('user_id', 'timezone'):
+            users_by_zone.setdefault(tz_name, []).append(user_id)
+        
+        sources = [
+            ('meditation_minutes', MeditationLog.objects.all(), Sum('duration_minutes')),
+            ('workout_sessions', WorkoutSession.objects.all(), Count('id')),
+        ]
+        
+        counts = {}
+        for tz_name, zone_user_ids in users_by_zone.items():
+            zone = ActivityHistogramBusinessLogic.get_zone(tz_name)
+            for kind, queryset, value in sources:
+                for user_id, weekday, hour, total in queryset.filter(
+                    user_id__in=zone_user_ids
+                ).values(
+                    'user_id',
+                    weekday=ExtractIsoWeekDay('start_time', tzinfo=zone),
+                    hour=ExtractHour('start_time', tzinfo=zone)
+                ).annotate(total=value).values_list('user_id', 'weekday', 'hour', 'total'):
+                    cells = counts.setdefault((user_id, kind), [0] * HISTOGRAM_CELLS)
+                    cells[(weekday - 1) * 24 + hour] += total or 0
+        
+        all_user_ids = [user_id for zone_user_ids in users_by_zone.values() for user_id in zone_user_ids]
+        histograms = [
+            ActivityHistogram(user_id=user_id, kind=kind, counts=counts.get((user_id, kind), [0] * HISTOGRAM_CELLS))
+            for user_id in all_user_ids
+            for kind, _ in ActivityHistogram.KINDS
+        ]
+        with transaction.atomic():
+            ActivityHistogram.objects.filter(user_id__in=all_user_ids).delete()
+            ActivityHistogram.objects.bulk_create(histograms)
+        
+        return len(histograms)
+    
+    @staticmethod
+    def get_histograms(user):
+        """Counters as 7 x 24 matrices (Monday first), zero-filled when missing"""
+        stored = dict(ActivityHistogram.objects.filter(user=user).values_list('kind', 'counts'))
+        result = {}
+        for kind, _ in ActivityHistogram.KINDS:
+            cells = stored.get(kind) or [0] * HISTOGRAM_CELLS
+            matrix = [cells[day * 24:(day + 1) * 24] for day in range(7)]
+            peak = max(range(HISTOGRAM_CELLS), key=lambda index: cells[index])
+            result[kind] = {
+                'matrix': matrix,
+                'total': sum(cells),
+                'peak': {'weekday': peak // 24 + 1, 'hour': peak % 24} if cells[peak] else None,
+            }
+        return result
@@ -0,0 +1,31 @@
+"""
+Management command to rebuild time-of-day activity histograms
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.reports.business_logic import ActivityHistogramBusinessLogic
+
+
+class Command(BaseCommand):
+    help = 'Rebuild weekday x hour activity histograms from meditation logs and workout sessions'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Specific user ID to rebuild (optional, rebuilds all users if not provided)'
+        )
+    
+    def handle(self, *args, **options):
+        user_id = options.get('user_id')
+        
+        if user_id:
+            if not User.objects.filter(id=user_id).exists():
+                raise CommandError(f'User with ID {user_id} not found')
+            rebuilt = ActivityHistogramBusinessLogic.rebuild([user_id])
+        else:
+            rebuilt = ActivityHistogramBusinessLogic.rebuild()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {rebuilt} activity histograms')
+        )
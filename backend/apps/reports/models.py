@@ -51,3 +51,46 @@ class DailySummary(models.Model):
     def __str__(self):
         return f"{self.user.username}: {self.date} Summary"
 
+
+
+class ActivityHistogram(models.Model):
+    """Per-user weekday x hour counters in the user's local time"""
+    KINDS = [
+        ('meditation_minutes', 'Meditation Minutes'),
+        ('workout_sessions', 'Workout Sessions'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_histograms')
+    kind = models.CharField(max_length=20, choices=KINDS)
+    counts = models.JSONField(default=list)  # 168 ints, index (iso_weekday - 1) * 24 + hour
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'activity_histograms'
+        unique_together = ['user', 'kind']
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.kind} histogram"
+
+
+class CardioDailySummary(models.Model):
+    """Per-day cardio rollup per exercise, rebuilt with the daily summary"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cardio_summaries')
+    date = models.DateField()
+    exercise = models.ForeignKey('workouts.Exercise', on_delete=models.CASCADE, related_name='cardio_summaries')
+    sets = models.PositiveIntegerField(default=0)
+    distance_km = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    duration_seconds = models.PositiveIntegerField(default=0)
+    best_pace_seconds_per_km = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
+    
+    class Meta:
+        db_table = 'cardio_daily_summaries'
+        unique_together = ['user', 'date', 'exercise']
+        indexes = [
+            models.Index(fields=['user', 'exercise', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.date} cardio {self.distance_km}km"
@@ -1,15 +1,24 @@
 """
 Django signals for automatic daily summary updates
 """
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.utils import timezone
 
+# Receivers run in registration order: the owning apps' handlers (session and
+# meal totals, personal bests, the profile timezone snapshot) must run before
+# the summaries below read their results, whatever the INSTALLED_APPS order
+import apps.accounts.signals  # noqa: F401
+import apps.meditations.signals  # noqa: F401
+import apps.workouts.signals  # noqa: F401
+import apps.nutrition.signals  # noqa: F401
+
+from apps.accounts.models import Profile
 from apps.habits.models import HabitCheck
 from apps.meditations.models import MeditationLog
 from apps.workouts.models import WorkoutSession, WorkoutSet
 from apps.nutrition.models import Meal, MealItem
-from apps.reports.business_logic import DailySummaryBusinessLogic
+from apps.workouts.business_logic import WorkoutBusinessLogic
+from apps.reports.business_logic import DailySummaryBusinessLogic, ActivityHistogramBusinessLogic
 
 
 @receiver(post_save, sender=HabitCheck)
@@ -22,6 +31,24 @@ def update_summary_on_habit_check(sender, instance, **kwargs):
     )
 
 
+@receiver(post_save, sender=MeditationLog)
+def update_histogram_on_meditation_save(sender, instance, **kwargs):
+    """Move meditation minutes between time-of-day counters on create/update"""
+    changes = [(instance.start_time, instance.duration_minutes)]
+    previous = getattr(instance, '_previous_meditation', None)
+    if previous:
+        changes.insert(0, (previous['start_time'], -previous['duration_minutes']))
+    ActivityHistogramBusinessLogic.apply(instance.user_id, 'meditation_minutes', changes)
+
+
+@receiver(post_delete, sender=MeditationLog)
+def update_histogram_on_meditation_delete(sender, instance, **kwargs):
+    """Remove a deleted log's minutes from the time-of-day counters"""
+    ActivityHistogramBusinessLogic.apply(
+        instance.user_id, 'meditation_minutes', [(instance.start_time, -instance.duration_minutes)]
+    )
+
+
 @receiver(post_save, sender=MeditationLog)
 @receiver(post_delete, sender=MeditationLog)
 def update_summary_on_meditation_log(sender, instance, **kwargs):
@@ -32,6 +59,35 @@ def update_summary_on_meditation_log(sender, instance, **kwargs):
     )
 
 
+@receiver(pre_save, sender=WorkoutSession)
+def remember_previous_workout_session(sender, instance, **kwargs):
+    """Keep the stored start time so counters can be moved on update"""
+    instance._previous_start_time = None
+    if not instance._state.adding:
+        instance._previous_start_time = WorkoutSession.objects.filter(
+            pk=instance.pk
+        ).values_list('start_time', flat=True).first()
+
+
+@receiver(post_save, sender=WorkoutSession)
+def update_histogram_on_workout_save(sender, instance, created, **kwargs):
+    """Count a workout in its time-of-day counter on create, move it on reschedule"""
+    previous = getattr(instance, '_previous_start_time', None)
+    if created:
+        changes = [(instance.start_time, 1)]
+    elif previous and previous != instance.start_time:
+        changes = [(previous, -1), (instance.start_time, 1)]
+    else:
+        return
+    ActivityHistogramBusinessLogic.apply(instance.user_id, 'workout_sessions', changes)
+
+
+@receiver(post_delete, sender=WorkoutSession)
+def update_histogram_on_workout_delete(sender, instance, **kwargs):
+    """Remove a deleted workout from the time-of-day counters"""
+    ActivityHistogramBusinessLogic.apply(instance.user_id, 'workout_sessions', [(instance.start_time, -1)])
+
+
 @receiver(post_save, sender=WorkoutSession)
 @receiver(post_delete, sender=WorkoutSession)
 def update_summary_on_workout_session(sender, instance, **kwargs):
@@ -46,6 +102,9 @@ def update_summary_on_workout_session(sender, instance, **kwargs):
 @receiver(post_delete, sender=WorkoutSet)
 def update_summary_on_workout_set(sender, instance, **kwargs):
     """Update daily summary when workout set is created/updated/deleted"""
+    # A deleted session's summary is recalculated once when the session goes
+    if instance.session_id in WorkoutBusinessLogic.sessions_being_deleted():
+        return
     DailySummaryBusinessLogic.recalculate_daily_summary(
         instance.session.user, 
         instance.session.date
@@ -71,3 +130,10 @@ def update_summary_on_meal_item(sender, instance, **kwargs):
         instance.meal.date
     )
 
+
+@receiver(post_save, sender=Profile)
+def rebuild_histograms_on_timezone_change(sender, instance, created, **kwargs):
+    """Local weekday/hour buckets depend on the timezone, so rebuild on change"""
+    previous = getattr(instance, '_previous_timezone', None)
+    if not created and previous and previous != instance.timezone:
+        ActivityHistogramBusinessLogic.rebuild([instance.user_id])
@@ -79,3 +79,14 @@ def rollup_all_users_date_range(start_date, end_date):
     
     return results
 
+
+@shared_task
+def precompute_insights():
+    """
+    Nightly task to compute and cache habit-outcome insights for all users
+    """
+    from .analytics import InsightsAnalytics
+    
+    computed = InsightsAnalytics.precompute_insights(User.objects.all().iterator())
+    logger.info(f"Precomputed insights for {computed} users")
+    return computed
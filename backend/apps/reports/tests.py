@@ -7,7 +7,7 @@ from django.contrib.auth.models import User
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 from decimal import Decimal
 
 from apps.accounts.models import Profile
@@ -15,8 +15,8 @@ from apps.habits.models import Habit, HabitCheck
 from apps.meditations.models import MeditationLog
 from apps.workouts.models import Exercise, WorkoutSession, WorkoutSet
 from apps.nutrition.models import Food, Meal, MealItem
-from apps.reports.models import DailySummary
-from apps.reports.business_logic import DailySummaryBusinessLogic
+from apps.reports.models import DailySummary, ActivityHistogram, CardioDailySummary
+from apps.reports.business_logic import DailySummaryBusinessLogic, ActivityHistogramBusinessLogic
 
 
 class DashboardViewTest(APITestCase):
@@ -468,3 +468,256 @@ class CeleryTasksTest(TestCase):
         )
         self.assertEqual(summaries.count(), 2)  # 1 user * 2 days
 
+
+
+class InsightsAnalyticsTest(TestCase):
+    """Test vectorised correlation analytics"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+    
+    def test_pairwise_correlations_match_numpy(self):
+        """Test pairwise correlations equal np.corrcoef on complete data"""
+        import numpy as np
+        from apps.reports.analytics import InsightsAnalytics
+        
+        rng = np.random.default_rng(0)
+        matrix = rng.normal(size=(50, 4))
+        matrix[:, 1] += matrix[:, 0]
+        
+        correlations, pair_days = InsightsAnalytics.pairwise_correlations(matrix)
+        
+        np.testing.assert_allclose(correlations, np.corrcoef(matrix, rowvar=False), atol=1e-9)
+        self.assertEqual(pair_days[0, 1], 50)
+    
+    def test_conditional_means(self):
+        """Test means on days with and without a condition"""
+        import numpy as np
+        from apps.reports.analytics import InsightsAnalytics
+        
+        matrix = np.array([[1.0, 10.0], [0.0, 4.0], [1.0, 8.0], [0.0, np.nan]])
+        means_with, means_without, days_with, days_without = InsightsAnalytics.conditional_means(
+            matrix, matrix[:, [0]]
+        )
+        
+        self.assertEqual(means_with[0, 1], 9.0)
+        self.assertEqual(means_without[0, 1], 4.0)
+        self.assertEqual(days_without[0, 1], 1)
+    
+    def test_meditation_insight(self):
+        """Test an insight is produced from daily summaries"""
+        from apps.reports.analytics import InsightsAnalytics
+        
+        start = date.today() - timedelta(days=20)
+        for offset in range(20):
+            meditated = offset % 2 == 0
+            DailySummary.objects.create(
+                user=self.user,
+                date=start + timedelta(days=offset),
+                habits_total=4,
+                meditation_minutes=20 if meditated else 0,
+                calories_consumed=2000,
+                protein_g=Decimal('150') if meditated else Decimal('100')
+            )
+        
+        insights = InsightsAnalytics.compute_insights(self.user)
+        
+        self.assertEqual(insights['days'], 20)
+        self.assertIn('On days you meditate, your protein is 50% higher', insights['insights'])
+
+
+class ActivityHistogramTest(APITestCase):
+    """Test maintained weekday x hour activity counters"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user, timezone='America/New_York')
+        self.client.force_authenticate(user=self.user)
+    
+    def _counts(self, kind):
+        return ActivityHistogram.objects.get(user=self.user, kind=kind).counts
+    
+    def test_meditation_minutes_follow_writes(self):
+        """Test counters are incremented, moved and decremented in local time"""
+        # Tue 2024-01-16 12:30 UTC is Tue 07:30 in New York
+        log = MeditationLog.objects.create(
+            user=self.user,
+            date=date(2024, 1, 16),
+            start_time=datetime(2024, 1, 16, 12, 30, tzinfo=dt_timezone.utc),
+            duration_minutes=20,
+            style='mindfulness'
+        )
+        self.assertEqual(self._counts('meditation_minutes')[1 * 24 + 7], 20)
+        
+        log.start_time = datetime(2024, 1, 16, 3, 0, tzinfo=dt_timezone.utc)  # Mon 22:00 local
+        log.duration_minutes = 15
+        log.save()
+        counts = self._counts('meditation_minutes')
+        self.assertEqual(counts[1 * 24 + 7], 0)
+        self.assertEqual(counts[0 * 24 + 22], 15)
+        
+        log.delete()
+        self.assertEqual(sum(self._counts('meditation_minutes')), 0)
+    
+    def test_drift_triggers_rebuild(self):
+        """Test a decrement below zero recounts from the data instead of clamping"""
+        logs = [
+            MeditationLog.objects.create(
+                user=self.user, date=date(2024, 1, 16),
+                start_time=datetime(2024, 1, 16, 12, minute, tzinfo=dt_timezone.utc),
+                duration_minutes=20, style='mindfulness'
+            )
+            for minute in (0, 30)
+        ]
+        ActivityHistogram.objects.filter(user=self.user, kind='meditation_minutes').update(
+            counts=[0] * (7 * 24)
+        )
+        with self.assertLogs('apps.reports.business_logic', level='WARNING'):
+            logs[0].delete()
+        self.assertEqual(self._counts('meditation_minutes')[1 * 24 + 7], 20)
+    
+    def test_rebuild_matches_maintained_counters(self):
+        """Test bulk rebuild reproduces the signal-maintained counters"""
+        for hour in (11, 11, 23):
+            WorkoutSession.objects.create(
+                user=self.user,
+                date=date(2024, 1, 20),
+                start_time=datetime(2024, 1, 20, hour, 0, tzinfo=dt_timezone.utc)
+            )
+        maintained = self._counts('workout_sessions')
+        ActivityHistogram.objects.all().delete()
+        
+        ActivityHistogramBusinessLogic.rebuild([self.user.id])
+        
+        self.assertEqual(self._counts('workout_sessions'), maintained)
+        self.assertEqual(maintained[5 * 24 + 6], 2)   # Sat 06:00 local
+        self.assertEqual(maintained[5 * 24 + 18], 1)  # Sat 18:00 local
+    
+    def test_activity_patterns_endpoint(self):
+        """Test endpoint serves 7 x 24 matrices with the peak slot"""
+        WorkoutSession.objects.create(
+            user=self.user,
+            date=date(2024, 1, 20),
+            start_time=datetime(2024, 1, 20, 11, 0, tzinfo=dt_timezone.utc)
+        )
+        
+        response = self.client.get(reverse('activity-patterns'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        workouts = response.data['workout_sessions']
+        self.assertEqual(len(workouts['matrix']), 7)
+        self.assertEqual(workouts['matrix'][5][6], 1)
+        self.assertEqual(workouts['peak'], {'weekday': 6, 'hour': 6})
+        self.assertIsNone(response.data['meditation_minutes']['peak'])
+
+
+class CardioSummaryTest(APITestCase):
+    """Test cardio rollups and the pace-trend endpoint"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.run = Exercise.objects.create(name='Running', category='cardio', is_custom=False)
+        self.bench = Exercise.objects.create(name='Bench Press', category='push', is_custom=False)
+    
+    def _session(self, day, *sets):
+        session = WorkoutSession.objects.create(
+            user=self.user,
+            date=day,
+            start_time=datetime.combine(day, datetime.min.time(), tzinfo=dt_timezone.utc) + timedelta(hours=7)
+        )
+        for index, (distance, seconds) in enumerate(sets, start=1):
+            WorkoutSet.objects.create(
+                session=session,
+                exercise=self.run,
+                set_number=index,
+                distance_km=Decimal(distance),
+                duration_seconds=seconds
+            )
+        return session
+    
+    def test_daily_rollup_maintained(self):
+        """Test the side table follows set writes and ignores non-cardio sets"""
+        session = self._session(date(2024, 1, 15), ('5.00', 1500), ('2.00', 540))
+        WorkoutSet.objects.create(session=session, exercise=self.bench, set_number=3, reps=5, weight_kg=Decimal('80'))
+        
+        row = CardioDailySummary.objects.get(user=self.user, date=date(2024, 1, 15))
+        self.assertEqual((row.sets, row.distance_km, row.duration_seconds), (2, Decimal('7.00'), 2040))
+        self.assertEqual(row.best_pace_seconds_per_km, Decimal('270.00'))
+        
+        session.sets.filter(set_number=2).delete()
+        row = CardioDailySummary.objects.get(user=self.user, date=date(2024, 1, 15))
+        self.assertEqual(row.best_pace_seconds_per_km, Decimal('300.00'))
+    
+    def test_unchanged_day_not_rewritten(self):
+        """Test recalculating a day whose cardio rows are current writes nothing to the side table"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        self._session(date(2024, 1, 15), ('5.00', 1500))
+        other = WorkoutSession.objects.create(
+            user=self.user,
+            date=date(2024, 1, 16),
+            start_time=datetime(2024, 1, 16, 7, 0, tzinfo=dt_timezone.utc)
+        )
+        
+        with CaptureQueriesContext(connection) as queries:
+            WorkoutSet.objects.create(session=other, exercise=self.bench, set_number=1, reps=5, weight_kg=Decimal('80'))
+            DailySummaryBusinessLogic.recalculate_daily_summary(self.user, date(2024, 1, 15))
+        writes = [
+            query['sql'] for query in queries.captured_queries
+            if CardioDailySummary._meta.db_table in query['sql'] and not query['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(writes, [])
+        self.assertEqual(CardioDailySummary.objects.filter(user=self.user).count(), 1)
+    
+    def test_cardio_report_daily_and_weekly(self):
+        """Test daily rows and weekly grouped totals with average and best pace"""
+        self._session(date(2024, 1, 15), ('5.00', 1500))
+        self._session(date(2024, 1, 17), ('10.00', 2800))
+        self._session(date(2024, 1, 22), ('4.00', 1000))
+        
+        response = self.client.get(reverse('cardio-report'), {'start': '2024-01-15', 'end': '2024-01-28'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['daily']), 3)
+        first_week = response.data['weekly'][0]
+        self.assertEqual(first_week['week_start'], '2024-01-15')
+        self.assertEqual(first_week['distance_km'], 15.0)
+        self.assertEqual(first_week['average_pace_seconds_per_km'], 286.7)
+        self.assertEqual(first_week['best_pace_seconds_per_km'], 280.0)
+        self.assertEqual(response.data['weekly'][1]['days'], 1)
+    
+    def test_pace_trend(self):
+        """Test rolling pace is distance-weighted and trend is per week"""
+        self._session(date(2024, 1, 1), ('5.00', 1500))   # 300 s/km
+        self._session(date(2024, 1, 8), ('5.00', 1450))   # 290 s/km
+        self._session(date(2024, 1, 15), ('10.00', 2800)) # 280 s/km
+        
+        response = self.client.get(reverse('cardio-pace-trend'), {'exercise': str(self.run.id), 'window': 2})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['pace'], [300.0, 290.0, 280.0])
+        self.assertEqual(response.data['rolling_pace'], [300.0, 295.0, 283.3])
+        self.assertAlmostEqual(response.data['trend_seconds_per_km_per_week'], -10.0, places=1)
+    
+    def test_pace_trend_requires_exercise(self):
+        """Test missing or malformed parameters are rejected"""
+        response = self.client.get(reverse('cardio-pace-trend'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('cardio-pace-trend'), {'exercise': str(self.run.id), 'window': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -10,4 +10,8 @@ urlpatterns = [
     path('dashboard/today/', views.DashboardView.as_view(), name='dashboard-today'),
     path('summary/daily/', views.DailySummaryView.as_view(), name='daily-summary'),
     path('summary/', views.SummaryView.as_view(), name='summary'),
+    path('insights/', views.InsightsView.as_view(), name='insights'),
+    path('activity-patterns/', views.ActivityPatternsView.as_view(), name='activity-patterns'),
+    path('cardio/', views.CardioReportView.as_view(), name='cardio-report'),
+    path('cardio/pace-trend/', views.CardioPaceTrendView.as_view(), name='cardio-pace-trend'),
 ]
@@ -4,9 +4,12 @@ from rest_framework.views import APIView
 from django.db.models import Sum, Avg
 from django.utils import timezone
 from datetime import datetime, timedelta
+import uuid
 
 from .models import DailySummary
 from .serializers import DailySummarySerializer, DashboardTodaySerializer, WeeklySummarySerializer
+from .analytics import InsightsAnalytics, CardioAnalytics
+from .business_logic import ActivityHistogramBusinessLogic
 
 
 class DailySummaryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -34,6 +37,10 @@ class DashboardView(APIView):
             habit__in=habits, date=today
         )
         
+        # Include check-ins still queued for write-behind (read-your-writes)
+        from apps.habits.business_logic import HabitBusinessLogic
+        pending_ids = HabitBusinessLogic.pending_check_habit_ids(user, today)
+        
         # Build habits list with completion status
         habits_data = []
         for habit in habits:
@@ -41,7 +48,7 @@ class DashboardView(APIView):
             habits_data.append({
                 'id': str(habit.id),
                 'name': habit.name,
-                'completed': habit_check.completed if habit_check else False
+                'completed': (habit_check.completed if habit_check else False) or habit.id in pending_ids
             })
         
         # Get today's meditation total
@@ -49,45 +56,24 @@ class DashboardView(APIView):
         meditation_logs = MeditationLog.objects.filter(user=user, date=today)
         meditation_minutes = sum(log.duration_minutes for log in meditation_logs)
         
+        # Current week's goal progress from the maintained counter
+        from apps.meditations.business_logic import MeditationBusinessLogic
+        meditation_week = MeditationBusinessLogic.get_current_week_progress(user, today)
+        
         # Get today's workout volume
-        from apps.workouts.models import WorkoutSession, WorkoutSet
-        workouts = WorkoutSession.objects.filter(user=user, date=today)
-        workout_volume = 0
-        for session in workouts:
-            for set_obj in session.sets.all():
-                if set_obj.reps and set_obj.weight_kg:
-                    workout_volume += float(set_obj.reps * set_obj.weight_kg)
-        
-        # Get today's nutrition totals
-        from apps.nutrition.models import Meal, MealItem
-        meals = Meal.objects.filter(user=user, date=today)
-        
-        total_calories = 0
-        total_protein = 0
-        total_carbs = 0
-        total_fat = 0
-        
-        for meal in meals:
-            for item in meal.items.all():
-                if item.custom_calories:
-                    total_calories += item.custom_calories
-                else:
-                    total_calories += int(item.quantity * item.food.calories)
-                
-                if item.custom_protein_g:
-                    total_protein += float(item.custom_protein_g)
-                else:
-                    total_protein += float(item.quantity * item.food.protein_g)
-                
-                if item.custom_carbs_g:
-                    total_carbs += float(item.custom_carbs_g)
-                else:
-                    total_carbs += float(item.quantity * item.food.carbs_g)
-                
-                if item.custom_fat_g:
-                    total_fat += float(item.custom_fat_g)
-                else:
-                    total_fat += float(item.quantity * item.food.fat_g)
+        from apps.workouts.models import WorkoutSession
+        workout_volume = float(WorkoutSession.objects.filter(
+            user=user, date=today
+        ).aggregate(volume=Sum('total_volume_kg'))['volume'] or 0)
+        
+        # Get today's nutrition totals in one grouped query over the maintained meal totals
+        from apps.nutrition.aggregation import NutritionAggregation
+        from apps.nutrition.fixed_point import rounded
+        nutrition = NutritionAggregation.day_totals(user.id, today)
+        total_calories = nutrition['calories']
+        total_protein = rounded(nutrition['protein_g'], places=1)
+        total_carbs = rounded(nutrition['carbs_g'], places=1)
+        total_fat = rounded(nutrition['fat_g'], places=1)
         
         # Get user targets
         profile = user.profile
@@ -96,12 +82,13 @@ class DashboardView(APIView):
             'date': today.isoformat(),
             'habits': habits_data,
             'meditation_min': meditation_minutes,
+            'meditation_week': meditation_week,
             'workout_volume': workout_volume,
             'nutrition': {
                 'kcal': total_calories,
-                'protein_g': round(total_protein, 1),
-                'carbs_g': round(total_carbs, 1),
-                'fat_g': round(total_fat, 1),
+                'protein_g': float(total_protein),
+                'carbs_g': float(total_carbs),
+                'fat_g': float(total_fat),
                 'targets': {
                     'kcal': profile.calorie_target,
                     'protein_g': profile.protein_target,
@@ -221,3 +208,69 @@ class SummaryView(APIView):
                 'average_daily_fat': float(summaries.aggregate(Avg('fat_g'))['fat_g__avg'] or 0)
             }
         })
+
+
+class InsightsView(APIView):
+    """Habit-outcome correlation insights"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        """GET /api/reports/insights - Cached, precomputed nightly"""
+        return Response(InsightsAnalytics.get_insights(request.user))
+
+
+class ActivityPatternsView(APIView):
+    """Time-of-day activity patterns"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        """GET /api/reports/activity-patterns - Weekday x hour counters in local time"""
+        return Response(ActivityHistogramBusinessLogic.get_histograms(request.user))
+
+
+class CardioReportView(APIView):
+    """Cardio distance, duration and pace rollups"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        """GET /api/reports/cardio?start=YYYY-MM-DD&end=YYYY-MM-DD&exercise=<id>"""
+        today = timezone.now().date()
+        try:
+            end_date = request.query_params.get('end')
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else today
+            start_date = request.query_params.get('start')
+            start_date = (
+                datetime.strptime(start_date, '%Y-%m-%d').date() if start_date
+                else end_date - timedelta(days=27)
+            )
+        except ValueError:
+            return Response({'error': 'Invalid date format'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        exercise_id = request.query_params.get('exercise')
+        if exercise_id:
+            try:
+                exercise_id = uuid.UUID(exercise_id)
+            except ValueError:
+                return Response({'error': 'Invalid exercise id'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(CardioAnalytics.get_report(request.user, start_date, end_date, exercise_id))
+
+
+class CardioPaceTrendView(APIView):
+    """Pace trend for one cardio exercise"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        """GET /api/reports/cardio/pace-trend?exercise=<id>&window=5"""
+        try:
+            exercise_id = uuid.UUID(request.query_params.get('exercise', ''))
+        except ValueError:
+            return Response({'error': 'exercise id required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            window = int(request.query_params.get('window', 5))
+        except ValueError:
+            return Response({'error': 'window must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if window < 1:
+            return Response({'error': 'window must be at least 1'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(CardioAnalytics.pace_trend(request.user, exercise_id, window))
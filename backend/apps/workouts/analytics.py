@@ -0,0 +1,281 @@
+"""
+Vectorised strength progression series per exercise
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum, F, ExpressionWrapper, DecimalField
+from django.utils import timezone
+from datetime import date, timedelta
+import numpy as np
+
+from apps.common.cache_versions import bump_version, get_version
+from .models import WorkoutSet, WorkoutSession
+
+PROGRESSION_CACHE_TIMEOUT = getattr(settings, 'PROGRESSION_CACHE_TIMEOUT', 24 * 60 * 60)
+TREND_WINDOW = 5  # Sessions in the smoothed trend
+
+TRAINING_LOAD_CACHE_TIMEOUT = getattr(settings, 'TRAINING_LOAD_CACHE_TIMEOUT', 36 * 60 * 60)
+TRAINING_LOAD_DAYS = 90  # Default window returned and cached
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+EWMA_BLOCK = 128        # Days per vectorised EWMA block; keeps decay powers in float range
+LOAD_CATEGORIES = ['push', 'pull', 'legs', 'core', 'cardio']  # cardio load is minutes, others kg volume
+RATIO_HIGH = 1.5        # Above this the recent spike is a warning
+RATIO_LOW = 0.8
+
+
+class WorkoutAnalytics:
+    """Estimated 1RM curves over a user's sets for one exercise"""
+    
+    @staticmethod
+    def load_sets(user, exercise):
+        """Session ordinal, date ordinal, weight and reps arrays in chronological order"""
+        rows = list(WorkoutSet.objects.filter(
+            session__user=user,
+            exercise=exercise,
+            weight_kg__gt=0,
+            reps__gt=0
+        ).order_by(
+            'session__date', 'session__start_time', 'session_id'
+        ).values_list('session_id', 'session__date', 'weight_kg', 'reps'))
+        
+        if not rows:
+            empty = np.empty(0)
+            return empty.astype(int), empty.astype(int), empty, empty
+        
+        session_ids = [row[0] for row in rows]
+        # Rows are grouped by session, so a new session starts where the id changes
+        new_session = np.array([True] + [a != b for a, b in zip(session_ids, session_ids[1:])])
+        sessions = np.cumsum(new_session) - 1
+        dates = np.array([row[1].toordinal() for row in rows])
+        weights = np.array([row[2] for row in rows], dtype=float)
+        reps = np.array([row[3] for row in rows], dtype=float)
+        return sessions, dates, weights, reps
+    
+    @staticmethod
+    def compute_progression(user, exercise, window=TREND_WINDOW):
+        """Best e1RM per session, running max, weekly change and moving-average trend"""
+        sessions, dates, weights, reps = WorkoutAnalytics.load_sets(user, exercise)
+        payload = {
+            'exercise': str(exercise.id),
+            'name': exercise.name,
+            'window': window,
+            'dates': [],
+            'e1rm': [],
+            'rolling_max': [],
+            'trend': [],
+            'weeks': {'week_start': [], 'best_e1rm': [], 'change_pct': []},
+            'computed_at': timezone.now().isoformat(),
+        }
+        if not len(sessions):
+            return payload
+        
+        # Epley per set, then the best set of each session
+        e1rm = weights * (1 + reps / 30)
+        starts = np.flatnonzero(np.r_[True, np.diff(sessions) != 0])
+        session_best = np.maximum.reduceat(e1rm, starts)
+        session_dates = dates[starts]
+        
+        rolling_max = np.maximum.accumulate(session_best)
+        
+        # Moving average over the last `window` sessions, expanding at the start
+        cumulative = np.cumsum(np.r_[0.0, session_best])
+        index = np.arange(1, len(session_best) + 1)
+        lower = np.maximum(index - window, 0)
+        trend = (cumulative[index] - cumulative[lower]) / (index - lower)
+        
+        # Best per ISO week (Monday ordinal) and change against the previous trained week
+        weeks = session_dates - (session_dates - 1) % 7
+        week_starts = np.flatnonzero(np.r_[True, np.diff(weeks) != 0])
+        weekly_best = np.maximum.reduceat(session_best, week_starts)
+        change = np.full(len(weekly_best), np.nan)
+        change[1:] = (weekly_best[1:] - weekly_best[:-1]) / weekly_best[:-1] * 100
+        
+        payload.update({
+            'dates': [date.fromordinal(int(day)).isoformat() for day in session_dates],
+            'e1rm': np.round(session_best, 2).tolist(),
+            'rolling_max': np.round(rolling_max, 2).tolist(),
+            'trend': np.round(trend, 2).tolist(),
+            'weeks': {
+                'week_start': [date.fromordinal(int(day)).isoformat() for day in weeks[week_starts]],
+                'best_e1rm': np.round(weekly_best, 2).tolist(),
+                'change_pct': [None if np.isnan(value) else round(float(value), 1) for value in change],
+            },
+        })
+        return payload
+    
+    @staticmethod
+    def version_key(user_id, exercise_id):
+        return f'workouts:progression-version:{user_id}:{exercise_id}'
+    
+    @staticmethod
+    def invalidate(user_id, exercise_id):
+        """Bump the (user, exercise) version so cached series are no longer read"""
+        bump_version(WorkoutAnalytics.version_key(user_id, exercise_id))
+    
+    @staticmethod
+    def get_progression(user, exercise, window=TREND_WINDOW):
+        """Cached progression, valid until the next set write for the exercise"""
+        version = get_version(WorkoutAnalytics.version_key(user.id, exercise.id))
+        key = f'workouts:progression:{user.id}:{exercise.id}:{version}:{window}'
+        progression = cache.get(key)
+        if progression is None:
+            progression = WorkoutAnalytics.compute_progression(user, exercise, window)
+            cache.set(key, progression, PROGRESSION_CACHE_TIMEOUT)
+        return progression
+
+
+class TrainingLoadAnalytics:
+    """Acute:chronic workload ratio per exercise category"""
+    
+    @staticmethod
+    def build_daily_loads(user, today=None):
+        """(days x LOAD_CATEGORIES) daily load matrix from the first workout to today"""
+        today = today or timezone.now().date()
+        rows = list(WorkoutSet.objects.filter(
+            session__user=user,
+            session__date__lte=today,
+            exercise__category__in=LOAD_CATEGORIES
+        ).values('session__date', 'exercise__category').annotate(
+            volume=Sum(ExpressionWrapper(
+                F('weight_kg') * F('reps'), output_field=DecimalField(max_digits=12, decimal_places=2)
+            )),
+            seconds=Sum('duration_seconds')
+        ).values_list('session__date', 'exercise__category', 'volume', 'seconds'))
+        
+        if not rows:
+            return np.zeros((0, len(LOAD_CATEGORIES))), None
+        
+        first = min(row[0] for row in rows)
+        days = (today - first).days + 1
+        loads = np.zeros((days, len(LOAD_CATEGORIES)))
+        column = {name: index for index, name in enumerate(LOAD_CATEGORIES)}
+        
+        index = np.array([(row[0] - first).days for row in rows])
+        columns = np.array([column[row[1]] for row in rows])
+        values = np.array([
+            (row[3] or 0) / 60 if row[1] == 'cardio' else float(row[2] or 0)
+            for row in rows
+        ])
+        np.add.at(loads, (index, columns), values)
+        return loads, first
+    
+    @staticmethod
+    def ewma(loads, span, block=EWMA_BLOCK):
+        """
+        Exponentially weighted load along axis 0, starting from zero.
+        Within a block y_t = d^(t+1) y_prev + a d^t cumsum(x_j / d^j), so each
+        block is a cumsum; only the carried state crosses block boundaries.
+        """
+        alpha = 2 / (span + 1)
+        decay = 1 - alpha
+        out = np.empty_like(loads, dtype=float)
+        state = np.zeros(loads.shape[1])
+        
+        for start in range(0, len(loads), block):
+            chunk = loads[start:start + block]
+            steps = np.arange(len(chunk))
+            powers = decay ** steps
+            scaled = np.cumsum(chunk / powers[:, None], axis=0)
+            out[start:start + block] = (
+                (decay ** (steps + 1))[:, None] * state + alpha * powers[:, None] * scaled
+            )
+            state = out[start + len(chunk) - 1]
+        return out
+    
+    @staticmethod
+    def compute_training_load(user, days=TRAINING_LOAD_DAYS, today=None):
+        """Acute and chronic EWMA loads and their ratio, last `days` days, columnar"""
+        today = today or timezone.now().date()
+        loads, first = TrainingLoadAnalytics.build_daily_loads(user, today)
+        payload = {
+            'categories': LOAD_CATEGORIES,
+            'acute_days': ACUTE_DAYS,
+            'chronic_days': CHRONIC_DAYS,
+            'dates': [],
+            'acute': {},
+            'chronic': {},
+            'ratio': {},
+            'latest': {},
+            'computed_at': timezone.now().isoformat(),
+        }
+        if first is None:
+            return payload
+        
+        acute = TrainingLoadAnalytics.ewma(loads, ACUTE_DAYS)
+        chronic = TrainingLoadAnalytics.ewma(loads, CHRONIC_DAYS)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(chronic > 0, acute / chronic, np.nan)
+        
+        window = slice(max(len(loads) - days, 0), None)
+        start = first + timedelta(days=window.start)
+        payload['dates'] = [(start + timedelta(days=offset)).isoformat() for offset in range(len(loads) - window.start)]
+        
+        def column(values):
+            return [None if np.isnan(value) else round(float(value), 2) for value in values]
+        
+        for index, category in enumerate(LOAD_CATEGORIES):
+            payload['acute'][category] = column(acute[window, index])
+            payload['chronic'][category] = column(chronic[window, index])
+            payload['ratio'][category] = column(ratio[window, index])
+            latest = ratio[-1, index]
+            if np.isnan(latest):
+                status = None
+            elif latest > RATIO_HIGH:
+                status = 'spike'
+            elif latest < RATIO_LOW:
+                status = 'detraining'
+            else:
+                status = 'optimal'
+            payload['latest'][category] = {
+                'acute': round(float(acute[-1, index]), 2),
+                'chronic': round(float(chronic[-1, index]), 2),
+                'ratio': None if np.isnan(latest) else round(float(latest), 2),
+                'status': status,
+            }
+        return payload
+    
+    @staticmethod
+    def cache_key(user_id):
+        return f'workouts:training-load:{user_id}'
+    
+    @staticmethod
+    def invalidate(user_id):
+        cache.delete(TrainingLoadAnalytics.cache_key(user_id))
+    
+    @staticmethod
+    def get_training_load(user, days=TRAINING_LOAD_DAYS):
+        """Training load for the default window from cache, dropped on set writes"""
+        if days != TRAINING_LOAD_DAYS:
+            return TrainingLoadAnalytics.compute_training_load(user, days)
+        
+        key = TrainingLoadAnalytics.cache_key(user.id)
+        training_load = cache.get(key)
+        # Stale once the day rolls over, since loads decay daily
+        if training_load is None or training_load['computed_at'][:10] != timezone.now().date().isoformat():
+            training_load = TrainingLoadAnalytics.compute_training_load(user)
+            cache.set(key, training_load, TRAINING_LOAD_CACHE_TIMEOUT)
+        return training_load
+    
+    @staticmethod
+    def active_user_ids(today=None):
+        """Users with a workout in the chronic window"""
+        today = today or timezone.now().date()
+        return list(WorkoutSession.objects.filter(
+            date__gte=today - timedelta(days=CHRONIC_DAYS)
+        ).values_list('user_id', flat=True).distinct().order_by('user_id'))
+    
+    @staticmethod
+    def precompute_training_loads(user_ids):
+        """Batch mode: compute and cache the default window for many users"""
+        from django.contrib.auth.models import User
+        
+        computed = 0
+        for user in User.objects.filter(id__in=user_ids).iterator():
+            cache.set(
+                TrainingLoadAnalytics.cache_key(user.id),
+                TrainingLoadAnalytics.compute_training_load(user),
+                TRAINING_LOAD_CACHE_TIMEOUT
+            )
+            computed += 1
+        return computed
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class WorkoutsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.workouts'
-
+    
+    def ready(self):
+        """Import signals when app is ready"""
+        import apps.workouts.signals
@@ -1,11 +1,15 @@
 """
 Business logic for workout tracking
 """
-from django.db.models import Q, Max
+from django.db import transaction
+from django.db.models import Q, Max, Sum, Count, F, ExpressionWrapper, DecimalField, OuterRef, Subquery
 from django.utils import timezone
 from datetime import date, timedelta
 from decimal import Decimal
-from .models import Exercise, WorkoutSession, WorkoutSet
+import threading
+from .models import Exercise, WorkoutSession, WorkoutSet, PersonalBest
+
+_session_deletes = threading.local()
 
 
 class WorkoutBusinessLogic:
@@ -17,39 +21,15 @@ class WorkoutBusinessLogic:
         if not weight_kg or not reps:
             return False
         
-        # Get previous best for this exercise
-        previous_best = WorkoutSet.objects.filter(
-            session__user=user,
-            exercise=exercise,
-            weight_kg__isnull=False,
-            reps__isnull=False
-        ).exclude(
-            weight_kg=0
-        ).aggregate(
-            max_weight=Max('weight_kg')
-        )['max_weight']
-        
-        if not previous_best:
-            return True  # First time doing this exercise
-        
-        # Check if this is heavier
-        if weight_kg > previous_best:
-            return True
+        best = PersonalBest.objects.filter(
+            user=user, exercise=exercise
+        ).values_list('best_weight_kg', 'best_reps').first()
         
-        # Check if same weight but more reps
-        if weight_kg == previous_best:
-            previous_best_reps = WorkoutSet.objects.filter(
-                session__user=user,
-                exercise=exercise,
-                weight_kg=weight_kg
-            ).aggregate(
-                max_reps=Max('reps')
-            )['max_reps']
-            
-            if reps > previous_best_reps:
-                return True
+        if not best or not best[0]:
+            return True  # First time doing this exercise
         
-        return False
+        # Heavier, or same weight but more reps
+        return WorkoutBusinessLogic.beats_best(weight_kg, reps, *best)
     
     @staticmethod
     def calculate_1rm(weight_kg, reps):
@@ -58,30 +38,331 @@ class WorkoutBusinessLogic:
             return None
         
         # Epley formula: 1RM = weight * (1 + reps/30)
-        one_rm = weight_kg * (1 + reps / 30)
+        one_rm = Decimal(str(weight_kg)) * (reps + 30) / 30
         return round(one_rm, 2)
     
     @staticmethod
-    def update_workout_prs(session):
+    def record_set_for_personal_best(user_id, set_obj, session_date):
+        """Fold a newly written set into the user's personal best row"""
+        with transaction.atomic():
+            best, _ = PersonalBest.objects.select_for_update().get_or_create(
+                user_id=user_id, exercise_id=set_obj.exercise_id
+            )
+            
+            weight_kg, reps = set_obj.weight_kg, set_obj.reps
+            if weight_kg and reps:
+                if best.best_weight_kg is None or weight_kg > best.best_weight_kg:
+                    best.best_weight_kg, best.best_reps = weight_kg, reps
+                elif weight_kg == best.best_weight_kg and reps > best.best_reps:
+                    best.best_reps = reps
+                
+                one_rm = WorkoutBusinessLogic.calculate_1rm(weight_kg, reps)
+                if best.best_e1rm_kg is None or one_rm > best.best_e1rm_kg:
+                    best.best_e1rm_kg = one_rm
+                best.total_volume_kg += weight_kg * reps
+            
+            # First set of this exercise in the session counts the session
+            if not WorkoutSet.objects.filter(
+                session_id=set_obj.session_id, exercise_id=set_obj.exercise_id
+            ).exclude(pk=set_obj.pk).exists():
+                best.session_count += 1
+            if best.last_performed is None or session_date > best.last_performed:
+                best.last_performed = session_date
+            
+            best.save()
+        return best
+    
+    @staticmethod
+    def recompute_personal_best(user_id, exercise_id):
+        """Recompute a personal best row from the user's sets, e.g. after an edit or delete"""
+        sets = WorkoutSet.objects.filter(session__user_id=user_id, exercise_id=exercise_id)
+        lifts = sets.filter(weight_kg__gt=0, reps__gt=0)
+        
+        totals = sets.aggregate(
+            session_count=Count('session', distinct=True),
+            last_performed=Max('session__date'),
+        )
+        lift_totals = lifts.aggregate(
+            total_volume_kg=Sum(ExpressionWrapper(
+                F('weight_kg') * F('reps'), output_field=DecimalField(max_digits=12, decimal_places=2)
+            )),
+            # Epley scaled by 30 so it stays in exact decimal arithmetic
+            e1rm_x30=Max(ExpressionWrapper(
+                F('weight_kg') * (F('reps') + 30), output_field=DecimalField(max_digits=12, decimal_places=2)
+            )),
+        )
+        top = lifts.order_by('-weight_kg', '-reps').values_list('weight_kg', 'reps').first()
+        
+        if not totals['session_count']:
+            PersonalBest.objects.filter(user_id=user_id, exercise_id=exercise_id).delete()
+            return None
+        
+        e1rm_x30 = lift_totals['e1rm_x30']
+        best, _ = PersonalBest.objects.update_or_create(
+            user_id=user_id,
+            exercise_id=exercise_id,
+            defaults={
+                'best_weight_kg': top[0] if top else None,
+                'best_reps': top[1] if top else None,
+                'best_e1rm_kg': round(Decimal(str(e1rm_x30)) / 30, 2) if e1rm_x30 is not None else None,
+                'total_volume_kg': lift_totals['total_volume_kg'] or 0,
+                'session_count': totals['session_count'],
+                'last_performed': totals['last_performed'],
+            }
+        )
+        return best
+    
+    @staticmethod
+    def rebuild_personal_bests(user_ids=None):
+        """Recompute personal best rows from grouped queries and swap them in atomically"""
+        sets = WorkoutSet.objects.all()
+        if user_ids is not None:
+            sets = sets.filter(session__user_id__in=user_ids)
+        lift = Q(weight_kg__gt=0, reps__gt=0)
+        
+        totals = sets.values('session__user_id', 'exercise_id').annotate(
+            session_count=Count('session', distinct=True),
+            last_performed=Max('session__date'),
+            total_volume_kg=Sum(ExpressionWrapper(
+                F('weight_kg') * F('reps'), output_field=DecimalField(max_digits=12, decimal_places=2)
+            ), filter=lift),
+            # Epley scaled by 30 so it stays in exact decimal arithmetic
+            e1rm_x30=Max(ExpressionWrapper(
+                F('weight_kg') * (F('reps') + 30), output_field=DecimalField(max_digits=12, decimal_places=2)
+            ), filter=lift),
+        ).order_by()
+        
+        # Most reps at each distinct weight; the heaviest weight per pair is the best
+        tops = {}
+        for user_id, exercise_id, weight_kg, reps in sets.filter(lift).values(
+            'session__user_id', 'exercise_id', 'weight_kg'
+        ).annotate(reps=Max('reps')).order_by().values_list('session__user_id', 'exercise_id', 'weight_kg', 'reps'):
+            top = tops.get((user_id, exercise_id))
+            if top is None or weight_kg > top[0]:
+                tops[(user_id, exercise_id)] = (weight_kg, reps)
+        
+        bests = []
+        for row in totals:
+            top = tops.get((row['session__user_id'], row['exercise_id']))
+            e1rm_x30 = row['e1rm_x30']
+            bests.append(PersonalBest(
+                user_id=row['session__user_id'],
+                exercise_id=row['exercise_id'],
+                best_weight_kg=top[0] if top else None,
+                best_reps=top[1] if top else None,
+                best_e1rm_kg=round(Decimal(str(e1rm_x30)) / 30, 2) if e1rm_x30 is not None else None,
+                total_volume_kg=row['total_volume_kg'] or 0,
+                session_count=row['session_count'],
+                last_performed=row['last_performed'],
+            ))
+        
+        # Concurrent set writes see either the old or the new rows, never an empty table
+        with transaction.atomic():
+            stale = PersonalBest.objects.all()
+            if user_ids is not None:
+                stale = stale.filter(user_id__in=user_ids)
+            stale.delete()
+            PersonalBest.objects.bulk_create(bests)
+        return len(bests)
+    
+    @staticmethod
+    def beats_best(weight_kg, reps, best_weight_kg, best_reps):
+        """Heavier than the best, or more reps at the best weight"""
+        if not weight_kg or not reps:
+            return False
+        if not best_weight_kg:
+            return True
+        return weight_kg > best_weight_kg or (weight_kg == best_weight_kg and reps > best_reps)
+    
+    @staticmethod
+    def update_workout_prs(session, recalculate_summary=True):
         """Update PR flags for all sets in a workout session"""
-        for set_obj in session.sets.all():
-            if set_obj.weight_kg and set_obj.reps:
-                is_pr = WorkoutBusinessLogic.detect_pr(
-                    session.user, 
-                    set_obj.exercise, 
-                    set_obj.weight_kg, 
-                    set_obj.reps
+        from apps.reports.business_logic import DailySummaryBusinessLogic
+        
+        sets = sorted(session.sets.all(), key=lambda set_obj: (set_obj.set_number, set_obj.created_at))
+        if not sets:
+            return []
+        
+        # Prior best per exercise from chronologically earlier sessions, one query
+        earlier = WorkoutSet.objects.filter(
+            Q(session__date__lt=session.date) |
+            Q(session__date=session.date, session__start_time__lt=session.start_time),
+            session__user_id=session.user_id,
+            exercise=OuterRef('pk'),
+            weight_kg__gt=0,
+            reps__gt=0
+        ).order_by('-weight_kg', '-reps')
+        bests = {
+            exercise_id: [weight_kg, reps]
+            for exercise_id, weight_kg, reps in Exercise.objects.filter(
+                id__in={set_obj.exercise_id for set_obj in sets}
+            ).annotate(
+                prior_weight_kg=Subquery(earlier.values('weight_kg')[:1]),
+                prior_reps=Subquery(earlier.values('reps')[:1])
+            ).values_list('id', 'prior_weight_kg', 'prior_reps')
+        }
+        
+        # Walk sets in order so a PR raises the bar for later sets
+        changed = []
+        for set_obj in sets:
+            best = bests[set_obj.exercise_id]
+            is_pr = WorkoutBusinessLogic.beats_best(set_obj.weight_kg, set_obj.reps, *best)
+            if is_pr:
+                best[:] = [set_obj.weight_kg, set_obj.reps]
+            if is_pr != set_obj.is_pr:
+                set_obj.is_pr = is_pr
+                changed.append(set_obj)
+        
+        if changed:
+            WorkoutSet.objects.bulk_update(changed, ['is_pr'])
+            if recalculate_summary:
+                DailySummaryBusinessLogic.recalculate_daily_summary(session.user, session.date)
+        return changed
+    
+    @staticmethod
+    def log_sets_bulk(session, items):
+        """
+        Insert validated sets for a session with one bulk_create, then run the
+        follow-up work once for the batch: session totals, PR pass, personal
+        bests, progression cache and daily summary.
+        """
+        from apps.reports.business_logic import DailySummaryBusinessLogic
+        from .analytics import WorkoutAnalytics, TrainingLoadAnalytics
+        
+        sets = [WorkoutSet(session=session, **item) for item in items]
+        exercise_ids = {set_obj.exercise_id for set_obj in sets}
+        
+        with transaction.atomic():
+            WorkoutSet.objects.bulk_create(sets)
+            
+            # bulk_create skips signals, so apply the batch's totals in one UPDATE
+            totals = {}
+            for set_obj in sets:
+                contribution = WorkoutBusinessLogic.set_contribution(
+                    set_obj.weight_kg, set_obj.reps, set_obj.duration_seconds, set_obj.distance_km
                 )
-                if is_pr != set_obj.is_pr:
-                    set_obj.is_pr = is_pr
-                    set_obj.save()
+                for field, value in contribution.items():
+                    totals[field] = totals.get(field, 0) + value
+            WorkoutBusinessLogic.apply_session_totals(session.id, totals)
+            
+            WorkoutBusinessLogic.update_workout_prs(session, recalculate_summary=False)
+            for exercise_id in exercise_ids:
+                WorkoutBusinessLogic.recompute_personal_best(session.user_id, exercise_id)
+            
+            DailySummaryBusinessLogic.recalculate_daily_summary(session.user, session.date)
+        
+        for exercise_id in exercise_ids:
+            WorkoutAnalytics.invalidate(session.user_id, exercise_id)
+        TrainingLoadAnalytics.invalidate(session.user_id)
+        
+        return WorkoutSet.objects.filter(
+            id__in=[set_obj.id for set_obj in sets]
+        ).select_related('exercise').order_by('set_number', 'exercise__name')
+    
+    @staticmethod
+    def replay_prs(user_id, exercise_id, recalculate_summaries=True):
+        """
+        Recompute is_pr flags for one exercise in a single chronological pass.
+        Only rows whose flag changed are written. Returns the dates touched.
+        """
+        from apps.reports.business_logic import DailySummaryBusinessLogic
+        
+        sets = WorkoutSet.objects.filter(
+            session__user_id=user_id, exercise_id=exercise_id
+        ).order_by(
+            'session__date', 'session__start_time', 'set_number', 'created_at'
+        ).values_list('id', 'session__date', 'weight_kg', 'reps', 'is_pr')
+        
+        best_weight_kg, best_reps = None, None
+        flagged, unflagged, dates = [], [], set()
+        for set_id, session_date, weight_kg, reps, was_pr in sets.iterator(chunk_size=2000):
+            is_pr = WorkoutBusinessLogic.beats_best(weight_kg, reps, best_weight_kg, best_reps)
+            if is_pr:
+                best_weight_kg, best_reps = weight_kg, reps
+            if is_pr != was_pr:
+                (flagged if is_pr else unflagged).append(set_id)
+                dates.add(session_date)
+        
+        if flagged:
+            WorkoutSet.objects.filter(id__in=flagged).update(is_pr=True)
+        if unflagged:
+            WorkoutSet.objects.filter(id__in=unflagged).update(is_pr=False)
+        
+        if recalculate_summaries and dates:
+            from django.contrib.auth.models import User
+            user = User.objects.get(pk=user_id)
+            for day in sorted(dates):
+                DailySummaryBusinessLogic.recalculate_daily_summary(user, day)
+        return dates
+    
+    @staticmethod
+    def replay_pr_pairs(pairs):
+        """Replay a batch of (user_id, exercise_id) pairs; returns the number of dates touched"""
+        touched = 0
+        for user_id, exercise_id in pairs:
+            touched += len(WorkoutBusinessLogic.replay_prs(user_id, exercise_id))
+        return touched
     
     @staticmethod
     def get_workout_volume(session):
         """Calculate total volume for a workout session"""
-        total_volume = Decimal('0')
-        for set_obj in session.sets.all():
-            if set_obj.weight_kg and set_obj.reps:
-                total_volume += set_obj.weight_kg * set_obj.reps
-        return total_volume
-
+        return session.total_volume_kg
+    
+    @staticmethod
+    def sessions_being_deleted():
+        """
+        Session id -> exercise ids of its sets, for sessions this thread is deleting;
+        their cascaded set deletes skip per-set upkeep, which runs once per exercise
+        after the session row is gone
+        """
+        if not hasattr(_session_deletes, 'sessions'):
+            _session_deletes.sessions = {}
+        return _session_deletes.sessions
+    
+    @staticmethod
+    def set_contribution(weight_kg, reps, duration_seconds, distance_km):
+        """What one set adds to its session totals"""
+        return {
+            'set_count': 1,
+            'total_volume_kg': weight_kg * reps if weight_kg and reps else Decimal('0'),
+            'total_reps': reps or 0,
+            'total_duration_seconds': duration_seconds or 0,
+            'total_distance_km': distance_km or Decimal('0'),
+        }
+    
+    @staticmethod
+    def apply_session_totals(session_id, contribution, sign=1):
+        """Add (sign=1) or remove (sign=-1) a set's contribution with one atomic UPDATE"""
+        WorkoutSession.objects.filter(pk=session_id).update(**{
+            field: F(field) + value if sign > 0 else F(field) - value
+            for field, value in contribution.items()
+        })
+    
+    @staticmethod
+    def rebuild_session_totals(session_ids=None):
+        """Recompute session totals from sets with one grouped query"""
+        sessions = WorkoutSession.objects.all()
+        if session_ids is not None:
+            sessions = sessions.filter(pk__in=session_ids)
+        
+        rebuilt = []
+        for session in sessions.annotate(
+            computed_set_count=Count('sets'),
+            computed_volume_kg=Sum(ExpressionWrapper(
+                F('sets__weight_kg') * F('sets__reps'), output_field=DecimalField(max_digits=12, decimal_places=2)
+            )),
+            computed_reps=Sum('sets__reps'),
+            computed_duration_seconds=Sum('sets__duration_seconds'),
+            computed_distance_km=Sum('sets__distance_km'),
+        ).iterator():
+            session.set_count = session.computed_set_count
+            session.total_volume_kg = session.computed_volume_kg or 0
+            session.total_reps = session.computed_reps or 0
+            session.total_duration_seconds = session.computed_duration_seconds or 0
+            session.total_distance_km = session.computed_distance_km or 0
+            rebuilt.append(session)
+        
+        WorkoutSession.objects.bulk_update(rebuilt, [
+            'set_count', 'total_volume_kg', 'total_reps', 'total_duration_seconds', 'total_distance_km'
+        ], batch_size=500)
+        return len(rebuilt)
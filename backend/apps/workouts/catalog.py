@@ -0,0 +1,101 @@
+"""
+Process-local exercise catalog with a per-user custom overlay
+"""
+from django.conf import settings
+from django.core.cache import cache
+import threading
+import time
+import uuid
+
+from apps.common.cache_versions import bump_version, get_version
+from .models import Exercise
+
+SYSTEM_VERSION_KEY = 'workouts:exercise-catalog-version'
+USER_CACHE_TIMEOUT = getattr(settings, 'EXERCISE_CATALOG_USER_TIMEOUT', 60 * 60)
+# How long a worker trusts its loaded library before re-reading the shared version
+VERSION_CHECK_SECONDS = getattr(settings, 'EXERCISE_CATALOG_CHECK_SECONDS', 5)
+
+_lock = threading.Lock()
+_system = {'version': None, 'checked_at': 0.0, 'by_id': {}}
+
+
+class ExerciseCatalog:
+    """System exercises loaded once per worker, custom exercises cached per user"""
+    
+    @staticmethod
+    def system_exercises():
+        """id -> Exercise for the system library, reloaded only when the version moves"""
+        now = time.monotonic()
+        if now - _system['checked_at'] < VERSION_CHECK_SECONDS and _system['version'] is not None:
+            return _system['by_id']
+        
+        version = get_version(SYSTEM_VERSION_KEY)
+        if version != _system['version']:
+            with _lock:
+                if version != _system['version']:
+                    _system['by_id'] = {
+                        exercise.id: exercise
+                        for exercise in Exercise.objects.filter(is_custom=False)
+                    }
+                    _system['version'] = version
+        _system['checked_at'] = now
+        return _system['by_id']
+    
+    @staticmethod
+    def user_cache_key(user_id):
+        return f'workouts:custom-exercises:{user_id}'
+    
+    @staticmethod
+    def custom_exercises(user_id):
+        """id -> Exercise for a user's custom exercises"""
+        if not user_id:
+            return {}
+        key = ExerciseCatalog.user_cache_key(user_id)
+        exercises = cache.get(key)
+        if exercises is None:
+            exercises = {
+                exercise.id: exercise
+                for exercise in Exercise.objects.filter(is_custom=True, created_by_id=user_id)
+            }
+            cache.set(key, exercises, USER_CACHE_TIMEOUT)
+        return exercises
+    
+    @staticmethod
+    def get(exercise_id, user_id=None):
+        """A system exercise or one of the user's custom exercises, else None"""
+        if not isinstance(exercise_id, uuid.UUID):
+            try:
+                exercise_id = uuid.UUID(str(exercise_id))
+            except ValueError:
+                return None
+        exercise = ExerciseCatalog.system_exercises().get(exercise_id)
+        if exercise is None:
+            exercise = ExerciseCatalog.custom_exercises(user_id).get(exercise_id)
+        return exercise
+    
+    @staticmethod
+    def resolve_many(exercise_ids, user_id=None):
+        """id -> Exercise for every visible id in exercise_ids"""
+        resolved = {}
+        for exercise_id in exercise_ids:
+            exercise = ExerciseCatalog.get(exercise_id, user_id)
+            if exercise is not None:
+                resolved[exercise.id] = exercise
+        return resolved
+    
+    @staticmethod
+    def visible(user_id):
+        """System plus the user's custom exercises, ordered by name"""
+        exercises = list(ExerciseCatalog.system_exercises().values())
+        exercises.extend(ExerciseCatalog.custom_exercises(user_id).values())
+        return sorted(exercises, key=lambda exercise: (exercise.name.lower(), str(exercise.id)))
+    
+    @staticmethod
+    def invalidate(exercise):
+        """Drop cached data after an exercise is created/updated/deleted"""
+        if exercise.is_custom:
+            cache.delete(ExerciseCatalog.user_cache_key(exercise.created_by_id))
+            return
+        # Every worker sees the new version on its next check
+        bump_version(SYSTEM_VERSION_KEY)
+        _system['checked_at'] = 0.0
@@ -0,0 +1,41 @@
+"""
+Management command to precompute training-load analytics
+"""
+import os
+
+from django.core.management.base import BaseCommand
+from apps.workouts.analytics import TrainingLoadAnalytics
+from apps.workouts.parallel import chunked, run_in_processes
+
+
+def _precompute_chunk(user_ids):
+    # Runs in a worker process; it opens its own database connection
+    return TrainingLoadAnalytics.precompute_training_loads(user_ids)
+
+
+class Command(BaseCommand):
+    help = 'Precompute acute:chronic training load for users active in the last 28 days'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (1 runs in this process)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help='Number of users per chunk'
+        )
+    
+    def handle(self, *args, **options):
+        user_ids = TrainingLoadAnalytics.active_user_ids()
+        computed = sum(run_in_processes(
+            _precompute_chunk, chunked(user_ids, options['chunk_size']), max(options['workers'], 1)
+        ))
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Precomputed training load for {computed} users')
+        )
@@ -0,0 +1,31 @@
+"""
+Management command to rebuild maintained personal bests
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.workouts.business_logic import WorkoutBusinessLogic
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-exercise personal best rows from workout sets'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Specific user ID to rebuild (optional, rebuilds all users if not provided)'
+        )
+    
+    def handle(self, *args, **options):
+        user_id = options.get('user_id')
+        
+        if user_id:
+            if not User.objects.filter(id=user_id).exists():
+                raise CommandError(f'User with ID {user_id} not found')
+            rebuilt = WorkoutBusinessLogic.rebuild_personal_bests([user_id])
+        else:
+            rebuilt = WorkoutBusinessLogic.rebuild_personal_bests()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {rebuilt} personal bests')
+        )
@@ -0,0 +1,34 @@
+"""
+Management command to rebuild denormalized workout session totals
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.workouts.models import WorkoutSession
+from apps.workouts.business_logic import WorkoutBusinessLogic
+
+
+class Command(BaseCommand):
+    help = 'Recompute set count, volume, reps, duration and distance totals on workout sessions'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Specific user ID to rebuild (optional, rebuilds all users if not provided)'
+        )
+    
+    def handle(self, *args, **options):
+        user_id = options.get('user_id')
+        
+        if user_id:
+            if not User.objects.filter(id=user_id).exists():
+                raise CommandError(f'User with ID {user_id} not found')
+            rebuilt = WorkoutBusinessLogic.rebuild_session_totals(
+                WorkoutSession.objects.filter(user_id=user_id).values_list('id', flat=True)
+            )
+        else:
+            rebuilt = WorkoutBusinessLogic.rebuild_session_totals()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {rebuilt} workout sessions')
+        )
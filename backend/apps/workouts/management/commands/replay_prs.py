@@ -0,0 +1,56 @@
+"""
+Management command to replay PR timelines and fix is_pr flags
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.workouts.models import WorkoutSet
+from apps.workouts.business_logic import WorkoutBusinessLogic
+from apps.workouts.parallel import chunked, run_in_processes
+
+
+def _replay_chunk(pairs):
+    # Runs in a worker process; it opens its own database connection
+    return WorkoutBusinessLogic.replay_pr_pairs(pairs)
+
+
+class Command(BaseCommand):
+    help = 'Replay PR flags chronologically for every (user, exercise), in parallel chunks'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Specific user ID to replay (optional, replays all users if not provided)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (1 runs in this process)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help='Number of (user, exercise) pairs per chunk'
+        )
+    
+    def handle(self, *args, **options):
+        user_id = options.get('user_id')
+        workers = max(options['workers'], 1)
+        chunk_size = options['chunk_size']
+        
+        sets = WorkoutSet.objects.all()
+        if user_id:
+            if not User.objects.filter(id=user_id).exists():
+                raise CommandError(f'User with ID {user_id} not found')
+            sets = sets.filter(session__user_id=user_id)
+        
+        pairs = list(sets.values_list('session__user_id', 'exercise_id').distinct().order_by('session__user_id'))
+        touched = sum(run_in_processes(_replay_chunk, chunked(pairs, chunk_size), workers))
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Replayed {len(pairs)} exercise timelines, {touched} days had flags corrected')
+        )
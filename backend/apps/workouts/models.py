@@ -46,6 +46,14 @@ class WorkoutSession(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField(blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
+    
+    # Denormalized totals over sets, maintained by signals
+    set_count = models.PositiveIntegerField(default=0)
+    total_volume_kg = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_reps = models.PositiveIntegerField(default=0)
+    total_duration_seconds = models.PositiveIntegerField(default=0)
+    total_distance_km = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -54,10 +62,23 @@ class WorkoutSession(models.Model):
         indexes = [
             models.Index(fields=['user', 'date']),
             models.Index(fields=['date']),
+            models.Index(fields=['user', 'date', 'start_time', 'id']),
         ]
     
     def __str__(self):
         return f"{self.user.username}: Workout - {self.date}"
+    
+    TOTAL_FIELDS = ('set_count', 'total_volume_kg', 'total_reps', 'total_duration_seconds', 'total_distance_km')
+    
+    def save(self, *args, **kwargs):
+        # Totals move with F() updates from set writes; saving an existing session
+        # must not write back the possibly stale copy loaded with it
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.TOTAL_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
 
 class WorkoutSet(models.Model):
@@ -87,3 +108,23 @@ class WorkoutSet(models.Model):
     def __str__(self):
         return f"{self.exercise.name} - Set {self.set_number}"
 
+
+class PersonalBest(models.Model):
+    """Maintained per-user per-exercise bests, updated as sets are written"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='personal_bests')
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='personal_bests')
+    best_weight_kg = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
+    best_reps = models.PositiveIntegerField(blank=True, null=True)  # Most reps at best_weight_kg
+    best_e1rm_kg = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
+    total_volume_kg = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    session_count = models.PositiveIntegerField(default=0)
+    last_performed = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'personal_bests'
+        unique_together = ['user', 'exercise']
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.exercise.name} PB {self.best_weight_kg}kg x {self.best_reps}"
@@ -0,0 +1,101 @@
+"""
+Keyset pagination for workout history
+"""
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+import binascii
+import uuid
+
+WORKOUT_PAGE_SIZE = getattr(settings, 'WORKOUT_PAGE_SIZE', 20)
+WORKOUT_MAX_PAGE_SIZE = getattr(settings, 'WORKOUT_MAX_PAGE_SIZE', 100)
+
+
+class WorkoutHistoryPagination(BasePagination):
+    """
+    Newest-first pages keyed on (date, start_time, id).
+    
+    The cursor is the key of the last row served and the next page is rows
+    whose (date, start_time, id) sorts below it, served from the
+    workout_sessions(user, date, start_time, id) index whatever the depth,
+    unlike OFFSET which reads and discards every earlier row.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering = ('-date', '-start_time', '-id')
+    
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, WORKOUT_PAGE_SIZE))
+        except ValueError:
+            return WORKOUT_PAGE_SIZE
+        return max(1, min(size, WORKOUT_MAX_PAGE_SIZE))
+    
+    @staticmethod
+    def encode_cursor(session):
+        key = f"{session.date.isoformat()}|{session.start_time.isoformat()}|{session.id}"
+        return urlsafe_b64encode(key.encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            day, start_time, session_id = urlsafe_b64decode(padded.encode()).decode().split('|')
+            key = (parse_date(day), parse_datetime(start_time), uuid.UUID(session_id))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound('Invalid cursor')
+        if None in key:
+            raise NotFound('Invalid cursor')
+        return key
+    
+    @staticmethod
+    def before_key(queryset, key):
+        """Rows strictly before key in the ordering: (date, start_time, id) < key"""
+        day, start_time, session_id = key
+        # The redundant date bound gives the planner a range on the index ahead of the OR
+        return queryset.filter(date__lte=day).filter(
+            Q(date__lt=day) |
+            Q(date=day, start_time__lt=start_time) |
+            Q(date=day, start_time=start_time, id__lt=session_id)
+        )
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = self.before_key(queryset, self.decode_cursor(cursor))
+        
+        # One extra row tells us whether there is a next page without a COUNT
+        page = list(queryset[:page_size + 1])
+        self.has_next = len(page) > page_size
+        self.page = page[:page_size]
+        return self.page
+    
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,26 @@
+"""
+Process-pool helper for batch jobs run from management commands
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+
+
+def chunked(items, chunk_size):
+    """Split a list into consecutive chunks"""
+    return [items[index:index + chunk_size] for index in range(0, len(items), chunk_size)]
+
+
+def run_in_processes(func, chunks, workers):
+    """
+    Map func over chunks in a process pool and return the results in order.
+    func must be a module-level function; workers=1 runs in this process.
+    Not for use inside Celery prefork workers, which cannot start child processes.
+    """
+    if workers <= 1:
+        return [func(chunk) for chunk in chunks]
+    
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, chunks))
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Exercise, WorkoutSession, WorkoutSet
+import uuid
+from .models import Exercise, WorkoutSession, WorkoutSet, PersonalBest
+from .catalog import ExerciseCatalog
 
 
 class ExerciseSerializer(serializers.ModelSerializer):
@@ -14,8 +16,29 @@ class ExerciseSerializer(serializers.ModelSerializer):
         return value.strip()
 
 
+class ExerciseLookupField(serializers.PrimaryKeyRelatedField):
+    """Resolve exercises from a prefetched map in context or the exercise catalog"""
+    
+    def to_internal_value(self, data):
+        try:
+            exercise_id = uuid.UUID(str(data))
+        except ValueError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        
+        exercises = self.context.get('exercises')
+        if exercises is not None:
+            exercise = exercises.get(exercise_id)
+        else:
+            request = self.context.get('request')
+            exercise = ExerciseCatalog.get(exercise_id, request.user.id if request else None)
+        if exercise is None:
+            self.fail('does_not_exist', pk_value=data)
+        return exercise
+
+
 class WorkoutSetSerializer(serializers.ModelSerializer):
-    exercise_name = serializers.CharField(source='exercise.name', read_only=True)
+    exercise = ExerciseLookupField(queryset=Exercise.objects.all())
+    exercise_name = serializers.SerializerMethodField()
     
     class Meta:
         model = WorkoutSet
@@ -39,29 +62,46 @@ class WorkoutSetSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Non-cardio exercises should not have duration or distance")
         
         return data
+    
+    def get_exercise_name(self, obj):
+        if WorkoutSet._meta.get_field('exercise').is_cached(obj):
+            return obj.exercise.name
+        request = self.context.get('request')
+        exercise = ExerciseCatalog.get(obj.exercise_id, request.user.id if request else None)
+        return exercise.name if exercise else obj.exercise.name
 
 
 class WorkoutSessionSerializer(serializers.ModelSerializer):
     sets = WorkoutSetSerializer(many=True, read_only=True)
-    total_sets = serializers.SerializerMethodField()
-    total_volume_kg = serializers.SerializerMethodField()
+    total_sets = serializers.IntegerField(source='set_count', read_only=True)
     
     class Meta:
         model = WorkoutSession
         fields = [
             'id', 'date', 'start_time', 'end_time', 'notes', 
-            'sets', 'total_sets', 'total_volume_kg', 'created_at', 'updated_at'
+            'sets', 'total_sets', 'total_volume_kg', 'total_reps',
+            'total_duration_seconds', 'total_distance_km', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
-    
-    def get_total_sets(self, obj):
-        return obj.sets.count()
+        read_only_fields = [
+            'id', 'total_volume_kg', 'total_reps', 'total_duration_seconds',
+            'total_distance_km', 'created_at', 'updated_at'
+        ]
+
+
+class WorkoutSessionSummarySerializer(WorkoutSessionSerializer):
+    """Session with maintained totals only, for history lists"""
     
-    def get_total_volume_kg(self, obj):
-        from decimal import Decimal
-        total = Decimal('0')
-        for set_obj in obj.sets.all():
-            if set_obj.reps and set_obj.weight_kg:
-                total += set_obj.reps * set_obj.weight_kg
-        return total
+    class Meta(WorkoutSessionSerializer.Meta):
+        fields = [field for field in WorkoutSessionSerializer.Meta.fields if field != 'sets']
 
+
+class PersonalBestSerializer(serializers.ModelSerializer):
+    exercise_name = serializers.CharField(source='exercise.name', read_only=True)
+    
+    class Meta:
+        model = PersonalBest
+        fields = [
+            'exercise', 'exercise_name', 'best_weight_kg', 'best_reps', 'best_e1rm_kg',
+            'total_volume_kg', 'session_count', 'last_performed', 'updated_at'
+        ]
+        read_only_fields = fields
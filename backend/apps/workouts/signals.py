@@ -0,0 +1,136 @@
+"""
+Django signals maintaining session totals, personal bests and workout caches
+"""
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from apps.workouts.models import Exercise, WorkoutSession, WorkoutSet
+from apps.workouts.business_logic import WorkoutBusinessLogic
+from apps.workouts.analytics import WorkoutAnalytics, TrainingLoadAnalytics
+from apps.workouts.catalog import ExerciseCatalog
+
+
+@receiver(pre_save, sender=WorkoutSet)
+def remember_previous_workout_set(sender, instance, **kwargs):
+    """Keep the stored set so totals can be moved and bests recomputed on update"""
+    instance._previous_set = None
+    instance._previous_exercise_id = None
+    if not instance._state.adding:
+        instance._previous_set = WorkoutSet.objects.filter(pk=instance.pk).values(
+            'session_id', 'exercise_id', 'weight_kg', 'reps', 'duration_seconds', 'distance_km'
+        ).first()
+        if instance._previous_set:
+            instance._previous_exercise_id = instance._previous_set['exercise_id']
+
+
+@receiver(post_save, sender=WorkoutSet)
+def update_session_totals_on_workout_set_save(sender, instance, **kwargs):
+    """Move the set's contribution to its session totals on create/update"""
+    previous = getattr(instance, '_previous_set', None)
+    if previous:
+        WorkoutBusinessLogic.apply_session_totals(
+            previous['session_id'],
+            WorkoutBusinessLogic.set_contribution(
+                previous['weight_kg'], previous['reps'],
+                previous['duration_seconds'], previous['distance_km']
+            ),
+            sign=-1
+        )
+    WorkoutBusinessLogic.apply_session_totals(
+        instance.session_id,
+        WorkoutBusinessLogic.set_contribution(
+            instance.weight_kg, instance.reps, instance.duration_seconds, instance.distance_km
+        )
+    )
+
+
+@receiver(post_delete, sender=WorkoutSet)
+def update_session_totals_on_workout_set_delete(sender, instance, **kwargs):
+    """Remove a deleted set from its session totals"""
+    if instance.session_id in WorkoutBusinessLogic.sessions_being_deleted():
+        return
+    WorkoutBusinessLogic.apply_session_totals(
+        instance.session_id,
+        WorkoutBusinessLogic.set_contribution(
+            instance.weight_kg, instance.reps, instance.duration_seconds, instance.distance_km
+        ),
+        sign=-1
+    )
+
+
+@receiver(post_save, sender=WorkoutSet)
+def update_personal_best_on_workout_set_save(sender, instance, created, **kwargs):
+    """Fold new sets into the personal best; recompute it when a set is edited"""
+    session = instance.session
+    if created:
+        WorkoutBusinessLogic.record_set_for_personal_best(session.user_id, instance, session.date)
+        return
+    
+    # Edits can invalidate PR flags on later sets, so replay the timeline too
+    exercise_ids = [instance.exercise_id]
+    previous = getattr(instance, '_previous_exercise_id', None)
+    if previous and previous != instance.exercise_id:
+        exercise_ids.append(previous)
+    for exercise_id in exercise_ids:
+        WorkoutBusinessLogic.recompute_personal_best(session.user_id, exercise_id)
+        WorkoutBusinessLogic.replay_prs(session.user_id, exercise_id)
+
+
+@receiver(post_delete, sender=WorkoutSet)
+def update_personal_best_on_workout_set_delete(sender, instance, **kwargs):
+    """Recompute the personal best and replay PR flags without the deleted set"""
+    if instance.session_id in WorkoutBusinessLogic.sessions_being_deleted():
+        return
+    WorkoutBusinessLogic.recompute_personal_best(instance.session.user_id, instance.exercise_id)
+    WorkoutBusinessLogic.replay_prs(instance.session.user_id, instance.exercise_id)
+
+
+@receiver(post_save, sender=WorkoutSet)
+@receiver(post_delete, sender=WorkoutSet)
+def invalidate_progression_cache(sender, instance, **kwargs):
+    """Drop cached progression series for the exercise(s) a set write touched"""
+    if instance.session_id in WorkoutBusinessLogic.sessions_being_deleted():
+        return
+    user_id = instance.session.user_id
+    WorkoutAnalytics.invalidate(user_id, instance.exercise_id)
+    previous = getattr(instance, '_previous_exercise_id', None)
+    if previous and previous != instance.exercise_id:
+        WorkoutAnalytics.invalidate(user_id, previous)
+
+
+@receiver(post_save, sender=WorkoutSet)
+@receiver(post_delete, sender=WorkoutSet)
+def invalidate_training_load_cache(sender, instance, **kwargs):
+    """Drop the cached training load when a set is created/updated/deleted"""
+    if instance.session_id in WorkoutBusinessLogic.sessions_being_deleted():
+        return
+    TrainingLoadAnalytics.invalidate(instance.session.user_id)
+
+
+@receiver(pre_delete, sender=WorkoutSession)
+def defer_set_upkeep_on_session_delete(sender, instance, **kwargs):
+    """Note the session's exercises so its cascaded set deletes can skip per-set upkeep"""
+    WorkoutBusinessLogic.sessions_being_deleted()[instance.pk] = set(
+        WorkoutSet.objects.filter(session=instance).values_list('exercise_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=WorkoutSession)
+def update_personal_bests_on_session_delete(sender, instance, **kwargs):
+    """Recompute bests, replay PR flags and drop caches once per exercise the session used"""
+    exercise_ids = WorkoutBusinessLogic.sessions_being_deleted().pop(instance.pk, None)
+    if exercise_ids is None:
+        return
+    for exercise_id in exercise_ids:
+        WorkoutBusinessLogic.recompute_personal_best(instance.user_id, exercise_id)
+        WorkoutBusinessLogic.replay_prs(instance.user_id, exercise_id)
+        WorkoutAnalytics.invalidate(instance.user_id, exercise_id)
+    if exercise_ids:
+        TrainingLoadAnalytics.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def invalidate_exercise_catalog(sender, instance, **kwargs):
+    """Bump the system library version or drop the user's custom overlay"""
+    ExerciseCatalog.invalidate(instance)
@@ -0,0 +1,38 @@
+"""
+Celery tasks for workout analytics
+"""
+from celery import shared_task
+import logging
+
+from .analytics import TrainingLoadAnalytics
+from .parallel import chunked
+
+logger = logging.getLogger(__name__)
+
+TRAINING_LOAD_CHUNK_SIZE = 200
+
+
+@shared_task
+def precompute_training_load_chunk(user_ids):
+    """
+    Compute and cache training load for one chunk of users
+    """
+    computed = TrainingLoadAnalytics.precompute_training_loads(user_ids)
+    logger.info(f"Precomputed training load for {computed} users")
+    return computed
+
+
+@shared_task
+def precompute_training_loads(chunk_size=TRAINING_LOAD_CHUNK_SIZE):
+    """
+    Nightly task fanning out training-load precompute for active users
+    Chunks run as separate tasks so they spread across Celery workers
+    (prefork workers cannot start their own process pools)
+    """
+    user_ids = TrainingLoadAnalytics.active_user_ids()
+    chunks = chunked(user_ids, chunk_size)
+    for chunk in chunks:
+        precompute_training_load_chunk.delay(chunk)
+    
+    logger.info(f"Queued training load precompute for {len(user_ids)} users in {len(chunks)} chunks")
+    return len(chunks)
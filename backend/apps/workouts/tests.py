@@ -0,0 +1,704 @@
+"""
+Tests for workouts app
+"""
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+
+from apps.accounts.models import Profile
+from apps.reports.models import DailySummary
+from apps.workouts.models import Exercise, WorkoutSession, WorkoutSet, PersonalBest
+from apps.workouts.business_logic import WorkoutBusinessLogic
+
+
+class PersonalBestTest(APITestCase):
+    """Test maintained personal bests and PR detection"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.exercise = Exercise.objects.create(name='Bench Press', category='push', is_compound=True)
+        self.session = self._session(date(2024, 1, 15))
+    
+    def _session(self, day):
+        return WorkoutSession.objects.create(
+            user=self.user,
+            date=day,
+            start_time=datetime(day.year, day.month, day.day, 18, 0, tzinfo=dt_timezone.utc)
+        )
+    
+    def _set(self, session, set_number, weight_kg, reps):
+        return WorkoutSet.objects.create(
+            session=session,
+            exercise=self.exercise,
+            set_number=set_number,
+            weight_kg=Decimal(weight_kg),
+            reps=reps
+        )
+    
+    def _best(self):
+        return PersonalBest.objects.get(user=self.user, exercise=self.exercise)
+    
+    def test_best_maintained_on_insert(self):
+        """Test bests, volume, sessions and last date follow new sets"""
+        self._set(self.session, 1, '100', 5)
+        self._set(self.session, 2, '100', 6)
+        self._set(self._session(date(2024, 1, 18)), 1, '90', 10)
+        
+        best = self._best()
+        self.assertEqual((best.best_weight_kg, best.best_reps), (Decimal('100'), 6))
+        self.assertEqual(best.best_e1rm_kg, Decimal('120.00'))  # 90 x 10 and 100 x 6 tie
+        self.assertEqual(best.total_volume_kg, Decimal('2000'))
+        self.assertEqual(best.session_count, 2)
+        self.assertEqual(best.last_performed, date(2024, 1, 18))
+    
+    def test_best_recomputed_on_update_and_delete(self):
+        """Test edits and deletes recompute the row"""
+        heavy = self._set(self.session, 1, '120', 3)
+        self._set(self.session, 2, '100', 5)
+        
+        heavy.weight_kg = Decimal('95')
+        heavy.save()
+        self.assertEqual(self._best().best_weight_kg, Decimal('100'))
+        
+        heavy.delete()
+        best = self._best()
+        self.assertEqual(best.total_volume_kg, Decimal('500'))
+        self.assertEqual(best.session_count, 1)
+        
+        WorkoutSet.objects.filter(session=self.session).delete()
+        self.assertFalse(PersonalBest.objects.filter(user=self.user).exists())
+    
+    def _session_delete_queries(self, day, set_count):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        session = self._session(day)
+        exercises = [Exercise.objects.create(name=f'{name} {day}', category='push') for name in ('Press', 'Dip')]
+        for number in range(1, set_count + 1):
+            WorkoutSet.objects.create(
+                session=session, exercise=exercises[number % 2], set_number=number, weight_kg=Decimal('50'), reps=5
+            )
+        with CaptureQueriesContext(connection) as queries:
+            session.delete()
+        return len(queries)
+    
+    def test_session_delete_recomputes_once_per_exercise(self):
+        """Test deleting a session does the personal best and PR upkeep once per exercise, not per set"""
+        self.assertEqual(
+            self._session_delete_queries(date(2024, 2, 1), 2),
+            self._session_delete_queries(date(2024, 2, 2), 6)
+        )
+        
+        squat = Exercise.objects.create(name='Squat', category='legs', is_compound=True)
+        later = self._session(date(2024, 1, 18))
+        self._set(later, 1, '100', 5)
+        for number in range(1, 6):
+            WorkoutSet.objects.create(
+                session=self.session, exercise=self.exercise if number % 2 else squat,
+                set_number=number, weight_kg=Decimal('110'), reps=5
+            )
+        self.assertFalse(WorkoutSet.objects.get(session=later).is_pr)
+        
+        self.session.delete()
+        
+        self.assertTrue(WorkoutSet.objects.get(session=later).is_pr)
+        self.assertEqual(self._best().best_weight_kg, Decimal('100'))
+        self.assertFalse(PersonalBest.objects.filter(user=self.user, exercise=squat).exists())
+    
+    def test_detect_pr_uses_stored_best(self):
+        """Test heavier weight or more reps at the best weight is a PR"""
+        self._set(self.session, 1, '100', 5)
+        
+        with self.assertNumQueries(1):
+            self.assertTrue(WorkoutBusinessLogic.detect_pr(self.user, self.exercise, Decimal('102.5'), 1))
+        self.assertTrue(WorkoutBusinessLogic.detect_pr(self.user, self.exercise, Decimal('100'), 6))
+        self.assertFalse(WorkoutBusinessLogic.detect_pr(self.user, self.exercise, Decimal('100'), 5))
+        self.assertFalse(WorkoutBusinessLogic.detect_pr(self.user, self.exercise, Decimal('95'), 12))
+    
+    def test_add_set_flags_pr_and_prs_endpoint(self):
+        """Test add_set flags PRs and /prs serves the personal best rows"""
+        url = reverse('workoutsession-add-set', args=[self.session.id])
+        first = self.client.post(url, {'exercise': self.exercise.id, 'set_number': 1, 'weight_kg': '100', 'reps': 5})
+        second = self.client.post(url, {'exercise': self.exercise.id, 'set_number': 2, 'weight_kg': '100', 'reps': 5})
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(first.data['is_pr'])
+        self.assertFalse(second.data['is_pr'])
+        
+        response = self.client.get(reverse('workoutsession-prs'))
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['exercise_name'], 'Bench Press')
+        self.assertEqual(response.data[0]['best_reps'], 5)
+    
+    def test_rebuild_personal_bests(self):
+        """Test bulk rebuild matches the maintained rows"""
+        self._set(self.session, 1, '100', 5)
+        self._set(self._session(date(2024, 1, 18)), 1, '105', 2)
+        self._set(self.session, 2, '105', 3)
+        squat = Exercise.objects.create(name='Squat', category='legs', is_compound=True)
+        for number, (weight_kg, reps) in enumerate([('140', 5), ('140', 8), ('150', 1)], start=3):
+            WorkoutSet.objects.create(
+                session=self.session, exercise=squat, set_number=number, weight_kg=Decimal(weight_kg), reps=reps
+            )
+        fields = ('best_weight_kg', 'best_reps', 'best_e1rm_kg', 'total_volume_kg', 'session_count', 'last_performed')
+        maintained = {
+            best.exercise_id: [getattr(best, field) for field in fields]
+            for best in PersonalBest.objects.filter(user=self.user)
+        }
+        PersonalBest.objects.all().delete()
+        
+        # Grouped queries, independent of the number of (user, exercise) pairs
+        with self.assertNumQueries(6):
+            self.assertEqual(WorkoutBusinessLogic.rebuild_personal_bests([self.user.id]), 2)
+        
+        rebuilt = {
+            best.exercise_id: [getattr(best, field) for field in fields]
+            for best in PersonalBest.objects.filter(user=self.user)
+        }
+        self.assertEqual(rebuilt, maintained)
+
+
+class SessionPRPassTest(TestCase):
+    """Test the batched session-level PR pass"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.bench = Exercise.objects.create(name='Bench Press', category='push')
+        self.squat = Exercise.objects.create(name='Squat', category='legs')
+    
+    def _session(self, day, hour=18):
+        return WorkoutSession.objects.create(
+            user=self.user,
+            date=day,
+            start_time=datetime(day.year, day.month, day.day, hour, 0, tzinfo=dt_timezone.utc)
+        )
+    
+    def _set(self, session, exercise, set_number, weight_kg, reps):
+        return WorkoutSet.objects.create(
+            session=session, exercise=exercise, set_number=set_number,
+            weight_kg=Decimal(weight_kg), reps=reps
+        )
+    
+    def test_sets_raise_the_bar_within_session(self):
+        """Test prior bests come from earlier sessions and PR sets raise the bar"""
+        earlier = self._session(date(2024, 1, 10))
+        self._set(earlier, self.bench, 1, '100', 5)
+        
+        session = self._session(date(2024, 1, 15))
+        sets = [
+            self._set(session, self.bench, 1, '100', 6),   # more reps at best weight
+            self._set(session, self.bench, 2, '100', 6),   # ties the new bar
+            self._set(session, self.bench, 3, '105', 1),   # heavier
+            self._set(session, self.squat, 1, '140', 5),   # first time
+            self._set(session, self.squat, 2, '130', 8),
+        ]
+        # A later session must not count as prior
+        self._set(self._session(date(2024, 1, 20)), self.bench, 1, '150', 1)
+        
+        changed = WorkoutBusinessLogic.update_workout_prs(session)
+        
+        flags = [WorkoutSet.objects.get(pk=s.pk).is_pr for s in sets]
+        self.assertEqual(flags, [True, False, True, True, False])
+        self.assertEqual(len(changed), 3)
+        self.assertEqual(DailySummary.objects.get(user=self.user, date=date(2024, 1, 15)).prs_achieved, 3)
+        
+        # Nothing changed on a second pass, so nothing is written
+        with self.assertNumQueries(2):
+            self.assertEqual(WorkoutBusinessLogic.update_workout_prs(session), [])
+
+
+class PRReplayTest(TestCase):
+    """Test chronological PR replay after edits and deletions"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.bench = Exercise.objects.create(name='Bench Press', category='push')
+        self.sets = []
+        for day, weight_kg in [(10, '100'), (12, '105'), (14, '103'), (16, '110')]:
+            session = WorkoutSession.objects.create(
+                user=self.user,
+                date=date(2024, 1, day),
+                start_time=datetime(2024, 1, day, 18, 0, tzinfo=dt_timezone.utc)
+            )
+            self.sets.append(WorkoutSet.objects.create(
+                session=session, exercise=self.bench, set_number=1,
+                weight_kg=Decimal(weight_kg), reps=5
+            ))
+    
+    def _flags(self):
+        return list(WorkoutSet.objects.filter(
+            session__user=self.user
+        ).order_by('session__date').values_list('is_pr', flat=True))
+    
+    def test_replay_sets_flags_and_writes_only_changes(self):
+        """Test a linear pass flags the running best and reports changed dates"""
+        dates = WorkoutBusinessLogic.replay_prs(self.user.id, self.bench.id)
+        self.assertEqual(self._flags(), [True, True, False, True])
+        self.assertEqual(dates, {date(2024, 1, 10), date(2024, 1, 12), date(2024, 1, 16)})
+        
+        self.assertEqual(WorkoutBusinessLogic.replay_prs(self.user.id, self.bench.id), set())
+    
+    def test_delete_and_edit_replay_later_flags(self):
+        """Test removing or lowering an old PR re-flags the sets after it"""
+        WorkoutBusinessLogic.replay_prs(self.user.id, self.bench.id)
+        
+        self.sets[1].delete()
+        self.assertEqual(self._flags(), [True, True, True])
+        self.assertEqual(
+            DailySummary.objects.get(user=self.user, date=date(2024, 1, 14)).prs_achieved, 1
+        )
+        
+        self.sets[0].weight_kg = Decimal('120')
+        self.sets[0].save()
+        self.assertEqual(self._flags(), [True, False, False])
+    
+    def test_replay_command(self):
+        """Test the management command replays every timeline"""
+        out = StringIO()
+        call_command('replay_prs', workers=1, stdout=out)
+        self.assertEqual(self._flags(), [True, True, False, True])
+        self.assertIn('Replayed 1 exercise timelines', out.getvalue())
+
+
+class ProgressionTest(APITestCase):
+    """Test the vectorised e1RM progression series and its cache"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.bench = Exercise.objects.create(name='Bench Press', category='push')
+        self.url = reverse('exercise-progression', args=[self.bench.id])
+        # Mon 01-08, Thu 01-11 and Mon 01-15; best sets e1RM 120, 105, 126
+        for day, sets in [(8, [('100', 6), ('90', 3)]), (11, [('90', 5)]), (15, [('105', 6)])]:
+            session = WorkoutSession.objects.create(
+                user=self.user,
+                date=date(2024, 1, day),
+                start_time=datetime(2024, 1, day, 18, 0, tzinfo=dt_timezone.utc)
+            )
+            for set_number, (weight_kg, reps) in enumerate(sets, start=1):
+                WorkoutSet.objects.create(
+                    session=session, exercise=self.bench, set_number=set_number,
+                    weight_kg=Decimal(weight_kg), reps=reps
+                )
+    
+    def test_progression_series(self):
+        """Test per-session best, running max, weekly change and trend"""
+        response = self.client.get(self.url, {'window': 2})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual(data['dates'], ['2024-01-08', '2024-01-11', '2024-01-15'])
+        self.assertEqual(data['e1rm'], [120.0, 105.0, 126.0])
+        self.assertEqual(data['rolling_max'], [120.0, 120.0, 126.0])
+        self.assertEqual(data['trend'], [120.0, 112.5, 115.5])
+        self.assertEqual(data['weeks']['week_start'], ['2024-01-08', '2024-01-15'])
+        self.assertEqual(data['weeks']['change_pct'], [None, 5.0])
+    
+    def test_cached_until_set_write(self):
+        """Test the series is cached until a set for the exercise changes"""
+        self.client.get(self.url)
+        with self.assertNumQueries(1):  # exercise lookup only
+            self.client.get(self.url)
+        
+        WorkoutSet.objects.filter(session__date=date(2024, 1, 15)).first().delete()
+        self.assertEqual(len(self.client.get(self.url).data['dates']), 2)
+
+
+class SessionTotalsTest(APITestCase):
+    """Test denormalized totals on workout sessions"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.bench = Exercise.objects.create(name='Bench Press', category='push')
+        self.run = Exercise.objects.create(name='Run', category='cardio')
+        self.session = WorkoutSession.objects.create(
+            user=self.user,
+            date=date(2024, 1, 15),
+            start_time=datetime(2024, 1, 15, 18, 0, tzinfo=dt_timezone.utc)
+        )
+        self.heavy = WorkoutSet.objects.create(
+            session=self.session, exercise=self.bench, set_number=1, weight_kg=Decimal('100'), reps=5
+        )
+        WorkoutSet.objects.create(
+            session=self.session, exercise=self.bench, set_number=2, weight_kg=Decimal('80'), reps=8
+        )
+        WorkoutSet.objects.create(
+            session=self.session, exercise=self.run, set_number=1,
+            duration_seconds=1200, distance_km=Decimal('4.25')
+        )
+    
+    def _totals(self):
+        self.session.refresh_from_db()
+        return (
+            self.session.set_count, self.session.total_volume_kg, self.session.total_reps,
+            self.session.total_duration_seconds, self.session.total_distance_km
+        )
+    
+    def test_totals_follow_set_writes(self):
+        """Test insert, update and delete adjust the maintained totals"""
+        self.assertEqual(self._totals(), (3, Decimal('1140'), 13, 1200, Decimal('4.25')))
+        
+        self.heavy.reps = 3
+        self.heavy.save()
+        self.assertEqual(self._totals(), (3, Decimal('940'), 11, 1200, Decimal('4.25')))
+        
+        self.heavy.delete()
+        self.assertEqual(self._totals(), (2, Decimal('640'), 8, 1200, Decimal('4.25')))
+    
+    def test_rebuild_matches_maintained_totals(self):
+        """Test the grouped rebuild reproduces the maintained totals"""
+        maintained = self._totals()
+        WorkoutSession.objects.filter(pk=self.session.pk).update(set_count=0, total_volume_kg=0, total_reps=0)
+        
+        WorkoutBusinessLogic.rebuild_session_totals([self.session.pk])
+        
+        self.assertEqual(self._totals(), maintained)
+    
+    def test_session_save_keeps_concurrent_totals(self):
+        """Test saving a session loaded before a set write does not restore its stale totals"""
+        stale = WorkoutSession.objects.get(pk=self.session.pk)
+        WorkoutSet.objects.create(session=self.session, exercise=self.bench, set_number=9, weight_kg=Decimal('50'), reps=2)
+        
+        response = self.client.patch(
+            reverse('workoutsession-detail', args=[self.session.id]), {'notes': 'Felt strong'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stale.notes = 'Edited elsewhere'
+        stale.save()
+        
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.notes, 'Edited elsewhere')
+        self.assertEqual(self.session.set_count, 4)
+        self.assertEqual(self.session.total_volume_kg, Decimal('1240'))
+    
+    def test_serializer_reads_maintained_fields(self):
+        """Test the list endpoint serves totals without counting sets"""
+        response = self.client.get(reverse('workoutsession-list'))
+        session = response.data['results'][0]
+        self.assertEqual(session['total_sets'], 3)
+        self.assertEqual(session['total_volume_kg'], '1140.00')
+        self.assertEqual(session['total_distance_km'], '4.25')
+        self.assertEqual(
+            DailySummary.objects.get(user=self.user, date=date(2024, 1, 15)).total_volume_kg, Decimal('1140')
+        )
+
+
+class BulkSetLoggingTest(APITestCase):
+    """Test the batch set logging endpoint"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.bench = Exercise.objects.create(name='Bench Press', category='push')
+        self.squat = Exercise.objects.create(name='Squat', category='legs')
+        self.session = WorkoutSession.objects.create(
+            user=self.user,
+            date=date(2024, 1, 15),
+            start_time=datetime(2024, 1, 15, 18, 0, tzinfo=dt_timezone.utc)
+        )
+        self.url = reverse('workoutsession-bulk-add-sets', args=[self.session.id])
+    
+    def test_bulk_insert_with_single_pass_follow_up(self):
+        """Test sets are inserted with totals, PR flags, bests and summary updated"""
+        payload = [
+            {'exercise': str(self.bench.id), 'set_number': 1, 'weight_kg': '100', 'reps': 5},
+            {'exercise': str(self.bench.id), 'set_number': 2, 'weight_kg': '105', 'reps': 3},
+            {'exercise': str(self.bench.id), 'set_number': 3, 'weight_kg': '100', 'reps': 5},
+            {'exercise': str(self.squat.id), 'set_number': 1, 'weight_kg': '140', 'reps': 5},
+        ]
+        
+        response = self.client.post(self.url, payload, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 4)
+        flags = dict(WorkoutSet.objects.filter(
+            exercise=self.bench
+        ).values_list('set_number', 'is_pr'))
+        self.assertEqual(flags, {1: True, 2: True, 3: False})
+        
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.set_count, self.session.total_volume_kg), (4, Decimal('2015')))
+        self.assertEqual(PersonalBest.objects.get(user=self.user, exercise=self.bench).best_weight_kg, Decimal('105'))
+        summary = DailySummary.objects.get(user=self.user, date=date(2024, 1, 15))
+        self.assertEqual((summary.total_volume_kg, summary.prs_achieved), (Decimal('2015'), 3))
+    
+    def test_query_count_independent_of_batch_size(self):
+        """Test validation, insert and follow-up do not query per item"""
+        def post(session, count):
+            payload = [
+                {'exercise': str(self.bench.id), 'set_number': n, 'weight_kg': '60', 'reps': 10}
+                for n in range(1, count + 1)
+            ]
+            url = reverse('workoutsession-bulk-add-sets', args=[session.id])
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(url, payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+        
+        small, large = [
+            WorkoutSession.objects.create(
+                user=self.user,
+                date=date(2024, 1, day),
+                start_time=datetime(2024, 1, day, 18, 0, tzinfo=dt_timezone.utc)
+            )
+            for day in (16, 17)
+        ]
+        post(self.session, 1)  # First write creates the personal best row
+        self.assertEqual(post(small, 2), post(large, 20))
+    
+    def test_invalid_batches_rejected(self):
+        """Test duplicates and another user's custom exercise are rejected"""
+        duplicate = [
+            {'exercise': str(self.bench.id), 'set_number': 1, 'weight_kg': '60', 'reps': 10},
+            {'exercise': str(self.bench.id), 'set_number': 1, 'weight_kg': '60', 'reps': 10},
+        ]
+        self.assertEqual(self.client.post(self.url, duplicate, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        
+        other = User.objects.create_user(username='other', password='testpass123')
+        private = Exercise.objects.create(name='Secret', category='push', is_custom=True, created_by=other)
+        response = self.client.post(self.url, [
+            {'exercise': str(private.id), 'set_number': 1, 'weight_kg': '60', 'reps': 10}
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(WorkoutSet.objects.exists())
+
+
+class TrainingLoadTest(APITestCase):
+    """Test acute:chronic workload ratio analytics"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.squat = Exercise.objects.create(name='Squat', category='legs')
+        self.run = Exercise.objects.create(name='Run', category='cardio')
+    
+    def _log(self, day, exercise, **fields):
+        session = WorkoutSession.objects.create(
+            user=self.user,
+            date=day,
+            start_time=datetime(day.year, day.month, day.day, 18, 0, tzinfo=dt_timezone.utc)
+        )
+        WorkoutSet.objects.create(session=session, exercise=exercise, set_number=1, **fields)
+    
+    def test_blockwise_ewma_matches_recursion(self):
+        """Test the vectorised EWMA equals the step-by-step recursion across blocks"""
+        import numpy as np
+        from apps.workouts.analytics import TrainingLoadAnalytics
+        
+        loads = np.random.default_rng(1).uniform(0, 5000, size=(300, 3))
+        loads[::3] = 0
+        alpha = 2 / (7 + 1)
+        expected = np.zeros_like(loads)
+        state = np.zeros(3)
+        for t in range(len(loads)):
+            state = alpha * loads[t] + (1 - alpha) * state
+            expected[t] = state
+        
+        np.testing.assert_allclose(TrainingLoadAnalytics.ewma(loads, 7, block=64), expected, rtol=1e-9)
+    
+    def test_spike_flagged_per_category(self):
+        """Test a sudden jump in leg volume is a spike and cardio is tracked in minutes"""
+        today = date.today()
+        for offset in range(28, 7, -2):
+            self._log(today - timedelta(days=offset), self.squat, weight_kg=Decimal('100'), reps=10)
+        for offset in range(6, -1, -1):
+            self._log(today - timedelta(days=offset), self.squat, weight_kg=Decimal('150'), reps=20)
+        self._log(today, self.run, duration_seconds=1800, distance_km=Decimal('5'))
+        
+        response = self.client.get(reverse('workoutsession-training-load'), {'days': 14})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['dates']), 14)
+        self.assertEqual(response.data['dates'][-1], today.isoformat())
+        self.assertEqual(response.data['latest']['legs']['status'], 'spike')
+        self.assertIsNone(response.data['latest']['push']['ratio'])
+        self.assertAlmostEqual(response.data['latest']['cardio']['acute'], 30 * 2 / 8, places=2)
+    
+    def test_cache_dropped_on_set_write(self):
+        """Test the default window is cached until a set is written"""
+        today = date.today()
+        self._log(today, self.squat, weight_kg=Decimal('100'), reps=5)
+        url = reverse('workoutsession-training-load')
+        
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        
+        self._log(today, self.squat, weight_kg=Decimal('100'), reps=5)
+        self.assertEqual(self.client.get(url).data['latest']['legs']['acute'], 250.0)
+
+
+class ExerciseCatalogTest(APITestCase):
+    """Test the process-local exercise catalog and per-user overlay"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.bench = Exercise.objects.create(name='Bench Press', category='push')
+        self.mine = Exercise.objects.create(name='Cable Fly', category='push', is_custom=True, created_by=self.user)
+        self.theirs = Exercise.objects.create(name='Secret', category='push', is_custom=True, created_by=self.other)
+    
+    def test_resolution_without_db_after_warmup(self):
+        """Test system and own custom exercises resolve from cache; others' do not resolve"""
+        from apps.workouts.catalog import ExerciseCatalog
+        
+        ExerciseCatalog.get(self.bench.id, self.user.id)
+        ExerciseCatalog.get(self.mine.id, self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(ExerciseCatalog.get(self.bench.id, self.user.id).name, 'Bench Press')
+            self.assertEqual(ExerciseCatalog.get(str(self.mine.id), self.user.id).name, 'Cable Fly')
+            self.assertIsNone(ExerciseCatalog.get(self.theirs.id, self.user.id))
+    
+    def test_writes_invalidate(self):
+        """Test edits to system and custom exercises are picked up"""
+        from apps.workouts.catalog import ExerciseCatalog
+        
+        ExerciseCatalog.visible(self.user.id)
+        self.bench.name = 'Flat Bench Press'
+        self.bench.save()
+        Exercise.objects.create(name='Incline Fly', category='push', is_custom=True, created_by=self.user)
+        
+        names = [exercise.name for exercise in ExerciseCatalog.visible(self.user.id)]
+        self.assertEqual(names, ['Cable Fly', 'Flat Bench Press', 'Incline Fly'])
+    
+    def test_list_and_set_validation_use_catalog(self):
+        """Test the exercise list and add_set validation read the catalog"""
+        response = self.client.get(reverse('exercise-list'))
+        self.assertEqual([exercise['name'] for exercise in response.data], ['Bench Press', 'Cable Fly'])
+        
+        session = WorkoutSession.objects.create(
+            user=self.user,
+            date=date(2024, 1, 15),
+            start_time=datetime(2024, 1, 15, 18, 0, tzinfo=dt_timezone.utc)
+        )
+        url = reverse('workoutsession-add-set', args=[session.id])
+        response = self.client.post(url, {'exercise': self.theirs.id, 'set_number': 1, 'weight_kg': '10', 'reps': 5})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {'exercise': self.mine.id, 'set_number': 1, 'weight_kg': '10', 'reps': 5})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['exercise_name'], 'Cable Fly')
+
+
+class WorkoutHistoryPaginationTest(APITestCase):
+    """Test keyset-paginated workout history"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.bench = Exercise.objects.create(name='Bench Press', category='push')
+        self.squat = Exercise.objects.create(name='Squat', category='legs')
+        # Two sessions per day and a pair sharing a start time, so ties need the id
+        self.sessions = []
+        for offset in range(6):
+            day = date(2024, 1, 1) + timedelta(days=offset)
+            for hour in (7, 18, 18) if offset == 3 else (7, 18):
+                self.sessions.append(WorkoutSession.objects.create(
+                    user=self.user,
+                    date=day,
+                    start_time=datetime(day.year, day.month, day.day, hour, 0, tzinfo=dt_timezone.utc)
+                ))
+    
+    def _add_sets(self, session, count):
+        for number in range(1, count + 1):
+            WorkoutSet.objects.create(
+                session=session, exercise=self.bench if number % 2 else self.squat,
+                set_number=number, weight_kg=Decimal('60'), reps=5
+            )
+    
+    def test_pages_cover_history_newest_first(self):
+        """Test following next links yields every session once, in key order"""
+        url = reverse('workoutsession-list')
+        seen = []
+        params = {'page_size': 5}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 5)
+            seen.extend(session['id'] for session in response.data['results'])
+            url, params = response.data['next'], None
+        
+        expected = sorted(self.sessions, key=lambda s: (s.date, s.start_time, s.id), reverse=True)
+        self.assertEqual(seen, [str(session.id) for session in expected])
+    
+    def test_query_count_independent_of_sets(self):
+        """Test nested sets are prefetched instead of loaded per session"""
+        url = reverse('workoutsession-list')
+        self._add_sets(self.sessions[-1], 1)
+        with self.assertNumQueries(3):
+            self.client.get(url)
+        
+        for session in self.sessions[:-1]:
+            self._add_sets(session, 4)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results'][0]['sets']), 1)
+        self.assertEqual(response.data['results'][0]['sets'][0]['exercise_name'], 'Bench Press')
+    
+    def test_include_sets_false(self):
+        """Test list views can omit nested sets and skip the prefetch"""
+        self._add_sets(self.sessions[-1], 2)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('workoutsession-list'), {'include_sets': 'false'})
+        session = response.data['results'][0]
+        self.assertNotIn('sets', session)
+        self.assertEqual(session['total_sets'], 2)
+    
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is rejected"""
+        response = self.client.get(reverse('workoutsession-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
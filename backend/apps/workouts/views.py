@@ -1,10 +1,22 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
 from django.db.models import Q
+import uuid
 
-from .models import Exercise, WorkoutSession, WorkoutSet
-from .serializers import ExerciseSerializer, WorkoutSessionSerializer, WorkoutSetSerializer
+from .models import Exercise, WorkoutSession, WorkoutSet, PersonalBest
+from .serializers import (
+    ExerciseSerializer, WorkoutSessionSerializer, WorkoutSessionSummarySerializer,
+    WorkoutSetSerializer, PersonalBestSerializer
+)
+from .business_logic import WorkoutBusinessLogic
+from .catalog import ExerciseCatalog
+from .analytics import WorkoutAnalytics, TrainingLoadAnalytics, TREND_WINDOW, TRAINING_LOAD_DAYS
+from .pagination import WorkoutHistoryPagination
+
+
+BULK_SET_LIMIT = getattr(settings, 'WORKOUT_BULK_SET_LIMIT', 100)
 
 
 class ExerciseViewSet(viewsets.ModelViewSet):
@@ -17,17 +29,50 @@ class ExerciseViewSet(viewsets.ModelViewSet):
             Q(is_custom=False) | Q(created_by=self.request.user)
         )
     
+    def list(self, request, *args, **kwargs):
+        """GET /exercises - Served from the exercise catalog cache"""
+        exercises = ExerciseCatalog.visible(request.user.id)
+        page = self.paginate_queryset(exercises)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(exercises, many=True).data)
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user, is_custom=True)
+    
+    @action(detail=True, methods=['get'])
+    def progression(self, request, pk=None):
+        """GET /exercises/{id}/progression?window=5 - Estimated 1RM curve"""
+        exercise = self.get_object()
+        try:
+            window = int(request.query_params.get('window', TREND_WINDOW))
+        except ValueError:
+            return Response({'error': 'window must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if window < 1:
+            return Response({'error': 'window must be at least 1'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(WorkoutAnalytics.get_progression(request.user, exercise, window))
 
 
 class WorkoutSessionViewSet(viewsets.ModelViewSet):
     """Workout session management"""
     serializer_class = WorkoutSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = WorkoutHistoryPagination
+    
+    def include_sets(self):
+        return self.request.query_params.get('include_sets', 'true').lower() not in ('false', '0', 'no')
     
     def get_queryset(self):
-        return WorkoutSession.objects.filter(user=self.request.user)
+        queryset = WorkoutSession.objects.filter(user=self.request.user)
+        if self.action in ('list', 'retrieve') and self.include_sets():
+            queryset = queryset.prefetch_related('sets__exercise')
+        return queryset
+    
+    def get_serializer_class(self):
+        if self.action == 'list' and not self.include_sets():
+            return WorkoutSessionSummarySerializer
+        return WorkoutSessionSerializer
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -36,19 +81,81 @@ class WorkoutSessionViewSet(viewsets.ModelViewSet):
     def add_set(self, request, pk=None):
         """POST /workouts/{id}/sets - Add a set to workout"""
         session = self.get_object()
-        serializer = WorkoutSetSerializer(data=request.data)
+        serializer = WorkoutSetSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save(session=session)
+            is_pr = WorkoutBusinessLogic.detect_pr(
+                request.user,
+                serializer.validated_data['exercise'],
+                serializer.validated_data.get('weight_kg'),
+                serializer.validated_data.get('reps')
+            )
+            serializer.save(session=session, is_pr=is_pr)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=True, methods=['post'], url_path='sets/bulk')
+    def bulk_add_sets(self, request, pk=None):
+        """POST /workouts/{id}/sets/bulk - Add a list of sets in one request"""
+        session = self.get_object()
+        if not isinstance(request.data, list) or not request.data:
+            return Response({'error': 'Expected a non-empty list of sets'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > BULK_SET_LIMIT:
+            return Response(
+                {'error': f'At most {BULK_SET_LIMIT} sets per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Resolve every referenced exercise the user can see up front, from the catalog
+        exercise_ids = set()
+        for item in request.data:
+            try:
+                exercise_ids.add(uuid.UUID(str(item.get('exercise'))))
+            except (AttributeError, ValueError):
+                pass
+        exercises = ExerciseCatalog.resolve_many(exercise_ids, request.user.id)
+        
+        serializer = WorkoutSetSerializer(
+            data=request.data, many=True, context={'request': request, 'exercises': exercises}
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Set numbers must be unique per exercise, within the batch and the session
+        keys = [(item['exercise'].id, item['set_number']) for item in serializer.validated_data]
+        taken = set(session.sets.filter(
+            exercise_id__in=exercises
+        ).values_list('exercise_id', 'set_number'))
+        if len(set(keys)) != len(keys) or taken.intersection(keys):
+            return Response(
+                {'error': 'Duplicate set_number for an exercise in this session'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        created = WorkoutBusinessLogic.log_sets_bulk(session, serializer.validated_data)
+        return Response(
+            WorkoutSetSerializer(created, many=True, context={'request': request}).data,
+            status=status.HTTP_201_CREATED
+        )
+    
+    @action(detail=False, methods=['get'], url_path='training-load')
+    def training_load(self, request):
+        """GET /workouts/training-load?days=90 - Acute:chronic workload ratio per category"""
+        try:
+            days = int(request.query_params.get('days', TRAINING_LOAD_DAYS))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= 365:
+            return Response({'error': 'days must be between 1 and 365'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(TrainingLoadAnalytics.get_training_load(request.user, days))
+    
     @action(detail=False, methods=['get'])
     def prs(self, request):
         """GET /workouts/prs - Get personal records"""
-        prs = WorkoutSet.objects.filter(
-            session__user=self.request.user,
-            is_pr=True
-        ).select_related('exercise', 'session')
+        prs = PersonalBest.objects.filter(
+            user=self.request.user,
+            best_weight_kg__isnull=False
+        ).select_related('exercise').order_by('exercise__name')
         
-        return Response(WorkoutSetSerializer(prs, many=True).data)
+        return Response(PersonalBestSerializer(prs, many=True).data)
 